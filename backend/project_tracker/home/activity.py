@@ -0,0 +1,87 @@
+"""
+Task Activity & Comments
+========================
+A task's activity log and comments are rows (TaskActivity /
+TaskComment), appended one at a time by /api/tasks/<id>/activity/ and
+/api/tasks/<id>/comments/. Nothing rewrites an existing entry, so
+concurrent writers can't drop each other's lines and an append costs
+the same however long the log is.
+
+transition_status() changes a task's status and logs it in one short
+transaction; given the status the caller last saw, it refuses to move
+a task someone else has already moved. bulk_update_tasks() does the
+same for a whole kanban reorganisation (status and position of many
+cards) in one transaction and two or three queries.
+"""
+
+from django.db import transaction
+
+from .dashboard import invalidate_summary
+from .models import Task, TaskActivity, TaskComment
+
+RECENT_ENTRIES = 50  # embedded in the task detail; older entries are paged from the endpoints
+
+
+def log_activity(task_id, action, by="") -> TaskActivity:
+    return TaskActivity.objects.create(task_id=task_id, action=action, by=by)
+
+
+def add_comment(task_id, content, author="") -> TaskComment:
+    with transaction.atomic():
+        comment = TaskComment.objects.create(task_id=task_id, content=content, author=author)
+        log_activity(task_id, "Comment added", author)
+    return comment
+
+
+def transition_status(task_id, status, by="", expected=None) -> bool:
+    """Set the status and log it atomically. False if `expected` is given and no longer the current status."""
+    with transaction.atomic():
+        tasks = Task.objects.filter(pk=task_id)
+        if expected is not None:
+            tasks = tasks.filter(status=expected)
+        if not tasks.update(status=status):
+            return False
+        log_activity(task_id, f"Status changed to {status}", by)
+        # update() sends no post_save, so drop the dashboard's task counts here
+        transaction.on_commit(invalidate_summary)
+    return True
+
+
+def bulk_update_tasks(changes, by="") -> tuple:
+    """
+    Apply [{"id", "status"?, "position"?}, ...] with one bulk_update, logging
+    each status change. Returns ([{"id", <changed fields>}], [missing ids]);
+    unchanged values are left out, and a repeated id takes its last change.
+    """
+    wanted = {}
+    for change in changes:
+        wanted.setdefault(change["id"], {}).update({k: v for k, v in change.items() if k in ("status", "position")})
+
+    with transaction.atomic():
+        tasks = Task.objects.select_for_update().only("id", "status", "position").in_bulk(list(wanted))
+        updated, entries, fields = [], [], set()
+        for pk, values in wanted.items():
+            task = tasks.get(pk)
+            if task is None:
+                continue
+            diff = {field: value for field, value in values.items() if getattr(task, field) != value}
+            if not diff:
+                continue
+            for field, value in diff.items():
+                setattr(task, field, value)
+            fields.update(diff)
+            updated.append({"id": pk, **diff})
+            if "status" in diff:
+                entries.append(TaskActivity(task_id=pk, action=f"Status changed to {task.status}", by=by))
+
+        if updated:
+            Task.objects.bulk_update([tasks[row["id"]] for row in updated], fields=sorted(fields))
+            TaskActivity.objects.bulk_create(entries)
+            if "status" in fields:
+                transaction.on_commit(invalidate_summary)  # bulk_update sends no post_save either
+    return updated, [pk for pk in wanted if pk not in tasks]
+
+
+def recent(entries) -> list:
+    """The newest RECENT_ENTRIES of a task's activity or comments, oldest first."""
+    return list(reversed(entries.order_by("-id")[:RECENT_ENTRIES]))
@@ -2,15 +2,20 @@ from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncMonth
+from django.contrib.admin.views.main import ChangeList
+from collections import defaultdict
+from django.http import HttpResponse, StreamingHttpResponse
 from django.urls import path
 from django.conf import settings
 from datetime import date as dt, timedelta
 import paramiko
 import threading
-from django.core.cache import cache
-from .models import Project, Timesheet, TimesheetTask, DeployScript, BankAccount, AdminLogin, Task, ChangeRequest
+from . import caching
+from .models import Project, Timesheet, TimesheetTask, DeployScript, BankAccount, AdminLogin, Task, TaskActivity, TaskComment, ChangeRequest, WebhookDelivery, MonthlyRollup, deferred_totals
+
+REPORT_CHUNK_SIZE = 500  # task rows per DB fetch / streamed chunk in the timesheet reports
 
 
 # ── Deploy Script Inline (the "+ Add another" table, for LIVE scripts) ─────────
@@ -39,6 +44,24 @@ class ProjectAdminForm(forms.ModelForm):
         self.fields['active_deploy_script'].empty_label = None
 
 
+# ── Project changelist: report months for the whole page in one query ──────────
+class ProjectChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        months = defaultdict(list)
+        rows = (
+            Timesheet.objects.filter(project_id__in=[p.pk for p in self.result_list])
+            .annotate(month=TruncMonth('date'))
+            .values_list('project_id', 'month')
+            .distinct()
+            .order_by('project_id', '-month')
+        )
+        for project_id, month in rows:
+            months[project_id].append(month)
+        for project in self.result_list:
+            project.report_months = months[project.pk]
+
+
 # ── Project Admin ──────────────────────────────────────────────────────────────
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
@@ -72,15 +95,8 @@ class ProjectAdmin(admin.ModelAdmin):
 
     def sync_github_commits(self, request, queryset):
         from django.contrib import messages
-        import requests
-        from django.utils.dateparse import parse_datetime
-        from .models import Timesheet, TimesheetTask
-        from home.views import (
-            _parse_time_from_message,
-            _get_github_profile_name,
-            _get_commit_stats,
-            _clean_time_from_message
-        )
+        from .github import GitHubError, get_client
+        from .ingest import advance_sync_cursor, commit_from_api, ingest_commits, newest_commit
         
         total_created = 0
         
@@ -89,109 +105,31 @@ class ProjectAdmin(admin.ModelAdmin):
                 self.message_user(request, f"⚠️ Project '{project.name}' has no GitHub Repo path configured.", level=messages.WARNING)
                 continue
                 
-            url = f"https://api.github.com/repos/{project.github_repo}/commits"
-            headers = {"Accept": "application/vnd.github+json"}
-            token = getattr(settings, "GITHUB_TOKEN", None)
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-                
             try:
-                # Fetch last 100 commits
-                resp = requests.get(url, headers=headers, params={"per_page": 100}, timeout=15)
-                if resp.status_code != 200:
+                # Fetch last 100 commits (only those since the sync cursor, if there is one)
+                params = {"per_page": 100}
+                if project.github_synced_at:
+                    params["since"] = project.github_synced_at.isoformat().replace("+00:00", "Z")
+                commits_data = get_client().get_json(f"/repos/{project.github_repo}/commits", params)
+            except GitHubError as e:
+                if e.status_code:
                     self.message_user(
                         request,
-                        f"❌ Failed to fetch commits for '{project.name}' from GitHub (Status {resp.status_code}). "
+                        f"❌ Failed to fetch commits for '{project.name}' from GitHub (Status {e.status_code}). "
                         f"Ensure repo path is correct and public, or GITHUB_TOKEN is set for private repos.",
                         level=messages.ERROR
                     )
-                    continue
-                    
-                commits_data = resp.json()
-            except Exception as e:
-                self.message_user(request, f"❌ Network error connecting to GitHub for '{project.name}': {str(e)}", level=messages.ERROR)
+                else:
+                    self.message_user(request, f"❌ Network error connecting to GitHub for '{project.name}': {str(e)}", level=messages.ERROR)
                 continue
                 
-            project_created = 0
-            for item in commits_data:
-                sha = item.get("sha", "")
-                commit_info = item.get("commit", {})
-                commit_message = commit_info.get("message", "")
-                
-                # Check duplicate task using the github_sha field in TimesheetTask
-                if TimesheetTask.objects.filter(timesheet__project=project, github_sha=sha).exists():
-                    continue
-                    
-                # Parse date
-                author_info = commit_info.get("author", {})
-                timestamp_str = author_info.get("date")
-                commit_date = dt.today()
-                if timestamp_str:
-                    try:
-                        parsed_dt = parse_datetime(timestamp_str)
-                        if parsed_dt:
-                            commit_date = parsed_dt.date()
-                    except ValueError:
-                        pass
-                
-                # Parse hours
-                hours = _parse_time_from_message(commit_message)
-                if hours is None:
-                    # Fetch detailed stats for this commit (churn)
-                    stats_data = _get_commit_stats(project.github_repo, sha)
-                    churn = stats_data.get("churn", 0)
-                    if churn > 0:
-                        hours = project.churn_to_hours(churn)
-                    else:
-                        hours = 0.0
-                        
-                task_description = _clean_time_from_message(commit_message)
-                
-                # Get GitHub Username
-                github_user = item.get("author") or {}
-                github_username = github_user.get("login")
-                
-                author_name = None
-                if github_username:
-                    author_name = _get_github_profile_name(github_username)
-                if not author_name:
-                    author_name = github_username or author_info.get("name") or "Unknown"
-                    
-                # Get or create Timesheet
-                timesheet, created = Timesheet.objects.get_or_create(
-                    project=project,
-                    employee_name=author_name,
-                    date=commit_date,
-                    source="GITHUB_COMMIT",
-                    defaults={
-                        'hourly_rate': project.hourly_rate,
-                        'total_hours': 0,
-                        'total_amount': 0,
-                        'github_sha': sha,
-                    }
-                )
-                
-                # Calculate the task amount based on hours and hourly rate
-                task_amount = round(float(hours) * float(project.hourly_rate), 2)
-                
-                # Create Task
-                TimesheetTask.objects.create(
-                    timesheet=timesheet,
-                    description=task_description,
-                    hours=hours,
-                    amount=task_amount,
-                    github_sha=sha,
-                )
-                
-                # Recalculate timesheet totals
-                from django.db.models import Sum
-                totals = timesheet.tasks.aggregate(total_h=Sum('hours'), total_a=Sum('amount'))
-                timesheet.total_hours = totals['total_h'] or 0
-                timesheet.total_amount = totals['total_a'] or 0
-                timesheet.save(update_fields=['total_hours', 'total_amount'])
-                
-                project_created += 1
-                total_created += 1
+            project_created = ingest_commits(
+                [project], project.github_repo, [commit_from_api(item) for item in commits_data]
+            )
+            if len(commits_data) < 100:
+                # Got everything since the cursor; a full page may have more behind it.
+                advance_sync_cursor(project, newest_commit(commits_data))
+            total_created += project_created
                 
             self.message_user(request, f"✅ Successfully synced {project_created} new commits for '{project.name}'.", level=messages.SUCCESS)
             
@@ -213,24 +151,36 @@ class ProjectAdmin(admin.ModelAdmin):
         return custom + urls
 
 
+    def get_queryset(self, request):
+        # The changelist columns read these annotations instead of querying per row.
+        return super().get_queryset(request).select_related('active_deploy_script').annotate(
+            timesheet_count=Count('timesheets'),
+            hours_logged=Sum('timesheets__total_hours'),
+            billed=Sum('timesheets__total_amount'),
+        )
+
+    def get_changelist(self, request, **kwargs):
+        return ProjectChangeList
+
     def hourly_rate_display(self, obj):
         return format_html('<strong style="color:#1a6b3a;">₹{}/hr</strong>', obj.hourly_rate)
     hourly_rate_display.short_description = 'Rate'
 
     def total_timesheets(self, obj):
-        return obj.timesheets.count()
+        return obj.timesheet_count
     total_timesheets.short_description = 'Timesheets'
+    total_timesheets.admin_order_field = 'timesheet_count'
 
     def total_hours_logged(self, obj):
-        r = obj.timesheets.aggregate(total=Sum('total_hours'))
-        return f"{r['total'] or 0} hrs"
+        return f"{obj.hours_logged or 0} hrs"
     total_hours_logged.short_description = 'Total Hours'
+    total_hours_logged.admin_order_field = 'hours_logged'
 
     def total_billed(self, obj):
-        r = obj.timesheets.aggregate(total=Sum('total_amount'))
-        amount = '{:,.2f}'.format(r['total'] or 0)
+        amount = '{:,.2f}'.format(obj.billed or 0)
         return format_html('<strong style="color:#1a6b3a;">₹{}</strong>', amount)
     total_billed.short_description = 'Total Billed'
+    total_billed.admin_order_field = 'billed'
 
     def active_script_display(self, obj):
         if obj.active_deploy_script:
@@ -246,8 +196,10 @@ class ProjectAdmin(admin.ModelAdmin):
     active_script_display.short_description = 'Active Script'
 
     def report_buttons(self, obj):
-        # Query distinct months that have timesheets for this project
-        dates = Timesheet.objects.filter(project=obj).dates('date', 'month', order='DESC')
+        # Distinct months that have timesheets (precomputed for the page by ProjectChangeList)
+        dates = getattr(obj, 'report_months', None)
+        if dates is None:
+            dates = Timesheet.objects.filter(project=obj).dates('date', 'month', order='DESC')
         if not dates:
             # Fallback: last 6 months
             from datetime import date
@@ -381,8 +333,8 @@ body{{font-family:'DM Sans',sans-serif;background:#0b0e14;color:#e6edf3;min-heig
         if not script:
             return HttpResponse("No deploy script selected for this project.", status=400)
 
-        cache_key = f"deploy_status_{project_id}"
-        cache.set(cache_key, {"status": "running", "started": dt.today().isoformat()}, timeout=900)
+        cache_key = f"live_{project_id}"
+        caching.set("deploy", cache_key, {"status": "running", "started": dt.today().isoformat()})
 
         def run_deploy():
             output, error, exit_status, ok = "", "", None, False
@@ -405,17 +357,17 @@ body{{font-family:'DM Sans',sans-serif;background:#0b0e14;color:#e6edf3;min-heig
                 error = str(e)
                 ok = False
 
-            cache.set(cache_key, {
+            caching.set("deploy", cache_key, {
                 "status": "done", "ok": ok, "output": output, "error": error,
                 "exit_status": exit_status, "command": script.command,
-            }, timeout=900)
+            })
 
         threading.Thread(target=run_deploy, daemon=True).start()
         return HttpResponse(self._build_deploy_waiting(project, "Live Server"))
 
     def deploy_status(self, request, project_id):
-        cache_key = f"deploy_status_{project_id}"
-        state = cache.get(cache_key)
+        cache_key = f"live_{project_id}"
+        state = caching.get("deploy", cache_key)
         project = Project.objects.get(pk=project_id)
 
         if not state or state.get("status") == "running":
@@ -437,8 +389,8 @@ body{{font-family:'DM Sans',sans-serif;background:#0b0e14;color:#e6edf3;min-heig
         if not command:
             return HttpResponse("No test deploy command set for this project.", status=400)
 
-        cache_key = f"deploy_test_status_{project_id}"
-        cache.set(cache_key, {"status": "running", "started": dt.today().isoformat()}, timeout=900)
+        cache_key = f"test_{project_id}"
+        caching.set("deploy", cache_key, {"status": "running", "started": dt.today().isoformat()})
 
         def run_deploy():
             output, error, exit_status, ok = "", "", None, False
@@ -461,17 +413,17 @@ body{{font-family:'DM Sans',sans-serif;background:#0b0e14;color:#e6edf3;min-heig
                 error = str(e)
                 ok = False
 
-            cache.set(cache_key, {
+            caching.set("deploy", cache_key, {
                 "status": "done", "ok": ok, "output": output, "error": error,
                 "exit_status": exit_status, "command": command,
-            }, timeout=900)
+            })
 
         threading.Thread(target=run_deploy, daemon=True).start()
         return HttpResponse(self._build_deploy_waiting(project, "Test Server"))
 
     def deploy_test_status(self, request, project_id):
-        cache_key = f"deploy_test_status_{project_id}"
-        state = cache.get(cache_key)
+        cache_key = f"test_{project_id}"
+        state = caching.get("deploy", cache_key)
         project = Project.objects.get(pk=project_id)
 
         if not state or state.get("status") == "running":
@@ -582,8 +534,10 @@ pre{{padding:18px;color:#c9d1d9;font-family:'JetBrains Mono',monospace;font-size
                 label = f"Month: {month_name} {year}"
                 timesheets = Timesheet.objects.filter(
                     project=project, date__year=year, date__month=month
-                ).prefetch_related('tasks').order_by('date')
-                return HttpResponse(self._build_report(project, timesheets, label, f"Monthly Timesheet Report - {month_name} {year}"))
+                )
+                return StreamingHttpResponse(self._build_report(
+                    project, timesheets, label, f"Monthly Timesheet Report - {month_name} {year}", month=dt(year, month, 1),
+                ))
             except (ValueError, IndexError):
                 pass
 
@@ -656,11 +610,9 @@ p{{font-size:13px;color:#888;margin-bottom:24px;text-align:center}}
             project = Project.objects.get(pk=project_id)
         except Project.DoesNotExist:
             return HttpResponse("Project not found.", status=404)
-        timesheets = Timesheet.objects.filter(
-            project=project
-        ).prefetch_related('tasks').order_by('date')
+        timesheets = Timesheet.objects.filter(project=project)
         label = "All Timesheets"
-        return HttpResponse(self._build_report(project, timesheets, label, "Project Timesheet Report"))
+        return StreamingHttpResponse(self._build_report(project, timesheets, label, "Project Timesheet Report"))
 
     def project_change_requests_report(self, request, project_id):
         try:
@@ -828,14 +780,16 @@ tr{{border-bottom:1px solid #f0f5f8}}
 
 
 
-    def _build_report(self, project, timesheets, period_label, report_title):
+    def _build_report(self, project, timesheets, period_label, report_title, month=None):
+        """
+        Yields the report HTML in pieces for a StreamingHttpResponse. The
+        per-employee and grand totals are read from MonthlyRollup (all
+        months, or just `month`); the task rows are then streamed employee
+        by employee with .iterator(), so memory stays flat however long
+        the history is.
+        """
         generated = dt.today().strftime("%d %B %Y")
 
-        ts_rows = ""
-        grand_hours = 0
-        grand_amount = 0
-        sl = 1
-
         # Fetch default bank account if configured
         bank = BankAccount.objects.first()
         bank_html = ""
@@ -852,71 +806,21 @@ tr{{border-bottom:1px solid #f0f5f8}}
     {swift_str}
   </div>"""
 
-        from collections import defaultdict
-        employee_groups = defaultdict(list)
-        for ts in timesheets:
-            employee_groups[ts.employee_name].append(ts)
-
-        for employee_name, ts_list in employee_groups.items():
-            emp_tasks = []
-            for ts in ts_list:
-                for task in ts.tasks.all():
-                    desc_lower = task.description.lower().strip()
-                    is_merge = desc_lower.startswith("merge ") or desc_lower.startswith("merge pull request") or "merge branch" in desc_lower
-                    if not is_merge:
-                        emp_tasks.append((task, ts.date))
-            
-            if not emp_tasks:
-                continue
-
-            emp_total_hours = sum(float(task.hours) for task, _ in emp_tasks)
-            emp_total_amount = sum(float(task.amount) for task, _ in emp_tasks)
-            
-            total_mins = round(emp_total_hours * 60)
-            hrs = total_mins // 60
-            mins = total_mins % 60
-            time_str = f"{hrs}h {mins}m" if mins else f"{hrs}h"
-            amt_fmt = '{:,.2f}'.format(emp_total_amount)
-            
-            grand_hours += emp_total_hours
-            grand_amount += emp_total_amount
-            
-            task_count = len(emp_tasks)
-            
-            ts_rows += f"""
-            <tr style="background:#f7fbfd;border-top:2px solid #e0eff7" class="emp-summary-row" data-emp-name="{employee_name}">
-                <td style="padding:10px 16px;font-size:12px;color:#aaa;font-weight:700">{str(sl).zfill(2)}</td>
-                <td style="padding:10px 16px;font-size:13px;font-weight:700;color:#111">{employee_name}</td>
-                <td style="padding:10px 16px;font-size:13px;color:#555">All Dates</td>
-                <td style="padding:10px 16px;font-size:13px;color:#555;text-align:center" class="emp-task-count" data-tasks="{task_count}">{task_count} tasks</td>
-                <td style="padding:10px 16px;font-size:13px;text-align:right;font-weight:700;color:#29ABE2" class="emp-time" data-hours="{emp_total_hours}">{time_str}</td>
-                <td style="padding:10px 16px;font-size:13px;text-align:right;font-weight:700;color:#111" class="emp-amount" data-amount="{emp_total_amount}">&#8377;{amt_fmt}</td>
-            </tr>"""
-            
-            for task, commit_date in emp_tasks:
-                t_mins = round(float(task.hours) * 60)
-                t_hrs = t_mins // 60
-                t_m = t_mins % 60
-                t_time = f"{t_hrs}h {t_m}m" if t_m else f"{t_hrs}h"
-                task_amt = '{:,.2f}'.format(float(task.amount))
-                ts_rows += f"""
-            <tr style="background:#fff" class="commit-row" data-emp-name="{employee_name}">
-                <td style="padding:8px 16px;color:#ddd;font-size:11px"></td>
-                <td style="padding:8px 16px;padding-left:28px;font-size:13px;color:#555;position:relative;">
-                    <span style="color:#29ABE2;margin-right:6px">›</span>{task.description}
-                    <button onclick="removeCommitRow(this)" class="remove-btn" title="Remove from PDF">[Remove]</button>
-                </td>
-                <td style="padding:8px 16px;font-size:13px;color:#555">{commit_date.strftime('%d %b %Y')}</td>
-                <td></td>
-                <td style="padding:8px 16px;text-align:right;font-size:12px;color:#888" class="task-time" data-hours="{task.hours}">
-                    <input type="text" value="{t_time}" onchange="updateTaskTime(this)" class="time-input" />
-                </td>
-                <td style="padding:8px 16px;text-align:right;font-size:12px;color:#888" class="task-amount" data-amount="{task.amount}">&#8377;{task_amt}</td>
-            </tr>"""
-            sl += 1
-
-        if not ts_rows:
-            ts_rows = '<tr><td colspan="6" style="padding:32px;text-align:center;color:#ccc;font-size:14px">No timesheets found for this period.</td></tr>'
+        # Billable (non-merge) tasks of these timesheets
+        tasks = TimesheetTask.objects.filter(timesheet__in=timesheets.values('pk'), is_merge=False)
+
+        # Employees in order of their first billable task, with their totals (from the monthly rollups)
+        rollups = MonthlyRollup.objects.filter(project=project, task_count__gt=0)
+        if month is not None:
+            rollups = rollups.filter(month=month)
+        employees = list(
+            rollups.values('employee_name')
+            .annotate(first_date=Min('first_date'), task_count=Sum('task_count'), hours=Sum('hours'), amount=Sum('amount'))
+            .order_by('first_date', 'employee_name')
+        )
+        grand_hours = sum(float(e['hours'] or 0) for e in employees)
+        grand_amount = sum(float(e['amount'] or 0) for e in employees)
+        entry_count = timesheets.count()
 
         total_mins_all = round(grand_hours * 60)
         hrs_all = total_mins_all // 60
@@ -924,7 +828,7 @@ tr{{border-bottom:1px solid #f0f5f8}}
         total_time = f"{hrs_all}h {mins_all}m" if mins_all else f"{hrs_all}h"
         grand_amt_fmt = '{:,.2f}'.format(grand_amount)
 
-        return f"""<!DOCTYPE html>
+        yield f"""<!DOCTYPE html>
 <html>
 <head>
 <meta charset="utf-8">
@@ -1017,13 +921,13 @@ tr{{border-bottom:1px solid #f0f5f8}}
 <div class="meta">
   <div class="mc"><div class="ml">Project</div><div class="mv">{project.name}</div></div>
   <div class="mc"><div class="ml">Hourly Rate</div><div class="mv">&#8377;{project.hourly_rate}/hr</div></div>
-  <div class="mc"><div class="ml">Total Entries</div><div class="mv">{timesheets.count()} timesheet(s)</div></div>
+  <div class="mc"><div class="ml">Total Entries</div><div class="mv">{entry_count} timesheet(s)</div></div>
   <div class="mc"><div class="ml">Total Amount</div><div class="mv" id="meta-total-amount" style="color:#1a6b3a;">&#8377;{grand_amt_fmt}</div></div>
 </div>
 
 <div class="sec">
   <span>Timesheet Details</span>
-  <small>{timesheets.count()} entries</small>
+  <small>{entry_count} entries</small>
 </div>
 
 <table id="timesheet-table" data-rate="{project.hourly_rate}">
@@ -1037,7 +941,64 @@ tr{{border-bottom:1px solid #f0f5f8}}
       <th class="r">Amount (&#8377;)</th>
     </tr>
   </thead>
-  <tbody>{ts_rows}</tbody>
+  <tbody>"""
+
+        if not employees:
+            yield '<tr><td colspan="6" style="padding:32px;text-align:center;color:#ccc;font-size:14px">No timesheets found for this period.</td></tr>'
+
+        for sl, employee in enumerate(employees, start=1):
+            employee_name = employee['employee_name']
+            emp_total_hours = float(employee['hours'] or 0)
+            emp_total_amount = float(employee['amount'] or 0)
+            task_count = employee['task_count']
+
+            total_mins = round(emp_total_hours * 60)
+            hrs = total_mins // 60
+            mins = total_mins % 60
+            time_str = f"{hrs}h {mins}m" if mins else f"{hrs}h"
+            amt_fmt = '{:,.2f}'.format(emp_total_amount)
+
+            rows = [f"""
+            <tr style="background:#f7fbfd;border-top:2px solid #e0eff7" class="emp-summary-row" data-emp-name="{employee_name}">
+                <td style="padding:10px 16px;font-size:12px;color:#aaa;font-weight:700">{str(sl).zfill(2)}</td>
+                <td style="padding:10px 16px;font-size:13px;font-weight:700;color:#111">{employee_name}</td>
+                <td style="padding:10px 16px;font-size:13px;color:#555">All Dates</td>
+                <td style="padding:10px 16px;font-size:13px;color:#555;text-align:center" class="emp-task-count" data-tasks="{task_count}">{task_count} tasks</td>
+                <td style="padding:10px 16px;font-size:13px;text-align:right;font-weight:700;color:#29ABE2" class="emp-time" data-hours="{emp_total_hours}">{time_str}</td>
+                <td style="padding:10px 16px;font-size:13px;text-align:right;font-weight:700;color:#111" class="emp-amount" data-amount="{emp_total_amount}">&#8377;{amt_fmt}</td>
+            </tr>"""]
+
+            emp_tasks = (
+                tasks.filter(timesheet__employee_name=employee_name)
+                .order_by('timesheet__date', 'timesheet_id', 'id')
+                .values_list('description', 'hours', 'amount', 'timesheet__date')
+            )
+            for description, hours, amount, commit_date in emp_tasks.iterator(chunk_size=REPORT_CHUNK_SIZE):
+                t_mins = round(float(hours) * 60)
+                t_hrs = t_mins // 60
+                t_m = t_mins % 60
+                t_time = f"{t_hrs}h {t_m}m" if t_m else f"{t_hrs}h"
+                task_amt = '{:,.2f}'.format(float(amount))
+                rows.append(f"""
+            <tr style="background:#fff" class="commit-row" data-emp-name="{employee_name}">
+                <td style="padding:8px 16px;color:#ddd;font-size:11px"></td>
+                <td style="padding:8px 16px;padding-left:28px;font-size:13px;color:#555;position:relative;">
+                    <span style="color:#29ABE2;margin-right:6px">›</span>{description}
+                    <button onclick="removeCommitRow(this)" class="remove-btn" title="Remove from PDF">[Remove]</button>
+                </td>
+                <td style="padding:8px 16px;font-size:13px;color:#555">{commit_date.strftime('%d %b %Y')}</td>
+                <td></td>
+                <td style="padding:8px 16px;text-align:right;font-size:12px;color:#888" class="task-time" data-hours="{hours}">
+                    <input type="text" value="{t_time}" onchange="updateTaskTime(this)" class="time-input" />
+                </td>
+                <td style="padding:8px 16px;text-align:right;font-size:12px;color:#888" class="task-amount" data-amount="{amount}">&#8377;{task_amt}</td>
+            </tr>""")
+                if len(rows) >= REPORT_CHUNK_SIZE:
+                    yield "".join(rows)
+                    rows = []
+            yield "".join(rows)
+
+        yield f"""</tbody>
 </table>
 
 <div class="total-bar">
@@ -1272,6 +1233,12 @@ class TimesheetAdmin(admin.ModelAdmin):
     total_amount_display.short_description = 'Amount'
     total_amount_display.admin_order_field = 'total_amount'
 
+    def save_related(self, request, form, formsets, change):
+        # Recompute the totals once for the whole inline formset, not once per task row
+        with deferred_totals():
+            super().save_related(request, form, formsets, change)
+        form.instance.refresh_from_db(fields=['total_hours', 'total_amount'])
+
 
 @admin.register(BankAccount)
 class BankAccountAdmin(admin.ModelAdmin):
@@ -1283,13 +1250,54 @@ class BankAccountAdmin(admin.ModelAdmin):
 class AdminLoginAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'password')
     search_fields = ('name', 'email')
+
+
+# ── Task Admin ─────────────────────────────────────────────────────────────────
+class TaskCommentInline(admin.TabularInline):
+    model = TaskComment
+    extra = 0
+    fields = ('author', 'content', 'created_at')
+    readonly_fields = ('created_at',)
+
+
+class TaskActivityInline(admin.TabularInline):
+    # Append-only: shown for reference, written by the API
+    model = TaskActivity
+    extra = 0
+    fields = ('created_at', 'by', 'action')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('name', 'project', 'assigned_to', 'priority', 'status', 'due_date')
     list_filter = ('project', 'priority', 'status', 'due_date')
     search_fields = ('name', 'description', 'assigned_to')
+    inlines = [TaskCommentInline, TaskActivityInline]
+
+
+
 
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event', 'delivery_id', 'status', 'attempts', 'received_at', 'finished_at', 'duration_ms', 'result')
+    list_filter = ('status', 'event')
+    search_fields = ('delivery_id', 'result', 'last_error')
+    readonly_fields = ('delivery_id', 'event', 'body', 'received_at', 'started_at', 'finished_at', 'duration_ms', 'result', 'last_error', 'attempts')
+    date_hierarchy = 'received_at'
+    actions = ['requeue_deliveries']
 
+    def requeue_deliveries(self, request, queryset):
+        from django.utils import timezone
+        from .deliveries import kick_inline_worker
+        n = queryset.exclude(status='PROCESSING').update(status='PENDING', attempts=0, next_attempt_at=timezone.now())
+        kick_inline_worker()
+        self.message_user(request, f"🔁 Re-queued {n} deliveries.")
+    requeue_deliveries.short_description = "🔁 Re-queue selected deliveries"
 
 
 @admin.register(ChangeRequest)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class HomeConfig(AppConfig):
     name = 'home'
+
+    def ready(self):
+        from . import attachments, dashboard, images, rollups  # noqa: F401  (connect their signal handlers)
@@ -0,0 +1,160 @@
+"""
+Task Attachments
+================
+Task files live in Django's default storage (MEDIA_ROOT) instead of as
+base64 inside Task rows, one TaskAttachment row per file on a task.
+
+  * Content-addressed: a file is stored once under
+    task-attachments/<sha256[:2]>/<sha256>, so the same upload on
+    several tasks (or twice on one) shares the stored copy; it is
+    removed when the last row pointing at it goes (signal below).
+  * Uploads arrive as multipart form data, which Django spools to a
+    temporary file; store_upload hashes and copies it in chunks.
+  * Downloads stream from storage and honour a single `Range: bytes=…`
+    header (206 / 416), so large files can be resumed.
+"""
+
+import base64
+import binascii
+import hashlib
+import mimetypes
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .models import TaskAttachment
+
+STORAGE_DIR = "task-attachments"
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def blob_name(sha256) -> str:
+    return f"{STORAGE_DIR}/{sha256[:2]}/{sha256}"
+
+
+def store_file(fileobj) -> tuple:
+    """Hash `fileobj` in chunks and store it unless that content is already stored. Returns (name, sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    sha256 = digest.hexdigest()
+
+    name = blob_name(sha256)
+    if not default_storage.exists(name):
+        fileobj.seek(0)
+        saved = default_storage.save(name, fileobj)
+        if saved != name:  # lost a race with an identical upload; keep the first copy
+            default_storage.delete(saved)
+    return name, sha256, size
+
+
+def store_upload(task, upload, uploaded_by="") -> TaskAttachment:
+    name, sha256, size = store_file(upload)
+    return TaskAttachment.objects.create(
+        task=task,
+        file=name,
+        filename=upload.name,
+        content_type=upload.content_type or mimetypes.guess_type(upload.name)[0] or "",
+        size=size,
+        sha256=sha256,
+        uploaded_by=uploaded_by,
+    )
+
+
+def decode_data_url(data) -> tuple:
+    """ "data:<type>;base64,<payload>" (what the old frontend stored) -> (bytes, content type). Raises ValueError."""
+    header, sep, payload = data.partition(",")
+    if not sep or not header.startswith("data:") or not header.endswith(";base64"):
+        raise ValueError("not a base64 data URL")
+    try:
+        return base64.b64decode(payload, validate=True), header[5:-7]
+    except binascii.Error as e:
+        raise ValueError(str(e))
+
+
+def store_bytes(content) -> tuple:
+    return store_file(ContentFile(content))
+
+
+# ─────────────────────────────────────────────────────────────
+# Download
+# ─────────────────────────────────────────────────────────────
+
+def _byte_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None to send everything, False if unsatisfiable."""
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None  # absent, malformed or multi-range: a full 200 response is always allowed
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1  # suffix: the last N bytes
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _stream(fh, start, length):
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def download_response(attachment, range_header=None):
+    if not attachment.file:
+        return HttpResponse("This attachment has no stored content.", status=404)
+    try:
+        fh = attachment.file.open("rb")
+    except FileNotFoundError:
+        return HttpResponse("Attachment file is missing from storage.", status=404)
+
+    size = attachment.file.size
+    content_type = attachment.content_type or "application/octet-stream"
+    byte_range = _byte_range(range_header, size)
+
+    if byte_range is False:
+        fh.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range is None:
+        response = FileResponse(fh, content_type=content_type)
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_stream(fh, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = content_disposition_header(True, attachment.filename)
+    return response
+
+
+# ─────────────────────────────────────────────────────────────
+# Signals (connected when the app is ready, see HomeConfig.ready)
+# ─────────────────────────────────────────────────────────────
+
+def _attachment_deleted(sender, instance, **kwargs):
+    # Task deletes cascade here too; the stored copy goes once nothing points at it
+    if instance.file and not TaskAttachment.objects.filter(file=instance.file.name).exists():
+        default_storage.delete(instance.file.name)
+
+
+post_delete.connect(_attachment_deleted, sender=TaskAttachment, dispatch_uid="attachment_file_cleanup")
@@ -0,0 +1,122 @@
+"""
+Namespaced Cache
+================
+Thin layer over Django's cache (settings.CACHES, shared between
+gunicorn workers) that every cache in the app goes through:
+
+  * keys are "<namespace>:<key>", stored with the namespace's version,
+    so bumping a version in NAMESPACES orphans that namespace's old
+    entries (e.g. after changing what is stored) without touching others,
+  * each namespace has its own TTL (settings.CACHE_TTLS),
+  * hits and misses are counted per namespace and shown by
+    /api/cache/stats/ and `manage.py cache_stats`.
+
+Counters are summed in each worker and added to the shared cache every
+STATS_FLUSH_SECONDS, so the totals trail the live numbers by at most
+that long per worker.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+# namespace -> key version; bump one when the shape of what it stores changes
+NAMESPACES = {
+    "deploy": 1,     # admin deploy runs: live_<project id> / test_<project id>
+    "dashboard": 1,  # dashboard.get_summary
+}
+
+STATS_FLUSH_SECONDS = 10
+
+_pending = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _key(namespace, key) -> str:
+    if namespace not in NAMESPACES:
+        raise KeyError(f"Unknown cache namespace {namespace!r}; add it to caching.NAMESPACES")
+    return f"{namespace}:{key}"
+
+
+def ttl(namespace) -> int:
+    return settings.CACHE_TTLS.get(namespace, settings.CACHE_DEFAULT_TTL)
+
+
+def get(namespace, key, default=None):
+    value = cache.get(_key(namespace, key), version=NAMESPACES[namespace])
+    _count(namespace, "hits" if value is not None else "misses")
+    return default if value is None else value
+
+
+def set(namespace, key, value, timeout=None) -> None:
+    cache.set(_key(namespace, key), value, timeout=ttl(namespace) if timeout is None else timeout, version=NAMESPACES[namespace])
+
+
+def delete(namespace, key) -> None:
+    cache.delete(_key(namespace, key), version=NAMESPACES[namespace])
+
+
+# ─────────────────────────────────────────────────────────────
+# Hit / miss counters
+# ─────────────────────────────────────────────────────────────
+
+def _count(namespace, outcome) -> None:
+    global _last_flush
+    with _lock:
+        _pending[(namespace, outcome)] += 1
+        if time.monotonic() - _last_flush < STATS_FLUSH_SECONDS:
+            return
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    _add_to_shared(counts)
+
+
+def _add_to_shared(counts) -> None:
+    for (namespace, outcome), n in counts.items():
+        stat_key = f"cache_stats:{namespace}:{outcome}"
+        # add() is a no-op when the counter exists; incr() is atomic on Redis, best effort elsewhere
+        cache.add(stat_key, 0, timeout=None)
+        try:
+            cache.incr(stat_key, n)
+        except ValueError:  # evicted between add() and incr()
+            cache.set(stat_key, n, timeout=None)
+
+
+def flush_stats() -> None:
+    """Add this worker's pending counts to the shared counters now."""
+    global _last_flush
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    _add_to_shared(counts)
+
+
+def stats() -> dict:
+    """{namespace: {"hits", "misses", "hit_rate", "ttl", "version"}} across all workers."""
+    flush_stats()
+    keys = [f"cache_stats:{namespace}:{outcome}" for namespace in NAMESPACES for outcome in ("hits", "misses")]
+    stored = cache.get_many(keys)
+    result = {}
+    for namespace, version in NAMESPACES.items():
+        hits = stored.get(f"cache_stats:{namespace}:hits", 0)
+        misses = stored.get(f"cache_stats:{namespace}:misses", 0)
+        result[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "ttl": ttl(namespace),
+            "version": version,
+        }
+    return result
+
+
+def reset_stats() -> None:
+    with _lock:
+        _pending.clear()
+    cache.delete_many([f"cache_stats:{namespace}:{outcome}" for namespace in NAMESPACES for outcome in ("hits", "misses")])
@@ -0,0 +1,103 @@
+"""
+Dashboard Summary
+=================
+The numbers on the React dashboard (today / week hours, project counts,
+task completion and logged hours per project, developer names) as a
+handful of SQL aggregates, served by /api/dashboard/summary/. The
+frontend reads its cards from here instead of listing every timesheet.
+
+The result is cached and dropped whenever a Project, Timesheet,
+TimesheetTask or Task is written (signals below; bulk paths such as
+ingest.recompute_timesheet_totals call invalidate_summary themselves).
+The "dashboard" TTL in settings.CACHE_TTLS (DASHBOARD_CACHE_SECONDS)
+bounds how stale it can get for writes that bypass both, e.g.
+queryset.update() from another process.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from . import caching
+from .models import Project, Task, Timesheet, TimesheetTask
+
+SUMMARY_CACHE_KEY = "summary"  # in the "dashboard" cache namespace
+ACTIVE_MODES = ("DEV", "PROD")
+
+
+def build_summary(today) -> dict:
+    week_start = today - timedelta(days=7)
+
+    hours = Timesheet.objects.filter(date__gte=week_start).aggregate(
+        today=Sum("total_hours", filter=Q(date=today)),
+        week=Sum("total_hours"),
+    )
+    projects = Project.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(mode__in=ACTIVE_MODES)),
+    )
+    hours_by_project = (
+        Timesheet.objects.values("project_id").annotate(hours=Sum("total_hours")).order_by().values_list("project_id", "hours")
+    )
+    developers = list(Timesheet.objects.order_by("employee_name").values_list("employee_name", flat=True).distinct())
+
+    # One row per (project, status) pair
+    by_status = {value: 0 for value, _ in Task.STATUS_CHOICES}
+    per_project = {}
+    rows = (
+        Task.objects.values("project_id", "project__name", "status")
+        .annotate(count=Count("id"))
+        .order_by("project_id")
+    )
+    for row in rows:
+        by_status[row["status"]] = by_status.get(row["status"], 0) + row["count"]
+        entry = per_project.setdefault(row["project_id"], {
+            "project": row["project_id"], "project_name": row["project__name"], "total": 0, "completed": 0,
+        })
+        entry["total"] += row["count"]
+        if row["status"] == "Completed":
+            entry["completed"] += row["count"]
+
+    for entry in per_project.values():
+        entry["progress"] = round(entry["completed"] * 100 / entry["total"]) if entry["total"] else 0
+
+    completed = by_status.get("Completed", 0)
+    return {
+        "date": today.isoformat(),
+        "hours": {
+            "today": float(hours["today"] or 0),
+            "week": float(hours["week"] or 0),
+            "by_project": {str(pk): float(total or 0) for pk, total in hours_by_project},
+        },
+        "projects": projects,
+        "developers": len(developers),
+        "developer_names": developers,
+        "tasks": {
+            "by_status": by_status,
+            "completed": completed,
+            "pending": sum(by_status.values()) - completed,
+        },
+        "per_project": list(per_project.values()),
+    }
+
+
+def get_summary() -> dict:
+    today = timezone.localdate()
+    cached = caching.get("dashboard", SUMMARY_CACHE_KEY)
+    if cached and cached["date"] == today.isoformat():
+        return cached
+    summary = build_summary(today)
+    caching.set("dashboard", SUMMARY_CACHE_KEY, summary)
+    return summary
+
+
+def invalidate_summary(**kwargs) -> None:
+    caching.delete("dashboard", SUMMARY_CACHE_KEY)
+
+
+# Connected when the app is ready (see HomeConfig.ready)
+for _model in (Project, Timesheet, TimesheetTask, Task):
+    post_save.connect(invalidate_summary, sender=_model, dispatch_uid=f"dashboard_save_{_model.__name__}")
+    post_delete.connect(invalidate_summary, sender=_model, dispatch_uid=f"dashboard_delete_{_model.__name__}")
@@ -0,0 +1,304 @@
+"""
+Webhook Delivery Queue
+======================
+GitHub webhooks are acknowledged as soon as the raw delivery has been
+stored in the WebhookDelivery table. The actual ingestion (GitHub API
+calls, timesheet writes) happens here, in a worker that drains the table.
+
+Workers are plain threads — no broker needed:
+  * `python manage.py process_webhooks` runs a long-lived pool.
+  * With WEBHOOK_INLINE_WORKER = True the web process also starts a
+    drain thread right after each delivery is queued. It stays up while
+    retries are scheduled, sleeping until the next one is due, and exits
+    once nothing is PENDING.
+
+The table doubles as a delivery ledger: delivery_id (X-GitHub-Delivery)
+is unique, so a repeat delivery is rejected with one indexed lookup before
+the payload is ever parsed, and every processed row keeps its timing.
+A new delivery is parsed once before it is stored: a body no retry could
+process (not JSON, no repository) is refused with InvalidPayload instead
+of being queued.
+
+Failed deliveries are retried with exponential backoff until
+WEBHOOK_MAX_ATTEMPTS is reached, then parked as FAILED so they can be
+inspected (and re-queued) from the admin.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .ingest import commit_from_push, ingest_commits
+from .models import Project, WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+_inline_lock = threading.Lock()
+# Set by each kick so a drain waiting for a retry picks new deliveries up at once
+_inline_wake = threading.Event()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class InvalidPayload(ValueError):
+    """A delivery body that can never be processed, however often it is retried."""
+
+
+def parse_payload(event: str, body: str) -> dict:
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise InvalidPayload(f"Malformed JSON payload: {exc}")
+    if not isinstance(payload, dict):
+        raise InvalidPayload("Payload must be a JSON object")
+    repository = payload.get("repository")
+    if event == "push" and not (isinstance(repository, dict) and repository.get("full_name")):
+        raise InvalidPayload("No repository full_name found")
+    return payload
+
+
+# ─────────────────────────────────────────────────────────────
+# Event handlers
+# ─────────────────────────────────────────────────────────────
+
+def process_push(payload: dict) -> str:
+    """Turn the commits of one push event into timesheet tasks."""
+    repository = payload.get('repository', {})
+    repo_full_name = repository.get('full_name')
+    if not repo_full_name:
+        return "No repository full_name found"
+
+    # Compared through Lower() so the home_project_repo_lower_idx index is used (iexact can't)
+    projects = list(Project.objects.alias(repo_lower=Lower("github_repo")).filter(repo_lower=repo_full_name.lower()))
+    if not projects:
+        return f"No project matches repo {repo_full_name}"
+
+    commits = payload.get('commits', [])
+    if not commits:
+        return "No commits in push"
+
+    created_count = ingest_commits(projects, repo_full_name, [commit_from_push(c) for c in commits])
+    return f"Processed {created_count} commits into timesheets"
+
+
+HANDLERS = {
+    "push": process_push,
+}
+
+
+# ─────────────────────────────────────────────────────────────
+# Queue operations
+# ─────────────────────────────────────────────────────────────
+
+def enqueue_delivery(*, event: str, body: bytes, delivery_id: str = ""):
+    """
+    Persist a raw delivery so it survives until a worker has processed it.
+    Returns (delivery, created). The unique index on delivery_id makes a
+    repeat of a known X-GitHub-Delivery a single indexed lookup; only a
+    FAILED delivery is put back in the queue (GitHub's "Redeliver" button
+    re-sends the same id). Raises InvalidPayload, storing nothing, for a
+    new body that can't be processed.
+    """
+    delivery_id = delivery_id or None
+    if delivery_id:
+        existing = WebhookDelivery.objects.filter(delivery_id=delivery_id).first()
+        if existing:
+            return _replay(existing), False
+
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    parse_payload(event, body)
+    try:
+        with transaction.atomic():
+            delivery = WebhookDelivery.objects.create(
+                delivery_id=delivery_id,
+                event=event,
+                body=body,
+                next_attempt_at=timezone.now(),
+            )
+    except IntegrityError:
+        # Lost a race with a concurrent copy of the same delivery.
+        return WebhookDelivery.objects.get(delivery_id=delivery_id), False
+    return delivery, True
+
+
+def _replay(delivery: WebhookDelivery) -> WebhookDelivery:
+    if delivery.status == "FAILED":
+        WebhookDelivery.objects.filter(pk=delivery.pk, status="FAILED").update(
+            status="PENDING", attempts=0, next_attempt_at=timezone.now()
+        )
+        delivery.refresh_from_db()
+    return delivery
+
+
+def requeue_stale(lease_seconds: int = None) -> int:
+    """Put deliveries whose worker died mid-way back into the queue."""
+    lease_seconds = lease_seconds or _setting("WEBHOOK_LEASE_SECONDS", 600)
+    cutoff = timezone.now() - timedelta(seconds=lease_seconds)
+    return WebhookDelivery.objects.filter(
+        status="PROCESSING", started_at__lt=cutoff
+    ).update(status="PENDING", next_attempt_at=timezone.now())
+
+
+def claim_next():
+    """
+    Atomically take the oldest due delivery. The conditional UPDATE makes
+    sure two workers never process the same row.
+    """
+    now = timezone.now()
+    candidates = WebhookDelivery.objects.filter(
+        status="PENDING", next_attempt_at__lte=now
+    ).order_by("next_attempt_at", "id").values_list("pk", flat=True)[:10]
+
+    for pk in candidates:
+        claimed = WebhookDelivery.objects.filter(pk=pk, status="PENDING").update(
+            status="PROCESSING",
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return WebhookDelivery.objects.get(pk=pk)
+    return None
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = _setting("WEBHOOK_RETRY_BASE_SECONDS", 30)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), 3600))
+
+
+def process_delivery(delivery: WebhookDelivery) -> WebhookDelivery:
+    """
+    Run the handler for one claimed delivery and record the outcome.
+    Handlers skip commits that already exist, so a retry after a partial
+    failure does not double-bill anything.
+    """
+    handler = HANDLERS.get(delivery.event)
+    started = time.monotonic()
+    try:
+        if handler is None:
+            result = f"Unhandled event type: {delivery.event}"
+        else:
+            result = handler(parse_payload(delivery.event, delivery.body))
+    except Exception as exc:
+        logger.exception("Webhook delivery %s failed (attempt %s)", delivery.pk, delivery.attempts)
+        delivery.duration_ms = int((time.monotonic() - started) * 1000)
+        delivery.last_error = f"{type(exc).__name__}: {exc}"
+        # A payload that can't be parsed won't parse on a retry either
+        if isinstance(exc, InvalidPayload) or delivery.attempts >= _setting("WEBHOOK_MAX_ATTEMPTS", 5):
+            delivery.status = "FAILED"
+            delivery.finished_at = timezone.now()
+        else:
+            delivery.status = "PENDING"
+            delivery.next_attempt_at = timezone.now() + _retry_delay(delivery.attempts)
+        delivery.save(update_fields=["status", "last_error", "next_attempt_at", "finished_at", "duration_ms"])
+        return delivery
+
+    delivery.duration_ms = int((time.monotonic() - started) * 1000)
+    delivery.status = "DONE"
+    delivery.result = (result or "")[:255]
+    delivery.last_error = ""
+    delivery.finished_at = timezone.now()
+    delivery.save(update_fields=["status", "result", "last_error", "finished_at", "duration_ms"])
+    return delivery
+
+
+# ─────────────────────────────────────────────────────────────
+# Workers
+# ─────────────────────────────────────────────────────────────
+
+def _seconds_until_next_attempt():
+    """Seconds until the earliest PENDING delivery is due, or None if nothing is pending."""
+    due = (
+        WebhookDelivery.objects.filter(status="PENDING", next_attempt_at__isnull=False)
+        .order_by("next_attempt_at")
+        .values_list("next_attempt_at", flat=True)
+        .first()
+    )
+    if due is None:
+        return None
+    return max((due - timezone.now()).total_seconds(), 0)
+
+
+def run_worker(*, stop_when_idle: bool = True, poll_interval: float = 2.0, stop_event=None, wake_event=None) -> int:
+    """
+    Process deliveries until the queue is empty (or forever). Returns how
+    many were handled. With `wake_event`, deliveries waiting for a retry
+    still count: the worker sleeps until the next one is due (or until the
+    event is set) and only stops once nothing is PENDING.
+    """
+    handled = 0
+    try:
+        while not (stop_event and stop_event.is_set()):
+            close_old_connections()
+            delivery = claim_next()
+            if delivery is None:
+                if wake_event is not None:
+                    delay = _seconds_until_next_attempt()
+                    if delay is None and stop_when_idle:
+                        break
+                    wake_event.wait(poll_interval if delay is None else max(delay, 0.05))
+                    wake_event.clear()
+                    continue
+                if stop_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+            process_delivery(delivery)
+            handled += 1
+    finally:
+        # Worker threads own their DB connection; don't leak it.
+        connection.close()
+    return handled
+
+
+def drain_deliveries(workers: int = 1, **kwargs) -> int:
+    """Run a pool of `workers` threads over the queue and wait for them."""
+    stop_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, stop_event=stop_event, **kwargs) for _ in range(workers)]
+        try:
+            return sum(f.result() for f in futures)
+        except BaseException:
+            # Ctrl+C: let the threads finish their current delivery and stop.
+            stop_event.set()
+            raise
+
+
+def kick_inline_worker():
+    """Start a background drain in this process unless one is already running."""
+    if not _setting("WEBHOOK_INLINE_WORKER", True):
+        return
+    _inline_wake.set()
+    if not _inline_lock.acquire(blocking=False):
+        # The running drain is woken above, or re-checks the queue as it exits
+        return
+    threading.Thread(target=_inline_drain, daemon=True).start()
+
+
+def _inline_drain():
+    """Body of the inline drain thread; runs with _inline_lock held."""
+    try:
+        while True:
+            try:
+                run_worker(stop_when_idle=True, wake_event=_inline_wake)
+            finally:
+                _inline_lock.release()
+            # A kick that arrived between the last empty claim and the release
+            # saw the lock taken and left its delivery to us.
+            if _seconds_until_next_attempt() is None:
+                return
+            if not _inline_lock.acquire(blocking=False):
+                return
+    finally:
+        connection.close()
@@ -0,0 +1,459 @@
+"""
+GitHub API Client
+=================
+Every call to api.github.com goes through GitHubClient:
+
+  * one pooled, keep-alive requests.Session per process (safe to share
+    between the threads of a concurrent fetch),
+  * a token bucket paces requests; once X-RateLimit-Remaining gets low
+    it slows down so the rest of the quota lasts until X-RateLimit-Reset,
+  * retries with backoff on network errors and 5xx,
+  * waits out `Retry-After` / `X-RateLimit-Reset` instead of failing
+    (up to GITHUB_MAX_RATE_LIMIT_WAIT seconds),
+  * conditional requests: the ETag / Last-Modified of JSON responses that
+    get re-read (commit lists, not immutable single commits) is kept in
+    the GitHubResponseCache table, so an unchanged resource is answered
+    with a 304 (which GitHub does not count against the quota) and its
+    body is replayed from the table; `manage.py prune_github_cache` drops
+    entries that have gone unused,
+  * get_commits_stats batches commit churn through GraphQL, 100 commits
+    per query, instead of one REST call per commit,
+  * get_profile_names resolves author logins through the GitHubIdentity
+    table, which every worker shares, with a TTL and negative caching.
+
+GITHUB_API_URL can point at a local stub server for testing.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import GitHubIdentity, GitHubResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubError(Exception):
+    """A GitHub API call that did not succeed (after retries)."""
+
+    def __init__(self, message, status_code=None, body=""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all threads using one client: `rate` requests per
+    second with bursts of up to `capacity`. Callers reserve a token and sleep
+    outside the lock, so waiting threads don't block each other.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill()
+            self.rate = max(float(rate), 0.01)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class GitHubClient:
+    def __init__(self, token=None, base_url=None, timeout=10, max_retries=3, pool_size=None, max_rate_limit_wait=None,
+                 max_requests_per_second=None):
+        self.token = token if token is not None else getattr(settings, "GITHUB_TOKEN", None)
+        self.base_url = (base_url or getattr(settings, "GITHUB_API_URL", "https://api.github.com")).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_rate_limit_wait = (
+            max_rate_limit_wait if max_rate_limit_wait is not None
+            else getattr(settings, "GITHUB_MAX_RATE_LIMIT_WAIT", 120)
+        )
+
+        # Last rate-limit figures GitHub reported (None until the first response).
+        self.rate_limit = None
+        self.rate_remaining = None
+        self.rate_reset = None
+
+        # Runs at the configured ceiling until X-RateLimit-Remaining drops to the
+        # reserve, then slows down so the rest of the quota lasts until the reset.
+        self.max_requests_per_second = (
+            max_requests_per_second or getattr(settings, "GITHUB_MAX_REQUESTS_PER_SECOND", 10)
+        )
+        self.rate_limit_reserve = getattr(settings, "GITHUB_RATE_LIMIT_RESERVE", 200)
+        self.throttle = TokenBucket(self.max_requests_per_second, capacity=self.max_requests_per_second)
+
+        pool_size = pool_size or max(10, getattr(settings, "GITHUB_FETCH_CONCURRENCY", 8))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if self.token:
+            self.session.headers["Authorization"] = f"Bearer {self.token}"
+
+    # ── Public API ────────────────────────────────────────────────────────
+    def get_json(self, path, params=None, *, use_cache=True):
+        """GET `path` (relative to the API root) and return the decoded JSON body."""
+        url = self._url(path, params)
+        cached = GitHubResponseCache.objects.filter(url=url).first() if use_cache else None
+
+        headers = {}
+        if cached:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        resp = self._request(url, headers)
+        if resp.status_code == 304 and cached:
+            # fetched_at doubles as "last used", which prune_response_cache evicts by
+            GitHubResponseCache.objects.filter(pk=cached.pk).update(fetched_at=timezone.now())
+            return cached.body
+        if resp.status_code != 200:
+            raise GitHubError(
+                f"GitHub API {resp.status_code} for {path}", status_code=resp.status_code, body=resp.text
+            )
+
+        data = resp.json()
+        etag = resp.headers.get("ETag", "")
+        last_modified = resp.headers.get("Last-Modified", "")
+        if use_cache and (etag or last_modified):
+            GitHubResponseCache.objects.update_or_create(
+                url=url, defaults={"etag": etag, "last_modified": last_modified, "body": data}
+            )
+        return data
+
+    def graphql(self, query, variables=None):
+        """Run a GraphQL query and return its "data" (partial data is returned alongside errors)."""
+        resp = self._request(self._url("/graphql"), {}, method="POST", json={"query": query, "variables": variables or {}})
+        if resp.status_code != 200:
+            raise GitHubError(f"GitHub GraphQL {resp.status_code}", status_code=resp.status_code, body=resp.text)
+        payload = resp.json()
+        if payload.get("errors"):
+            logger.warning("GitHub GraphQL errors: %s", payload["errors"])
+        if payload.get("data") is None:
+            raise GitHubError("GitHub GraphQL returned no data", status_code=resp.status_code, body=resp.text)
+        return payload["data"]
+
+    # ── Internals ─────────────────────────────────────────────────────────
+    def _url(self, path, params=None):
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return url
+
+    def _record_rate_limit(self, resp):
+        h = resp.headers
+        try:
+            if "X-RateLimit-Limit" in h:
+                self.rate_limit = int(h["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in h:
+                self.rate_remaining = int(h["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in h:
+                self.rate_reset = int(h["X-RateLimit-Reset"])
+        except ValueError:
+            return
+
+        if self.rate_remaining is None or not self.rate_reset:
+            return
+        if self.rate_remaining > self.rate_limit_reserve:
+            self.throttle.set_rate(self.max_requests_per_second)
+        else:
+            # Running low: spread what's left over the rest of the window.
+            seconds_left = max(self.rate_reset - time.time(), 1)
+            budget = max(self.rate_remaining, 1) / seconds_left
+            self.throttle.set_rate(min(budget, self.max_requests_per_second))
+
+    def _rate_limit_wait(self, resp):
+        """Seconds to wait before retrying a throttled response, or None if it isn't one."""
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(float(retry_after), 1.0)
+            except ValueError:
+                return 60.0
+        if resp.headers.get("X-RateLimit-Remaining") == "0" and self.rate_reset:
+            return max(self.rate_reset - time.time(), 0) + 1
+        return None
+
+    def _request(self, url, headers, method="GET", json=None):
+        attempt = 0
+        while True:
+            attempt += 1
+            self.throttle.acquire()
+            try:
+                resp = self.session.request(method, url, headers=headers, json=json, timeout=self.timeout)
+            except requests.RequestException as exc:
+                if attempt > self.max_retries:
+                    raise GitHubError(f"Network error for {url}: {exc}") from exc
+                time.sleep(2 ** (attempt - 1))
+                continue
+
+            self._record_rate_limit(resp)
+
+            wait = self._rate_limit_wait(resp)
+            if wait is not None:
+                if attempt > self.max_retries or wait > self.max_rate_limit_wait:
+                    return resp
+                logger.warning("GitHub rate limit hit, waiting %.0fs before retrying %s", wait, url)
+                time.sleep(wait)
+                continue
+
+            if resp.status_code >= 500 and attempt <= self.max_retries:
+                time.sleep(2 ** (attempt - 1))
+                continue
+
+            return resp
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> GitHubClient:
+    """The process-wide client, so every caller shares one connection pool."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GitHubClient()
+    return _client
+
+
+def prune_response_cache(max_age=None, max_rows=None) -> int:
+    """
+    Drop cached responses not used for `max_age` (a timedelta), then the
+    least recently used beyond `max_rows`. Defaults come from
+    GITHUB_RESPONSE_CACHE_TTL / GITHUB_RESPONSE_CACHE_MAX_ROWS. Returns
+    how many rows were deleted.
+    """
+    if max_age is None:
+        max_age = timedelta(seconds=getattr(settings, "GITHUB_RESPONSE_CACHE_TTL", 30 * 86400))
+    if max_rows is None:
+        max_rows = getattr(settings, "GITHUB_RESPONSE_CACHE_MAX_ROWS", 5000)
+
+    deleted, _ = GitHubResponseCache.objects.filter(fetched_at__lt=timezone.now() - max_age).delete()
+    # The newest row past the cap; it and everything older goes
+    cutoff = (
+        GitHubResponseCache.objects.order_by("-fetched_at", "-pk")
+        .values_list("fetched_at", "pk")[max_rows:max_rows + 1]
+        .first()
+    )
+    if cutoff is None:
+        return deleted
+    over, _ = GitHubResponseCache.objects.filter(
+        Q(fetched_at__lt=cutoff[0]) | Q(fetched_at=cutoff[0], pk__lte=cutoff[1])
+    ).delete()
+    return deleted + over
+
+
+# ─────────────────────────────────────────────────────────────
+# Helpers used by ingestion
+# ─────────────────────────────────────────────────────────────
+
+def get_commit_stats(repo_full_name: str, sha: str) -> dict:
+    """
+    Additions + deletions for one commit.
+    Returns {"additions": int, "deletions": int, "churn": int}; all zero if GitHub can't be reached.
+    """
+    try:
+        # A commit never changes and is fetched once, so its (large) body isn't worth caching
+        data = get_client().get_json(f"/repos/{repo_full_name}/commits/{sha}", use_cache=False)
+    except GitHubError as exc:
+        logger.error("GitHub API error for %s@%s: %s", repo_full_name, sha, exc)
+        return {"additions": 0, "deletions": 0, "churn": 0}
+    stats     = data.get("stats", {})
+    additions = stats.get("additions", 0)
+    deletions = stats.get("deletions", 0)
+    return {"additions": additions, "deletions": deletions, "churn": additions + deletions}
+
+
+def fetch_all_stats(fetch_stats, repo_full_name: str, shas: list, concurrency: int = 1) -> dict:
+    """Call fetch_stats for every SHA using up to `concurrency` threads; returns {sha: stats}."""
+    if concurrency <= 1 or len(shas) <= 1:
+        return {sha: fetch_stats(repo_full_name, sha) for sha in shas}
+
+    remaining = iter(shas)
+    lock = threading.Lock()
+    results = {}
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    sha = next(remaining, None)
+                if sha is None:
+                    return
+                results[sha] = fetch_stats(repo_full_name, sha)
+        finally:
+            # The client touches the response-cache table; each thread has its own connection.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(shas))) as pool:
+        for future in [pool.submit(worker) for _ in range(min(concurrency, len(shas)))]:
+            future.result()
+    return results
+
+
+GRAPHQL_BATCH_SIZE = 100
+
+
+def _graphql_commit_stats(repo_full_name: str, shas: list) -> dict:
+    """additions/deletions for up to GRAPHQL_BATCH_SIZE commits in a single GraphQL query."""
+    owner, _, name = repo_full_name.partition("/")
+    params = ", ".join(f"$s{i}: GitObjectID!" for i in range(len(shas)))
+    fields = " ".join(
+        f"c{i}: object(oid: $s{i}) {{ ... on Commit {{ additions deletions }} }}" for i in range(len(shas))
+    )
+    query = f"query($owner: String!, $name: String!, {params}) {{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+    variables = {"owner": owner, "name": name, **{f"s{i}": sha for i, sha in enumerate(shas)}}
+
+    repository = get_client().graphql(query, variables).get("repository") or {}
+    results = {}
+    for i, sha in enumerate(shas):
+        node = repository.get(f"c{i}")
+        if node and node.get("additions") is not None:
+            additions, deletions = node["additions"], node.get("deletions") or 0
+            results[sha] = {"additions": additions, "deletions": deletions, "churn": additions + deletions}
+    return results
+
+
+def get_commits_stats(repo_full_name: str, shas: list, concurrency: int = 1) -> dict:
+    """
+    {sha: stats} for many commits with as few API calls as possible: one
+    GraphQL query per 100 commits (the REST compare endpoint has no
+    per-commit stats). Anything GraphQL can't answer — no token, errors,
+    unknown SHAs — falls back to one REST call per commit.
+    """
+    results = {}
+    if get_client().token:
+        for start in range(0, len(shas), GRAPHQL_BATCH_SIZE):
+            batch = shas[start:start + GRAPHQL_BATCH_SIZE]
+            try:
+                results.update(_graphql_commit_stats(repo_full_name, batch))
+            except GitHubError as exc:
+                logger.warning("GraphQL stats for %s failed, falling back to REST: %s", repo_full_name, exc)
+                break
+
+    missing = [sha for sha in shas if sha not in results]
+    results.update(fetch_all_stats(get_commit_stats, repo_full_name, missing, concurrency))
+    return results
+
+
+# ── Author identities ─────────────────────────────────────────
+
+def _graphql_profile_names(logins: list) -> dict:
+    """{login: display name, or None for no such user} for up to GRAPHQL_BATCH_SIZE logins in one query."""
+    params = ", ".join(f"$l{i}: String!" for i in range(len(logins)))
+    fields = " ".join(f"u{i}: user(login: $l{i}) {{ login name }}" for i in range(len(logins)))
+    data = get_client().graphql(f"query({params}) {{ {fields} }}", {f"l{i}": login for i, login in enumerate(logins)})
+    results = {}
+    for i, login in enumerate(logins):
+        node = data.get(f"u{i}")
+        results[login] = (node.get("name") or node.get("login") or login) if node else None
+    return results
+
+
+def _rest_profile_name(login: str):
+    """Display name from /users/{login}, None for no such user. Other failures raise GitHubError."""
+    try:
+        data = get_client().get_json(f"/users/{login}", use_cache=False)
+    except GitHubError as exc:
+        if exc.status_code == 404:
+            return None
+        raise
+    # "name" is the display name (e.g. "Jobin Jose"), "login" is username
+    return data.get("name") or data.get("login") or login
+
+
+def get_profile_names(logins) -> dict:
+    """
+    {login: display name or None} for every login in `logins`, from one
+    query against the GitHubIdentity table. Only logins that are unknown or
+    past their TTL go to GitHub (GraphQL batches when there is a token,
+    REST otherwise), and the answers are written back in one statement.
+    Failed lookups are stored as well and only retried after
+    GITHUB_IDENTITY_NEGATIVE_TTL.
+    """
+    logins = {login for login in logins if login}
+    if not logins:
+        return {}
+
+    now          = timezone.now()
+    ttl          = timedelta(seconds=getattr(settings, "GITHUB_IDENTITY_TTL", 7 * 86400))
+    negative_ttl = timedelta(seconds=getattr(settings, "GITHUB_IDENTITY_NEGATIVE_TTL", 3600))
+
+    known = {identity.login: identity for identity in GitHubIdentity.objects.filter(login__in=logins)}
+    results = {}
+    stale = []
+    for login in sorted(logins):
+        identity = known.get(login)
+        if identity is not None:
+            results[login] = identity.name if identity.found else None
+            if now - identity.fetched_at < (ttl if identity.found else negative_ttl):
+                continue
+        stale.append(login)
+    if not stale:
+        return results
+
+    fetched = {}
+    if get_client().token:
+        for start in range(0, len(stale), GRAPHQL_BATCH_SIZE):
+            try:
+                fetched.update(_graphql_profile_names(stale[start:start + GRAPHQL_BATCH_SIZE]))
+            except GitHubError as exc:
+                logger.warning("GraphQL user lookup failed, falling back to REST: %s", exc)
+                break
+
+    rows = []
+    for login in stale:
+        if login not in fetched:
+            try:
+                fetched[login] = _rest_profile_name(login)
+            except GitHubError as exc:
+                logger.warning("GitHub profile lookup for %s failed: %s", login, exc)
+                if login in known and known[login].found:
+                    continue  # keep serving the old name; refreshed on a later lookup
+        name = fetched.get(login)
+        results[login] = name
+        rows.append(GitHubIdentity(login=login, name=name or "", found=name is not None, fetched_at=now))
+
+    GitHubIdentity.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["login"], update_fields=["name", "found", "fetched_at"],
+    )
+    return results
+
+
+def get_profile_name(username):
+    """Display name of a GitHub user (falls back to the login), or None."""
+    return get_profile_names([username]).get(username)
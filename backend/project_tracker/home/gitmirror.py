@@ -0,0 +1,136 @@
+"""
+Local Git Mirror
+================
+Optional churn source that doesn't touch the GitHub API quota: a bare
+clone per Project.github_repo under GITHUB_MIRROR_DIR, fetched
+incrementally before use, and `git log --numstat` run once over all the
+SHAs of a batch (streamed, not buffered).
+
+Enable it with GITHUB_CHURN_SOURCE = "mirror" (webhooks and syncs) or
+`sync_commits --mirror`. Commits the mirror can't resolve fall back to
+the API. GITHUB_MIRROR_REMOTE may be a local path template, which is
+how it can be exercised against a throwaway repo.
+"""
+
+import base64
+import logging
+import os
+import subprocess
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+from .github import get_commits_stats as api_commits_stats
+
+logger = logging.getLogger(__name__)
+
+_repo_locks = defaultdict(threading.Lock)
+
+
+class MirrorError(Exception):
+    pass
+
+
+def mirror_path(repo_full_name: str) -> Path:
+    base = Path(getattr(settings, "GITHUB_MIRROR_DIR", Path(settings.BASE_DIR) / "git-mirrors"))
+    return base / (repo_full_name.lower().replace("/", "__") + ".git")
+
+
+def _remote_url(repo_full_name: str) -> str:
+    template = getattr(settings, "GITHUB_MIRROR_REMOTE", "https://github.com/{repo}.git")
+    return template.format(repo=repo_full_name)
+
+
+def _git(args, *, cwd=None, input=None, timeout=600):
+    cmd = ["git"]
+    token = getattr(settings, "GITHUB_TOKEN", None)
+    if token:
+        # Passed per command so the token is never written into the mirror's config.
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        cmd += ["-c", f"http.https://github.com/.extraheader=Authorization: Basic {basic}"]
+    cmd += args
+    proc = subprocess.run(
+        cmd, cwd=cwd, input=input, capture_output=True, text=True, timeout=timeout,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+    )
+    if proc.returncode != 0:
+        raise MirrorError(f"git {' '.join(args[:2])} failed: {proc.stderr.strip()[:500]}")
+    return proc.stdout
+
+
+def update_mirror(repo_full_name: str) -> Path:
+    """Clone the bare mirror on first use, otherwise fetch just what's new."""
+    path = mirror_path(repo_full_name)
+    with _repo_locks[str(path)]:
+        if not (path / "HEAD").exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _git(["clone", "--bare", "--quiet", _remote_url(repo_full_name), str(path)])
+        else:
+            _git(["fetch", "--quiet", "--prune", "origin", "+refs/heads/*:refs/heads/*"], cwd=path)
+    return path
+
+
+def _existing_shas(path: Path, shas: list) -> list:
+    """The SHAs that are commits in the mirror (one `git cat-file --batch-check`)."""
+    out = _git(["cat-file", "--batch-check=%(objectname) %(objecttype)"], cwd=path, input="\n".join(shas) + "\n")
+    found = set()
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1] == "commit":
+            found.add(parts[0])
+    return [sha for sha in shas if sha in found]
+
+
+def numstat(path: Path, shas: list) -> dict:
+    """
+    {sha: stats} for the given commits from a single streaming
+    `git log --no-walk --numstat` pass. Binary files count as 0 lines.
+    """
+    results = {}
+    if not shas:
+        return results
+
+    proc = subprocess.Popen(
+        ["git", "log", "--no-walk=unsorted", "--stdin", "--numstat", "--format=%x00%H"],
+        cwd=path, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    # Feed the revisions from a thread so a large batch can't deadlock on full pipes.
+    feeder = threading.Thread(target=lambda: (proc.stdin.write("\n".join(shas) + "\n"), proc.stdin.close()))
+    feeder.start()
+
+    current = None
+    for line in proc.stdout:
+        line = line.rstrip("\n")
+        if line.startswith("\x00"):
+            current = {"additions": 0, "deletions": 0, "churn": 0}
+            results[line[1:]] = current
+        elif current is not None and line:
+            added, deleted, _ = line.split("\t", 2)
+            if added.isdigit() and deleted.isdigit():
+                current["additions"] += int(added)
+                current["deletions"] += int(deleted)
+                current["churn"] += int(added) + int(deleted)
+
+    feeder.join()
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise MirrorError(f"git log failed: {stderr.strip()[:500]}")
+    return results
+
+
+def get_commits_stats(repo_full_name: str, shas: list, concurrency: int = 1) -> dict:
+    """Same contract as github.get_commits_stats, computed from the local mirror where possible."""
+    results = {}
+    if shas:
+        try:
+            path = update_mirror(repo_full_name)
+            results = numstat(path, _existing_shas(path, shas))
+        except (MirrorError, OSError, subprocess.TimeoutExpired) as exc:
+            logger.warning("Git mirror for %s unavailable, using the API: %s", repo_full_name, exc)
+
+    missing = [sha for sha in shas if sha not in results]
+    if missing:
+        results.update(api_commits_stats(repo_full_name, missing, concurrency))
+    return results
@@ -0,0 +1,152 @@
+"""
+Project Images
+==============
+Project.image holds the uploaded original (MEDIA_ROOT/project-images/);
+the API serves it, or a thumbnail of it, from /api/home/<id>/image/.
+
+  * Thumbnails are made with Pillow the first time a size is asked for
+    and kept in storage next to the original
+    (project-images/thumbs/<project id>/<version>-<size>.<ext>), so each
+    size is resized once per image.
+  * <version> is derived from the stored file name, which changes with
+    every upload. The serializer's image_url carries it as ?v=, and
+    responses to a URL with the current version are cacheable for a
+    year; anything else gets an ETag to revalidate against.
+  * Replacing or clearing the image, or deleting the project, removes
+    the old original and its thumbnails.
+"""
+
+import hashlib
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Project
+
+THUMBNAIL_SIZES = {"thumb": 96, "card": 320, "large": 1024}  # longest side, in pixels
+CACHE_SECONDS = 365 * 86400
+THUMBS_DIR = "project-images/thumbs"
+FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}  # kept as-is; anything else becomes PNG or JPEG
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+# What Pillow raises for a file it can't identify, a truncated file, or a decompression bomb
+UNREADABLE = (UnidentifiedImageError, OSError, Image.DecompressionBombError)
+
+
+def image_version(name) -> str:
+    return hashlib.sha1(name.encode()).hexdigest()[:12]
+
+
+def _thumbs_dir(project_pk) -> str:
+    return f"{THUMBS_DIR}/{project_pk}"
+
+
+def _delete_stored(project_pk, name) -> None:
+    if name:
+        default_storage.delete(name)
+    try:
+        _, files = default_storage.listdir(_thumbs_dir(project_pk))
+    except FileNotFoundError:
+        return
+    for filename in files:
+        default_storage.delete(f"{_thumbs_dir(project_pk)}/{filename}")
+
+
+def check_image(upload) -> None:
+    """
+    Raise InvalidImage unless `upload` is an image Pillow can read.
+    verify() only checks the structure (and not at all for JPEG), so the
+    pixels are decoded too: a truncated upload is refused here rather than
+    failing later when a thumbnail is made.
+    """
+    try:
+        with Image.open(upload) as image:
+            image.verify()
+        upload.seek(0)
+        with Image.open(upload) as image:
+            image.load()
+    except UNREADABLE as e:
+        raise InvalidImage(f"Not a readable image: {e}")
+    finally:
+        upload.seek(0)
+
+
+def set_project_image(project, upload) -> None:
+    """Store `upload` (or clear the image when None), dropping the previous original and its thumbnails."""
+    old_name = project.image.name
+    if upload is None:
+        project.image = None
+    else:
+        check_image(upload)
+        project.image.save(os.path.basename(upload.name), upload, save=False)
+    project.save(update_fields=["image"])
+    _delete_stored(project.pk, old_name)
+
+
+def thumbnail(project, size) -> str:
+    """Storage name of the `size` thumbnail of the project's image, made on first use."""
+    version = image_version(project.image.name)
+    prefix = f"{_thumbs_dir(project.pk)}/{version}-{size}."
+    for ext in FORMATS.values():
+        if default_storage.exists(prefix + ext):
+            return prefix + ext
+
+    with project.image.open("rb") as fh, Image.open(fh) as image:
+        source_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((THUMBNAIL_SIZES[size],) * 2)
+        fmt = source_format if source_format in FORMATS else ("PNG" if "A" in image.getbands() else "JPEG")
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, fmt)
+    return default_storage.save(prefix + FORMATS[fmt], ContentFile(buffer.getvalue()))
+
+
+def image_response(request, project, size):
+    if not project.image:
+        return HttpResponse("This project has no image.", status=404)
+
+    version = image_version(project.image.name)
+    etag = f'"{version}-{size}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            if size == "original":
+                fh = project.image.open("rb")
+            else:
+                fh = default_storage.open(thumbnail(project, size), "rb")
+        except FileNotFoundError:
+            return HttpResponse("Image file is missing from storage.", status=404)
+        except UNREADABLE:
+            # Stored before uploads were fully decoded; the original is still served as-is
+            return HttpResponse("The stored image can't be decoded.", status=415)
+        response = FileResponse(fh)
+
+    response["ETag"] = etag
+    if request.GET.get("v") == version:
+        response["Cache-Control"] = f"public, max-age={CACHE_SECONDS}, immutable"
+    else:
+        response["Cache-Control"] = "no-cache"  # revalidate with the ETag
+    return response
+
+
+# ─────────────────────────────────────────────────────────────
+# Signals (connected when the app is ready, see HomeConfig.ready)
+# ─────────────────────────────────────────────────────────────
+
+def _project_deleted(sender, instance, **kwargs):
+    _delete_stored(instance.pk, instance.image.name)
+
+
+post_delete.connect(_project_deleted, sender=Project, dispatch_uid="project_image_cleanup")
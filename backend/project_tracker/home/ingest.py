@@ -0,0 +1,329 @@
+"""
+Commit Ingestion Pipeline
+=========================
+Shared by the push webhook worker, the `sync_commits` command and the
+admin "Sync commits" action. Commits are handled a batch at a time
+(one push, or one page of the commits API):
+
+  1. one query finds which SHAs this project already has,
+  2. hours and descriptions are worked out in Python, author names
+     come from the GitHubIdentity table in one lookup;
+     commit stats are fetched in GraphQL batches (or by a small thread
+     pool, or from a local git mirror), outside any transaction,
+  3. missing (project, employee, date) Timesheets are bulk-created,
+  4. all TimesheetTasks are bulk-created,
+  5. totals are re-aggregated for all affected Timesheets in one UPDATE,
+     and the affected monthly rollups once per employee-month.
+
+That keeps the DB work per batch at a handful of queries no matter how
+many commits it contains (`manage.py benchmark_ingest` counts them).
+"""
+
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import gitmirror
+from .dashboard import invalidate_summary
+from .github import fetch_all_stats, get_commits_stats, get_profile_names
+from .models import Timesheet, TimesheetTask, is_merge_message
+from .rollups import refresh_rollups, rollup_key
+
+
+# ─────────────────────────────────────────────────────────────
+# Commit message helpers
+# ─────────────────────────────────────────────────────────────
+
+def _parse_time_from_message(message: str) -> float:
+    # Match patterns like [1.5h], [45m], [1h 30m], [2 hrs], etc. anywhere in the message
+    matches = re.findall(r'\[([^\]]+)\]', message)
+    for text in reversed(matches):
+        text = text.lower().strip()
+        hours = 0.0
+        found = False
+        
+        # Check for hours: e.g. "1.5h", "2 hours", "1.5 hrs"
+        h_match = re.search(r'(\d*\.?\d+)\s*(?:h|hr|hour)', text)
+        if h_match:
+            hours += float(h_match.group(1))
+            found = True
+            
+        # Check for minutes: e.g. "30m", "45 mins"
+        m_match = re.search(r'(\d+)\s*(?:m|min)', text)
+        if m_match:
+            hours += float(m_match.group(1)) / 60.0
+            found = True
+            
+        if found:
+            return round(hours, 2)
+            
+        # Fallback to pure number inside bracket, e.g. [1.5]
+        try:
+            return round(float(text), 2)
+        except ValueError:
+            pass
+            
+    return None
+
+
+def _clean_time_from_message(message: str) -> str:
+    # Find all bracketed parts and remove those that we can parse as time spent
+    matches = re.findall(r'\[([^\]]+)\]', message)
+    cleaned = message
+    for text in matches:
+        parsed_text = text.lower().strip()
+        found = False
+        h_match = re.search(r'(\d*\.?\d+)\s*(?:h|hr|hour)', parsed_text)
+        if h_match:
+            found = True
+        m_match = re.search(r'(\d+)\s*(?:m|min)', parsed_text)
+        if m_match:
+            found = True
+        if not found:
+            try:
+                float(parsed_text)
+                found = True
+            except ValueError:
+                pass
+        
+        if found:
+            escaped_text = re.escape(text)
+            cleaned = re.sub(r'\[\s*' + escaped_text + r'\s*\]', '', cleaned)
+            
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return cleaned
+
+
+def _is_merge_message(message: str) -> bool:
+    return is_merge_message(message)
+
+
+# ─────────────────────────────────────────────────────────────
+# Normalising commits from the different GitHub payloads
+# ─────────────────────────────────────────────────────────────
+
+def commit_from_push(commit: dict) -> dict:
+    """A commit from a push webhook payload."""
+    author = commit.get('author') or {}
+    return {
+        "sha": commit.get('id', ''),
+        "message": commit.get('message', 'No commit message'),
+        "timestamp": commit.get('timestamp'),
+        "login": author.get('username'),
+        "author_name": author.get('name') or 'Unknown',
+    }
+
+
+def commit_from_api(item: dict) -> dict:
+    """An item from GET /repos/{repo}/commits."""
+    commit_info = item.get("commit", {})
+    author_info = commit_info.get("author") or {}
+    github_user = item.get("author") or {}
+    return {
+        "sha": item.get("sha", ""),
+        "message": commit_info.get("message", ""),
+        "timestamp": author_info.get("date"),
+        "login": github_user.get("login"),
+        "author_name": author_info.get("name") or "Unknown",
+    }
+
+
+def newest_commit(items: list):
+    """(sha, committed_at) of the most recently committed item from GET /repos/{repo}/commits, or None."""
+    newest = None
+    for item in items:
+        committer = (item.get("commit") or {}).get("committer") or {}
+        committed_at = parse_datetime(committer.get("date") or "")
+        if committed_at and (newest is None or committed_at > newest[1]):
+            newest = (item.get("sha", ""), committed_at)
+    return newest
+
+
+def advance_sync_cursor(project, newest) -> None:
+    """Move the project's sync cursor forward to `newest` (see newest_commit)."""
+    if not newest:
+        return
+    sha, committed_at = newest
+    if project.github_synced_at and project.github_synced_at >= committed_at:
+        return
+    project.github_synced_sha, project.github_synced_at = sha, committed_at
+    # update() rather than save(): Project.save re-reads the row to check the hourly rate.
+    type(project).objects.filter(pk=project.pk).update(github_synced_sha=sha, github_synced_at=committed_at)
+
+
+def _commit_date(timestamp_str):
+    commit_date = timezone.now().date()
+    if timestamp_str:
+        try:
+            parsed_dt = parse_datetime(timestamp_str)
+            if parsed_dt:
+                commit_date = parsed_dt.date()
+        except ValueError:
+            pass
+    return commit_date
+
+
+# ─────────────────────────────────────────────────────────────
+# Pipeline
+# ─────────────────────────────────────────────────────────────
+
+def ingest_commits(projects, repo_full_name: str, commits: list, *, fetch_stats=None, limit: int = None,
+                   concurrency: int = 1, use_mirror: bool = None) -> int:
+    """
+    Create timesheet tasks for the `commits` (normalised dicts, see
+    commit_from_push / commit_from_api) in every project of `projects`.
+    Commits a project already has are skipped. `limit` caps how many new
+    commits are taken per project, and up to `concurrency` commit-stats
+    requests run at once. `use_mirror` reads churn from the local git
+    mirror instead of the API (defaults to GITHUB_CHURN_SOURCE).
+    Returns the number of tasks created.
+    """
+    if use_mirror is None:
+        use_mirror = getattr(settings, "GITHUB_CHURN_SOURCE", "api") == "mirror"
+
+    # Both are shared across projects so a repo linked twice costs no extra API calls.
+    stats_cache = {}
+    name_cache = {}
+
+    def employee_for(commit):
+        login = commit["login"]
+        return (name_cache.get(login) if login else None) or login or commit["author_name"]
+
+    created_total = 0
+    for project in projects:
+        shas = [c["sha"] for c in commits]
+        seen = set(
+            TimesheetTask.objects.filter(timesheet__project=project, github_sha__in=shas)
+            .values_list("github_sha", flat=True)
+        )
+
+        # 1. Decide which commits are new and how each one gets its hours.
+        pending = []  # (commit, hours or None when churn is needed)
+        for commit in commits:
+            if limit is not None and len(pending) >= limit:
+                break
+            sha = commit["sha"]
+            if sha in seen:
+                continue
+            seen.add(sha)
+
+            message = commit["message"]
+            if _is_merge_message(message):
+                hours = 0.0  # merge commits are not billed
+            else:
+                hours = _parse_time_from_message(message)
+            pending.append((commit, hours))
+
+        # 2. Fetch the churn the rest need: with `fetch_stats` per commit (in
+        #    parallel) when a caller supplies one, else from the git mirror
+        #    or batched through GraphQL.
+        need_stats = [c["sha"] for c, hours in pending if hours is None and c["sha"] not in stats_cache]
+        if fetch_stats is not None:
+            stats_cache.update(fetch_all_stats(fetch_stats, repo_full_name, need_stats, concurrency))
+        elif use_mirror:
+            stats_cache.update(gitmirror.get_commits_stats(repo_full_name, need_stats, concurrency))
+        else:
+            stats_cache.update(get_commits_stats(repo_full_name, need_stats, concurrency))
+
+        # 3. Resolve every new author login in one identity-table lookup.
+        name_cache.update(get_profile_names({c["login"] for c, _ in pending if c["login"]} - name_cache.keys()))
+
+        # 4. Group by (employee, date) -> [(sha, description, hours)]
+        groups = defaultdict(list)
+        for commit, hours in pending:
+            if hours is None:
+                churn = stats_cache[commit["sha"]].get("churn", 0)
+                hours = project.churn_to_hours(churn) if churn > 0 else 0.0
+            key = (employee_for(commit), _commit_date(commit["timestamp"]))
+            groups[key].append((commit["sha"], _clean_time_from_message(commit["message"]), hours))
+
+        if groups:
+            created_total += _write_groups(project, groups)
+
+    return created_total
+
+
+def _write_groups(project, groups) -> int:
+    rate = project.hourly_rate
+    with transaction.atomic():
+        timesheets = _get_or_create_timesheets(project, groups)
+
+        tasks = []
+        for key, entries in groups.items():
+            timesheet = timesheets[key]
+            for sha, description, hours in entries:
+                tasks.append(TimesheetTask(
+                    timesheet=timesheet,
+                    description=description,
+                    hours=hours,
+                    # bulk_create skips TimesheetTask.save(), so price and classify it here
+                    amount=round(float(hours) * float(timesheet.hourly_rate or rate), 2),
+                    is_merge=is_merge_message(description),
+                    github_sha=sha,
+                ))
+        TimesheetTask.objects.bulk_create(tasks)
+
+        recompute_timesheet_totals([t.pk for t in timesheets.values()])
+        # The employee-months are the group keys; no need to read them back from the timesheets
+        refresh_rollups(rollup_key(project.pk, day, name) for name, day in groups)
+    return len(tasks)
+
+
+def _get_or_create_timesheets(project, groups) -> dict:
+    """Map every (employee, date) key in `groups` to a GITHUB_COMMIT Timesheet, creating the missing ones in bulk."""
+    names = {name for name, _ in groups}
+    dates = {day for _, day in groups}
+    found = {}
+    for ts in Timesheet.objects.filter(
+        project=project, source="GITHUB_COMMIT", employee_name__in=names, date__in=dates
+    ).order_by("id"):
+        found.setdefault((ts.employee_name, ts.date), ts)
+
+    missing = [key for key in groups if key not in found]
+    if missing:
+        new = [
+            Timesheet(
+                project=project,
+                employee_name=name,
+                date=day,
+                source="GITHUB_COMMIT",
+                hourly_rate=project.hourly_rate,
+                total_hours=0,
+                total_amount=0,
+                github_sha=groups[(name, day)][0][0],
+            )
+            for name, day in missing
+        ]
+        # A concurrent ingest may insert the same key first (home_timesheet_commit_key);
+        # conflicts are skipped and every key is looked up again.
+        Timesheet.objects.bulk_create(new, ignore_conflicts=True)
+        return _get_or_create_timesheets(project, groups)
+    return found
+
+
+def _task_sum(field):
+    tasks = TimesheetTask.objects.filter(timesheet=OuterRef("pk")).order_by().values("timesheet")
+    return Coalesce(
+        Subquery(tasks.annotate(total=Sum(field)).values("total")),
+        Value(0),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def recompute_timesheet_totals(timesheet_ids) -> None:
+    """Re-aggregate total_hours / total_amount for the given timesheets in one UPDATE."""
+    timesheet_ids = list(timesheet_ids)
+    if not timesheet_ids:
+        return
+    Timesheet.objects.filter(pk__in=timesheet_ids).update(
+        total_hours=_task_sum("hours"),
+        total_amount=_task_sum("amount"),
+    )
+    # update() sends no signals, so drop the cached dashboard numbers here
+    transaction.on_commit(invalidate_summary)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from home.models import TimesheetTask, is_merge_message
+from home.rollups import refresh_rollups_for_timesheets
+
+
+class Command(BaseCommand):
+    help = 'Set TimesheetTask.is_merge from the description for every task whose flag is out of date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Tasks read and updated per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many tasks would change')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        changed = []
+        timesheet_ids = set()
+        scanned = 0
+
+        tasks = TimesheetTask.objects.only('id', 'timesheet_id', 'description', 'is_merge').order_by('id')
+        for task in tasks.iterator(chunk_size=batch_size):
+            scanned += 1
+            flag = is_merge_message(task.description)
+            if flag != task.is_merge:
+                changed.append(TimesheetTask(pk=task.pk, is_merge=flag))
+                timesheet_ids.add(task.timesheet_id)
+
+        self.stdout.write(f'Scanned {scanned} tasks, {len(changed)} flags out of date.')
+        if options['dry_run'] or not changed:
+            return
+
+        TimesheetTask.objects.bulk_update(changed, ['is_merge'], batch_size=batch_size)
+        refresh_rollups_for_timesheets(timesheet_ids)
+        self.stdout.write(self.style.SUCCESS(f'✅ Updated {len(changed)} tasks and their monthly rollups.'))
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from home.ingest import ingest_commits
+from home.models import Project
+import time
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure DB queries and time of the commit ingestion pipeline (all writes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--commits', type=int, default=100, help='Commits per batch')
+        parser.add_argument('--authors', type=int, default=3, help='Distinct authors in the batch')
+        parser.add_argument('--days', type=int, default=5, help='Distinct commit dates in the batch')
+
+    def handle(self, *args, **options):
+        n = options['commits']
+        authors = max(options['authors'], 1)
+        days = max(options['days'], 1)
+
+        # Commits alternate between "[1h]" messages and churn-estimated ones;
+        # churn comes from a stub so the numbers are DB-only.
+        commits = [
+            {
+                "sha": f"{i:040x}",
+                "message": f"Benchmark commit {i} [1h]" if i % 2 else f"Benchmark commit {i}",
+                "timestamp": f"2026-01-{(i % days) + 1:02d}T10:00:00Z",
+                "login": None,
+                "author_name": f"bench-author-{i % authors}",
+            }
+            for i in range(n)
+        ]
+
+        def fake_stats(repo, sha):
+            return {"additions": 40, "deletions": 20, "churn": 60}
+
+        try:
+            with transaction.atomic():
+                project = Project.objects.create(name="__ingest_benchmark__", hourly_rate=500)
+
+                for label in ("fresh batch", "re-delivered batch"):
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        created = ingest_commits([project], "bench/bench", commits, fetch_stats=fake_stats)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    per_100 = len(ctx.captured_queries) * 100 / n if n else 0
+                    self.stdout.write(
+                        f'{label:<20} {n} commits → {created} created, '
+                        f'{len(ctx.captured_queries)} queries ({per_100:.1f} per 100 commits), {elapsed:.1f} ms'
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Done (benchmark data rolled back).'))
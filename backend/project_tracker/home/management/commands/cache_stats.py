@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from home import caching
+
+
+class Command(BaseCommand):
+    help = 'Show cache hits / misses per namespace (summed over all workers)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+
+    def handle(self, *args, **options):
+        for namespace, row in caching.stats().items():
+            rate = f"{row['hit_rate']:.1%}" if row['hit_rate'] is not None else '—'
+            self.stdout.write(
+                f"{namespace:<12} hits={row['hits']:<8} misses={row['misses']:<8} "
+                f"hit rate={rate:<7} ttl={row['ttl']}s v{row['version']}"
+            )
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset.'))
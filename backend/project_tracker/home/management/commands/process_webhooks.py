@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from home.deliveries import drain_deliveries, requeue_stale
+from home.models import WebhookDelivery
+
+
+class Command(BaseCommand):
+    help = 'Drain queued GitHub webhook deliveries with a local worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker threads')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as the queue is empty')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds to wait between polls when idle')
+        parser.add_argument('--status', action='store_true', help='Print queue counts per status and exit')
+        parser.add_argument('--retry-failed', action='store_true', help='Move FAILED deliveries back to PENDING first')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self._print_status()
+            return
+
+        if options['retry_failed']:
+            from django.utils import timezone
+            n = WebhookDelivery.objects.filter(status='FAILED').update(
+                status='PENDING', attempts=0, next_attempt_at=timezone.now()
+            )
+            self.stdout.write(self.style.WARNING(f'Re-queued {n} failed deliveries.'))
+
+        stale = requeue_stale()
+        if stale:
+            self.stdout.write(self.style.WARNING(f'Re-queued {stale} stale deliveries.'))
+
+        workers = max(options['workers'], 1)
+        self.stdout.write(f'Starting {workers} webhook worker(s)...')
+        try:
+            handled = drain_deliveries(
+                workers=workers,
+                stop_when_idle=options['once'],
+                poll_interval=options['poll'],
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Finished! Processed {handled} deliveries.'))
+        self._print_status()
+
+    def _print_status(self):
+        rows = WebhookDelivery.objects.values('status').annotate(n=Count('id')).order_by('status')
+        for row in rows:
+            self.stdout.write(f"{row['status']:<12} {row['n']}")
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from home.github import prune_response_cache
+from home.models import GitHubResponseCache
+
+
+class Command(BaseCommand):
+    help = 'Drop GitHub ETag cache entries that have gone unused (run it daily, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, help='Drop entries unused for this many days (default: GITHUB_RESPONSE_CACHE_TTL)')
+        parser.add_argument('--max-rows', type=int, help='Then keep only this many, most recently used first (default: GITHUB_RESPONSE_CACHE_MAX_ROWS)')
+
+    def handle(self, *args, **options):
+        max_age = timedelta(days=options['days']) if options['days'] is not None else None
+        deleted = prune_response_cache(max_age=max_age, max_rows=options['max_rows'])
+        remaining = GitHubResponseCache.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'🧹 Pruned {deleted} cached GitHub responses, {remaining} left.'))
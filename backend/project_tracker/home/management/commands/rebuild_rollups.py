@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from home.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the MonthlyRollup table from every TimesheetTask'
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} monthly rollup rows.'))
@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from home.models import Project
+from home.repricing import DEFAULT_CHUNK_SIZE, run_pending
+
+
+class Command(BaseCommand):
+    help = "Apply a project's hourly rate to its existing timesheets, in chunks (safe to re-run after an interruption)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int, nargs='?', help='The ID of the project to reprice')
+        parser.add_argument('--pending', action='store_true', help='Apply the rate changes saved in the admin / API that have not been applied yet')
+        parser.add_argument('--rate', help="New hourly rate; also becomes the project's rate (default: the current rate)")
+        parser.add_argument('--from', dest='effective_from', help='Only reprice timesheets dated on or after YYYY-MM-DD')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Timesheets per transaction')
+
+    def handle(self, *args, **options):
+        chunk_size = max(options['chunk_size'], 1)
+
+        def progress(done, total):
+            self.stdout.write(f'  {done}/{total} timesheets repriced')
+
+        if options['pending']:
+            if options['rate'] is not None or options['effective_from']:
+                raise CommandError('--pending applies the recorded rates; it takes no --rate or --from')
+            self.stdout.write(self.style.WARNING('Applying pending rate changes...'))
+            count = run_pending(options['project_id'], chunk_size=chunk_size, progress=progress)
+            self.stdout.write(self.style.SUCCESS(f'✅ Repriced {count} timesheets.'))
+            return
+
+        if options['project_id'] is None:
+            raise CommandError('Give a project ID, or --pending')
+        try:
+            project = Project.objects.get(pk=options['project_id'])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project with ID {options['project_id']} does not exist")
+
+        effective_from = None
+        if options['effective_from']:
+            try:
+                effective_from = date.fromisoformat(options['effective_from'])
+            except ValueError:
+                raise CommandError('--from must be a date in YYYY-MM-DD format')
+
+        rate = project.hourly_rate
+        if options['rate'] is not None:
+            try:
+                rate = Decimal(options['rate'])
+            except InvalidOperation:
+                raise CommandError('--rate must be a number')
+
+        # Recorded first, so an interrupted run is finished by `reprice_project --pending`
+        project.hourly_rate = rate
+        project.reprice_rate, project.reprice_from = rate, effective_from
+        project.save(update_fields=['hourly_rate', 'reprice_rate', 'reprice_from'], reprice=False)
+
+        scope = f'from {effective_from.isoformat()}' if effective_from else 'all history'
+        self.stdout.write(self.style.WARNING(f'Repricing "{project.name}" at ₹{rate}/hr ({scope})...'))
+        count = run_pending(project.pk, chunk_size=chunk_size, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'✅ Repriced {count} timesheets.'))
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.3 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+def blank_ids_to_null(apps, schema_editor):
+    """Empty ids become NULL, and repeat deliveries keep only the first row's id, so the unique index can be built."""
+    WebhookDelivery = apps.get_model('home', 'WebhookDelivery')
+    WebhookDelivery.objects.filter(delivery_id='').update(delivery_id=None)
+
+    seen = set()
+    for pk, delivery_id in WebhookDelivery.objects.exclude(delivery_id=None).order_by('id').values_list('id', 'delivery_id'):
+        if delivery_id in seen:
+            WebhookDelivery.objects.filter(pk=pk).update(delivery_id=None)
+        seen.add(delivery_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_webhookdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='duration_ms',
+            field=models.PositiveIntegerField(blank=True, help_text='Handler run time of the last attempt', null=True),
+        ),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='delivery_id',
+            field=models.CharField(blank=True, help_text='X-GitHub-Delivery header (NULL when GitHub did not send one)', max_length=64, null=True),
+        ),
+        migrations.RunPython(blank_ids_to_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='webhookdelivery',
+            name='delivery_id',
+            field=models.CharField(blank=True, help_text='X-GitHub-Delivery header (NULL when GitHub did not send one)', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.3 on 2026-10-18 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0019_webhookdelivery_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubResponseCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=200)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('body', models.JSONField()),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'GitHub Response Cache',
+                'verbose_name_plural': 'GitHub Response Cache',
+            },
+        ),
+    ]
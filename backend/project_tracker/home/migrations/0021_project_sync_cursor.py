@@ -0,0 +1,23 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0020_githubresponsecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='github_synced_at',
+            field=models.DateTimeField(blank=True, help_text='Commit date of that SHA; the next sync asks GitHub for commits since then', null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='github_synced_sha',
+            field=models.CharField(blank=True, help_text='Newest commit SHA already synced', max_length=40),
+        ),
+    ]
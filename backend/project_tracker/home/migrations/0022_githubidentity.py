@@ -0,0 +1,27 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0021_project_sync_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GitHubIdentity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('login', models.CharField(max_length=100, unique=True)),
+                ('name', models.CharField(blank=True, help_text='Profile name, or the login when the profile has none', max_length=255)),
+                ('found', models.BooleanField(default=True, help_text='False when the lookup failed; retried after GITHUB_IDENTITY_NEGATIVE_TTL')),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'GitHub Identity',
+                'verbose_name_plural': 'GitHub Identities',
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Lower, Trim, TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    """Same aggregation as home.rollups, against the historical models."""
+    TimesheetTask = apps.get_model('home', 'TimesheetTask')
+    MonthlyRollup = apps.get_model('home', 'MonthlyRollup')
+
+    merge = Q(desc_lower__startswith='merge ') | Q(desc_lower__startswith='merge pull request') | Q(desc_lower__contains='merge branch')
+    rows = (
+        TimesheetTask.objects.annotate(desc_lower=Lower(Trim('description')), month=TruncMonth('timesheet__date'))
+        .values('timesheet__project_id', 'month', 'timesheet__employee_name')
+        .annotate(
+            hours=Sum('hours', filter=~merge),
+            amount=Sum('amount', filter=~merge),
+            task_count=Count('id', filter=~merge),
+            merge_excluded=Count('id', filter=merge),
+            first_date=Min('timesheet__date', filter=~merge),
+        )
+        .order_by()
+    )
+    MonthlyRollup.objects.bulk_create([
+        MonthlyRollup(
+            project_id=row['timesheet__project_id'],
+            month=row['month'].replace(day=1),
+            employee_name=row['timesheet__employee_name'],
+            hours=row['hours'] or 0,
+            amount=row['amount'] or 0,
+            task_count=row['task_count'],
+            merge_excluded=row['merge_excluded'],
+            first_date=row['first_date'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0022_githubidentity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('employee_name', models.CharField(max_length=100)),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('task_count', models.PositiveIntegerField(default=0, help_text='Billable (non-merge) tasks')),
+                ('merge_excluded', models.PositiveIntegerField(default=0, help_text='Merge-commit tasks left out of the totals')),
+                ('first_date', models.DateField(blank=True, help_text='Earliest billable task date in the month', null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='home.project')),
+            ],
+            options={
+                'ordering': ['-month', 'employee_name'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'month', 'employee_name'), name='home_rollup_unique_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:30
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.db.models.functions import Lower, Trim
+
+
+def flag_merges(apps, schema_editor):
+    """One UPDATE with the models.is_merge_message rule in SQL; `backfill_merge_flags` re-checks in Python."""
+    TimesheetTask = apps.get_model('home', 'TimesheetTask')
+    TimesheetTask.objects.annotate(desc_lower=Lower(Trim('description'))).filter(
+        Q(desc_lower__startswith='merge ') | Q(desc_lower__startswith='merge pull request') | Q(desc_lower__contains='merge branch')
+    ).update(is_merge=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0023_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timesheettask',
+            name='is_merge',
+            field=models.BooleanField(default=False, help_text='Merge commit; left out of reports and rollups'),
+        ),
+        migrations.RunPython(flag_merges, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='timesheettask',
+            index=models.Index(condition=models.Q(('is_merge', False)), fields=['timesheet'], name='home_task_billable_idx'),
+        ),
+    ]
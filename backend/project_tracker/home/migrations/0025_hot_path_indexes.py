@@ -0,0 +1,66 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_commit_timesheets(apps, schema_editor):
+    """
+    Older webhook code made one GITHUB_COMMIT timesheet per commit. Fold each
+    (project, employee, date) group into its oldest timesheet so the unique
+    constraint can be built; task rows are moved, never dropped.
+    """
+    Timesheet = apps.get_model('home', 'Timesheet')
+    TimesheetTask = apps.get_model('home', 'TimesheetTask')
+
+    groups = (
+        Timesheet.objects.filter(source='GITHUB_COMMIT')
+        .values('project_id', 'employee_name', 'date')
+        .annotate(n=Count('id'), keep=Min('id'))
+        .filter(n__gt=1)
+        .order_by()
+    )
+    for group in groups:
+        duplicates = list(
+            Timesheet.objects.filter(
+                source='GITHUB_COMMIT', project_id=group['project_id'],
+                employee_name=group['employee_name'], date=group['date'],
+            ).exclude(pk=group['keep']).values_list('pk', flat=True)
+        )
+        TimesheetTask.objects.filter(timesheet_id__in=duplicates).update(timesheet_id=group['keep'])
+        Timesheet.objects.filter(pk__in=duplicates).delete()
+
+        totals = TimesheetTask.objects.filter(timesheet_id=group['keep']).aggregate(h=Sum('hours'), a=Sum('amount'))
+        Timesheet.objects.filter(pk=group['keep']).update(total_hours=totals['h'] or 0, total_amount=totals['a'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0024_timesheettask_is_merge'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(django.db.models.functions.text.Lower('github_repo'), name='home_project_repo_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status'], name='home_task_proj_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timesheet',
+            index=models.Index(fields=['project', 'date'], name='home_timesheet_proj_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timesheettask',
+            index=models.Index(fields=['github_sha'], name='home_task_sha_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_commit_timesheets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='timesheet',
+            constraint=models.UniqueConstraint(condition=models.Q(('source', 'GITHUB_COMMIT')), fields=('project', 'employee_name', 'date', 'source'), name='home_timesheet_commit_key'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:31
+
+import base64
+import binascii
+import hashlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+# Frozen copies of home.attachments as of this migration, so later changes there can't alter it
+
+
+def decode_data_url(data):
+    """ "data:<type>;base64,<payload>" -> (bytes, content type). Raises ValueError."""
+    header, sep, payload = data.partition(',')
+    if not sep or not header.startswith('data:') or not header.endswith(';base64'):
+        raise ValueError('not a base64 data URL')
+    try:
+        return base64.b64decode(payload, validate=True), header[5:-7]
+    except binascii.Error as e:
+        raise ValueError(str(e))
+
+
+def store_bytes(content):
+    """Store `content` once under task-attachments/<sha256[:2]>/<sha256>. Returns (name, sha256, size)."""
+    sha256 = hashlib.sha256(content).hexdigest()
+    name = f'task-attachments/{sha256[:2]}/{sha256}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(content))
+    return name, sha256, len(content)
+
+
+def extract_attachments(apps, schema_editor):
+    """Move every base64 entry in Task.attachments into TaskAttachment rows and content-addressed files."""
+    Task = apps.get_model('home', 'Task')
+    TaskAttachment = apps.get_model('home', 'TaskAttachment')
+
+    tasks = Task.objects.exclude(attachments=[]).only('id', 'attachments').order_by('id')
+    for task in tasks.iterator(chunk_size=20):
+        rows = []
+        for entry in task.attachments or []:
+            if not isinstance(entry, dict):
+                continue
+            row = TaskAttachment(
+                task_id=task.pk,
+                filename=(entry.get('filename') or 'attachment')[:255],
+                size=entry.get('sizeBytes') or 0,
+                uploaded_by=(entry.get('uploadedBy') or '')[:150],
+            )
+            uploaded_at = parse_datetime(entry.get('uploadedAt') or '')
+            if uploaded_at:
+                row.uploaded_at = uploaded_at
+            try:
+                content, content_type = decode_data_url(entry.get('data') or '')
+            except ValueError:
+                pass  # metadata only (the detail page never uploaded content); keep the entry without a file
+            else:
+                row.file, row.sha256, row.size = store_bytes(content)
+                row.content_type = content_type[:100]
+            rows.append(row)
+        TaskAttachment.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0025_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(blank=True, help_text='Blank for legacy entries that never had content', max_length=255, upload_to='')),
+                ('filename', models.CharField(max_length=255)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('uploaded_by', models.CharField(blank=True, max_length=150)),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='files', to='home.task')),
+            ],
+            options={
+                'ordering': ['uploaded_at', 'id'],
+            },
+        ),
+        migrations.RunPython(extract_attachments, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='task',
+            name='attachments',
+        ),
+    ]
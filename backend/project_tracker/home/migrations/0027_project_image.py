@@ -0,0 +1,64 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:33
+
+import base64
+import binascii
+import mimetypes
+import os
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+DATA_LINE = re.compile(r'^Project Image Data:[ \t]*(.*?)[ \t]*(?:\n|$)', re.MULTILINE)
+NAME_LINE = re.compile(r'^Project Image:[ \t]*(.*?)[ \t]*(?:\n|$)', re.MULTILINE)
+
+
+def decode_data_url(data):
+    """Frozen copy of home.attachments.decode_data_url: "data:<type>;base64,<payload>" -> (bytes, content type)."""
+    header, sep, payload = data.partition(',')
+    if not sep or not header.startswith('data:') or not header.endswith(';base64'):
+        raise ValueError('not a base64 data URL')
+    try:
+        return base64.b64decode(payload, validate=True), header[5:-7]
+    except binascii.Error as e:
+        raise ValueError(str(e))
+
+
+def extract_images(apps, schema_editor):
+    """Move the base64 image the frontend embedded in Project.remarks (with its name line) into Project.image."""
+    Project = apps.get_model('home', 'Project')
+    projects = Project.objects.filter(remarks__contains='Project Image Data:').only('id', 'remarks').order_by('id')
+    for project in projects.iterator(chunk_size=20):
+        match = DATA_LINE.search(project.remarks)
+        if not match:
+            continue
+        name_match = NAME_LINE.search(project.remarks)
+        remarks = DATA_LINE.sub('', project.remarks, count=1)
+        changes = {'remarks': NAME_LINE.sub('', remarks, count=1).strip()}
+        try:
+            content, content_type = decode_data_url(match.group(1))
+        except ValueError:
+            pass  # empty or not a data URL: just drop the lines
+        else:
+            name = os.path.basename(name_match.group(1)) if name_match else ''
+            if not name or name == 'None':
+                name = f'project-{project.pk}{mimetypes.guess_extension(content_type) or ".img"}'
+            changes['image'] = default_storage.save(f'project-images/{name}', ContentFile(content))
+        Project.objects.filter(pk=project.pk).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0026_task_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Served with thumbnails by /api/home/<id>/image/', max_length=255, upload_to='project-images/'),
+        ),
+        migrations.RunPython(extract_images, migrations.RunPython.noop),
+    ]
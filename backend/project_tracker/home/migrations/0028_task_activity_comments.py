@@ -0,0 +1,79 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def _when(entry, fallback):
+    value = entry.get('timestamp')
+    return (parse_datetime(value) if isinstance(value, str) else None) or fallback
+
+
+def copy_log_entries(apps, schema_editor):
+    """Task.comments / Task.activity_log JSON arrays -> TaskComment / TaskActivity rows, in array order."""
+    Task = apps.get_model('home', 'Task')
+    TaskActivity = apps.get_model('home', 'TaskActivity')
+    TaskComment = apps.get_model('home', 'TaskComment')
+
+    tasks = Task.objects.only('id', 'created_at', 'comments', 'activity_log').order_by('id')
+    for task in tasks.iterator(chunk_size=200):
+        TaskActivity.objects.bulk_create([
+            TaskActivity(task_id=task.pk, action=str(entry.get('action', '')), by=str(entry.get('by') or '')[:150],
+                         created_at=_when(entry, task.created_at))
+            for entry in task.activity_log or [] if isinstance(entry, dict)
+        ])
+        TaskComment.objects.bulk_create([
+            TaskComment(task_id=task.pk, author=str(entry.get('author') or '')[:150], content=str(entry.get('content', '')),
+                        created_at=_when(entry, task.created_at))
+            for entry in task.comments or [] if isinstance(entry, dict)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0027_project_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.TextField()),
+                ('by', models.CharField(blank=True, max_length=150)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_entries', to='home.task')),
+            ],
+            options={
+                'verbose_name_plural': 'Task activity',
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['task', 'id'], name='home_activity_task_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskComment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.CharField(blank=True, max_length=150)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_entries', to='home.task')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['task', 'id'], name='home_comment_task_idx')],
+            },
+        ),
+        migrations.RunPython(copy_log_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='task',
+            name='activity_log',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='comments',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0028_task_activity_comments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
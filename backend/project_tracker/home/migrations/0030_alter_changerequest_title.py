@@ -0,0 +1,18 @@
+# Generated by Django 6.0.3 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0029_task_position'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changerequest',
+            name='title',
+            field=models.CharField(blank=True, help_text='Optional summary title', max_length=250),
+        ),
+    ]
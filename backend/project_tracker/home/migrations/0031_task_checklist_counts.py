@@ -0,0 +1,40 @@
+# Generated by Django 6.0.3 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+def count_checklists(apps, schema_editor):
+    """Fill the new counts for existing tasks (Task.save keeps them current from here on)."""
+    Task = apps.get_model('home', 'Task')
+
+    batch = []
+    for task in Task.objects.exclude(checklist=[]).only('id', 'checklist').order_by('id').iterator(chunk_size=500):
+        items = task.checklist if isinstance(task.checklist, list) else []
+        task.checklist_total = len(items)
+        task.checklist_done = sum(1 for item in items if isinstance(item, dict) and item.get('checked'))
+        batch.append(task)
+        if len(batch) >= 500:
+            Task.objects.bulk_update(batch, ['checklist_total', 'checklist_done'])
+            batch = []
+    Task.objects.bulk_update(batch, ['checklist_total', 'checklist_done'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0030_alter_changerequest_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='checklist_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='checklist_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_checklists, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.3 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0031_task_checklist_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='reprice_from',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='reprice_rate',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection, models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from datetime import date as dt
 
 
@@ -31,6 +37,7 @@ class Project(models.Model):
     version     = models.CharField(max_length=50, blank=True)
     url         = models.URLField(blank=True)
     remarks     = models.TextField(blank=True)
+    image       = models.ImageField(upload_to="project-images/", max_length=255, blank=True, help_text="Served with thumbnails by /api/home/<id>/image/")
     hourly_rate = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
     test_deploy_command = models.CharField(
@@ -76,6 +83,14 @@ class Project(models.Model):
     churn_large  = models.PositiveIntegerField(default=600, help_text="Lines ≤ this → 3.0 hrs  (large commit)")
     # Anything above churn_large → 6.0 hrs (huge commit)
 
+    # Incremental sync cursor: newest commit already synced from the commits API
+    github_synced_sha = models.CharField(max_length=40, blank=True, help_text="Newest commit SHA already synced")
+    github_synced_at  = models.DateTimeField(null=True, blank=True, help_text="Commit date of that SHA; the next sync asks GitHub for commits since then")
+
+    # Rate change saved but not yet applied to existing timesheets (see home/repricing.py)
+    reprice_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    reprice_from = models.DateField(null=True, editable=False)
+
     def churn_to_hours(self, churn: int) -> float:
         """Convert lines-changed count to estimated hours: 20 seconds per line (capped at 8.0 hours)."""
         hours = (churn * 20) / 3600
@@ -84,33 +99,40 @@ class Project(models.Model):
     def __str__(self):
         return self.name
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        old_rate = None
-        if not is_new:
-            try:
-                old_rate = Project.objects.get(pk=self.pk).hourly_rate
-            except Project.DoesNotExist:
-                pass
-                
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored rate so save() can spot a change without re-reading the row
+        instance._loaded_hourly_rate = instance.__dict__.get("hourly_rate")
+        return instance
+
+    def save(self, *args, reprice=True, **kwargs):
+        """
+        A changed hourly_rate is only recorded here, as a pending reprice
+        of the existing timesheets; it is applied in chunks after the
+        caller's transaction commits (see home/repricing.py). Pass
+        reprice=False to change the rate for new entries only.
+        """
+        old_rate = getattr(self, "_loaded_hourly_rate", None)
+        repricing = reprice and old_rate is not None and old_rate != self.hourly_rate
+        if repricing:
+            self.reprice_rate, self.reprice_from = self.hourly_rate, None
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "reprice_rate", "reprice_from"}
         super().save(*args, **kwargs)
-        
-        if old_rate is not None and old_rate != self.hourly_rate:
-            # Hourly rate changed! Update all associated timesheets and tasks in bulk
-            self.timesheets.all().update(hourly_rate=self.hourly_rate)
-            
-            from django.db.models import F
-            TimesheetTask.objects.filter(timesheet__project=self).update(
-                amount=F('hours') * self.hourly_rate
-            )
-            
-            # Recalculate timesheet totals in bulk
-            self.timesheets.all().update(
-                total_amount=F('total_hours') * self.hourly_rate
-            )
+        self._loaded_hourly_rate = self.hourly_rate
+
+        if repricing:
+            from .repricing import schedule_reprice
+            schedule_reprice(self.pk)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Webhooks look projects up by repo, case-insensitively
+            models.Index(Lower("github_repo"), name="home_project_repo_lower_idx"),
+        ]
 
 
 class Timesheet(models.Model):
@@ -140,6 +162,23 @@ class Timesheet(models.Model):
 
     class Meta:
         ordering = ["-date", "-submitted_at"]
+        indexes = [
+            models.Index(fields=["project", "date"], name="home_timesheet_proj_date_idx"),
+        ]
+        constraints = [
+            # One commit timesheet per employee and day, so concurrent ingests can't duplicate it
+            models.UniqueConstraint(
+                fields=["project", "employee_name", "date", "source"],
+                condition=models.Q(source="GITHUB_COMMIT"),
+                name="home_timesheet_commit_key",
+            ),
+        ]
+
+
+def is_merge_message(text: str) -> bool:
+    """Merge commits are not billed; this is the one place that decides what counts as one."""
+    text = text.lower().strip()
+    return text.startswith("merge ") or text.startswith("merge pull request") or "merge branch" in text
 
 
 class TimesheetTask(models.Model):
@@ -148,33 +187,157 @@ class TimesheetTask(models.Model):
     hours       = models.DecimalField(max_digits=6, decimal_places=2)
     amount      = models.DecimalField(max_digits=10, decimal_places=2)
     github_sha  = models.CharField(max_length=40, blank=True, help_text="Commit SHA")
+    is_merge    = models.BooleanField(default=False, help_text="Merge commit; left out of reports and rollups")
 
     def __str__(self):
         return self.description[:60]
 
+    class Meta:
+        indexes = [
+            # Reports and rollups only ever read the billable tasks of a timesheet
+            models.Index(fields=["timesheet"], condition=models.Q(is_merge=False), name="home_task_billable_idx"),
+            models.Index(fields=["github_sha"], name="home_task_sha_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What this row currently adds to its timesheet's totals and monthly rollup,
+        # so save() and delete() (and the rollup signals) can apply the difference
+        loaded = instance.__dict__
+        if all(name in loaded for name in ("timesheet_id", "hours", "amount", "is_merge")):
+            instance._loaded_totals = (loaded["timesheet_id"], loaded["hours"], loaded["amount"], loaded["is_merge"])
+        return instance
+
     def save(self, *args, **kwargs):
+        """
+        Keeps the parent timesheet's totals current with an F() delta
+        (one UPDATE, whatever the number of tasks); inside deferred_totals()
+        the timesheet is only marked for one recompute at the end.
+        """
+        self.is_merge = is_merge_message(self.description)
         # Calculate amount based on hours and timesheet's hourly rate
         rate = self.timesheet.hourly_rate if self.timesheet else 0
         self.amount = round(float(self.hours) * float(rate), 2)
+        adding = self._state.adding
+        old = getattr(self, "_loaded_totals", None)
         super().save(*args, **kwargs)
-        
-        # Recalculate totals on parent timesheet
-        if self.timesheet:
-            from django.db.models import Sum
-            totals = self.timesheet.tasks.aggregate(total_h=Sum('hours'), total_a=Sum('amount'))
-            self.timesheet.total_hours = totals['total_h'] or 0
-            self.timesheet.total_amount = totals['total_a'] or 0
-            self.timesheet.save(update_fields=['total_hours', 'total_amount'])
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"timesheet", "timesheet_id", "hours", "amount"} & set(update_fields):
+            return
+        new = (self.timesheet_id, _decimal(self.hours), _decimal(self.amount), self.is_merge)
+        self._loaded_totals = new
+
+        if adding:
+            _apply_totals_delta(self, *new[:3])
+        elif old is None:
+            # Loaded without its old values (e.g. .only()); nothing to take a delta from
+            _recompute_totals([self.timesheet_id])
+        elif old[0] != new[0]:
+            _apply_totals_delta(self, old[0], -old[1], -old[2])
+            _apply_totals_delta(self, *new[:3])
+        else:
+            _apply_totals_delta(self, new[0], new[1] - old[1], new[2] - old[2])
 
     def delete(self, *args, **kwargs):
-        timesheet = self.timesheet
-        super().delete(*args, **kwargs)
-        if timesheet:
-            from django.db.models import Sum
-            totals = timesheet.tasks.aggregate(total_h=Sum('hours'), total_a=Sum('amount'))
-            timesheet.total_hours = totals['total_h'] or 0
-            timesheet.total_amount = totals['total_a'] or 0
-            timesheet.save(update_fields=['total_hours', 'total_amount'])
+        old = getattr(self, "_loaded_totals", None)
+        result = super().delete(*args, **kwargs)
+        if old is not None:
+            _apply_totals_delta(self, old[0], -old[1], -old[2])
+        elif self.timesheet_id:
+            _recompute_totals([self.timesheet_id])
+        return result
+
+
+# ── Timesheet totals ─────────────────────────────────────────────────────────
+# Timesheet.total_hours / total_amount are kept in step with its tasks:
+# single task writes apply a delta, bulk paths (ingest, repricing) call
+# ingest.recompute_timesheet_totals, and deferred_totals() batches a run
+# of task writes (e.g. an admin inline formset) into one recompute.
+
+_deferred = threading.local()
+
+
+def _decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def defer_timesheet(timesheet_id) -> bool:
+    """Inside deferred_totals(), mark the timesheet for the final recompute and return True."""
+    pending = getattr(_deferred, "timesheet_ids", None)
+    if pending is None:
+        return False
+    pending.add(timesheet_id)
+    return True
+
+
+def _recompute_totals(timesheet_ids) -> None:
+    from .ingest import recompute_timesheet_totals
+    recompute_timesheet_totals(timesheet_ids)
+
+
+def _apply_totals_delta(task, timesheet_id, hours, amount) -> None:
+    if not timesheet_id or defer_timesheet(timesheet_id):
+        return
+    if hours or amount:
+        Timesheet.objects.filter(pk=timesheet_id).update(
+            total_hours=models.F("total_hours") + hours,
+            total_amount=models.F("total_amount") + amount,
+        )
+    # Keep an already-loaded parent in step with the row
+    if TimesheetTask.timesheet.is_cached(task) and task.timesheet.pk == timesheet_id:
+        task.timesheet.total_hours = _decimal(task.timesheet.total_hours or 0) + hours
+        task.timesheet.total_amount = _decimal(task.timesheet.total_amount or 0) + amount
+
+
+@contextmanager
+def deferred_totals():
+    """
+    Batch mode for TimesheetTask writes: inside the block, saves and
+    deletes only mark their timesheet; on the way out each marked
+    timesheet's totals (and monthly rollups) are recomputed once.
+    Nested blocks fold into the outermost one.
+    """
+    if getattr(_deferred, "timesheet_ids", None) is not None:
+        yield
+        return
+
+    timesheet_ids = _deferred.timesheet_ids = set()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        _deferred.timesheet_ids = None
+        # A failure inside a transaction takes the task writes with it; outside one they stuck
+        if timesheet_ids and not (failed and connection.in_atomic_block):
+            from .rollups import refresh_rollups_for_timesheets
+            _recompute_totals(timesheet_ids)
+            refresh_rollups_for_timesheets(timesheet_ids)
+
+
+class MonthlyRollup(models.Model):
+    """Billable totals per (project, month, employee); maintained by home/rollups.py."""
+    project        = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="monthly_rollups")
+    month          = models.DateField(help_text="First day of the month")
+    employee_name  = models.CharField(max_length=100)
+    hours          = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    amount         = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    task_count     = models.PositiveIntegerField(default=0, help_text="Billable (non-merge) tasks")
+    merge_excluded = models.PositiveIntegerField(default=0, help_text="Merge-commit tasks left out of the totals")
+    first_date     = models.DateField(null=True, blank=True, help_text="Earliest billable task date in the month")
+
+    def __str__(self):
+        return f"{self.project} — {self.month:%b %Y} — {self.employee_name}"
+
+    class Meta:
+        ordering = ["-month", "employee_name"]
+        constraints = [
+            models.UniqueConstraint(fields=["project", "month", "employee_name"], name="home_rollup_unique_key"),
+        ]
 
 
 class BankAccount(models.Model):
@@ -234,18 +397,83 @@ class Task(models.Model):
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="To Do")
     tags = models.JSONField(default=list, blank=True)
     actual_hours = models.DecimalField(max_digits=6, decimal_places=2, default=0)
-    comments = models.JSONField(default=list, blank=True)
-    activity_log = models.JSONField(default=list, blank=True)
-    attachments = models.JSONField(default=list, blank=True)
+    position = models.PositiveIntegerField(default=0)  # order within its kanban column, set by /api/tasks/bulk/
+    # Counts of `checklist` kept by save(), so the card list never loads the JSON itself
+    checklist_total = models.PositiveIntegerField(default=0, editable=False)
+    checklist_done = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        items = self.checklist if isinstance(self.checklist, list) else []
+        self.checklist_total = len(items)
+        self.checklist_done = sum(1 for item in items if isinstance(item, dict) and item.get("checked"))
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "checklist" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "checklist_total", "checklist_done"}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ["-created_at"]
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
+        indexes = [
+            models.Index(fields=["project", "status"], name="home_task_proj_status_idx"),
+        ]
+
+
+class TaskActivity(models.Model):
+    """One line of a task's activity log; appended by /api/tasks/<id>/activity/ and the status transition."""
+    task       = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="activity_entries")
+    action     = models.TextField()
+    by         = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.action[:60]
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        verbose_name_plural = "Task activity"
+        indexes = [
+            models.Index(fields=["task", "id"], name="home_activity_task_idx"),
+        ]
+
+
+class TaskComment(models.Model):
+    task       = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comment_entries")
+    author     = models.CharField(max_length=150, blank=True)
+    content    = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.content[:60]
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["task", "id"], name="home_comment_task_idx"),
+        ]
+
+
+class TaskAttachment(models.Model):
+    """A file on a task. Stored content-addressed (see home/attachments.py), so identical uploads share one file."""
+    task         = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="files")
+    file         = models.FileField(max_length=255, blank=True, help_text="Blank for legacy entries that never had content")
+    filename     = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size         = models.PositiveBigIntegerField(default=0)
+    sha256       = models.CharField(max_length=64, blank=True, db_index=True)
+    uploaded_by  = models.CharField(max_length=150, blank=True)
+    uploaded_at  = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.filename
+
+    class Meta:
+        ordering = ["uploaded_at", "id"]
 
 
 class ChangeRequest(models.Model):
@@ -303,4 +531,71 @@ class ChangeRequest(models.Model):
         verbose_name = "Change Request"
         verbose_name_plural = "Change Requests"
 
-
\ No newline at end of file
+
+
+class WebhookDelivery(models.Model):
+    """A raw GitHub webhook delivery waiting to be (or already) ingested."""
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("PROCESSING", "Processing"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    delivery_id     = models.CharField(
+        max_length=64, null=True, blank=True, unique=True,
+        help_text="X-GitHub-Delivery header (NULL when GitHub did not send one)",
+    )
+    event           = models.CharField(max_length=50)
+    body            = models.TextField(help_text="Raw request body exactly as GitHub sent it")
+    status          = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    attempts        = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text="Earliest time a worker may pick this up again")
+    last_error      = models.TextField(blank=True)
+    result          = models.CharField(max_length=255, blank=True)
+    received_at     = models.DateTimeField(auto_now_add=True)
+    started_at      = models.DateTimeField(null=True, blank=True)
+    finished_at     = models.DateTimeField(null=True, blank=True)
+    duration_ms     = models.PositiveIntegerField(null=True, blank=True, help_text="Handler run time of the last attempt")
+
+    def __str__(self):
+        return f"{self.event} {self.delivery_id or self.pk} — {self.status}"
+
+    class Meta:
+        ordering = ["-received_at"]
+        verbose_name = "Webhook Delivery"
+        verbose_name_plural = "Webhook Deliveries"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="home_delivery_queue_idx"),
+        ]
+
+
+class GitHubResponseCache(models.Model):
+    """Last body seen for a GitHub API URL, replayed when GitHub answers 304 Not Modified."""
+    url           = models.CharField(max_length=500, unique=True)
+    etag          = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    body          = models.JSONField()
+    fetched_at    = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+    class Meta:
+        verbose_name = "GitHub Response Cache"
+        verbose_name_plural = "GitHub Response Cache"
+
+
+class GitHubIdentity(models.Model):
+    """GitHub login -> display name, shared by every worker and command run."""
+    login      = models.CharField(max_length=100, unique=True)
+    name       = models.CharField(max_length=255, blank=True, help_text="Profile name, or the login when the profile has none")
+    found      = models.BooleanField(default=True, help_text="False when the lookup failed; retried after GITHUB_IDENTITY_NEGATIVE_TTL")
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.login} ({self.name or '?'})"
+
+    class Meta:
+        verbose_name = "GitHub Identity"
+        verbose_name_plural = "GitHub Identities"
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Hourly-Rate Repricing
+=====================
+Applies a project's hourly rate to its existing timesheets a chunk at a
+time: each chunk of timesheets (by id) gets its rate, task amounts,
+totals and monthly rollups updated in its own short transaction, so a
+long history never holds the write lock for more than one chunk.
+
+Timesheets already at the target rate are skipped, which makes a run
+resumable: after an interruption, running it again picks up where it
+stopped. `effective_from` limits it to timesheets on or after a date.
+
+A rate change is never applied inside the write that makes it.
+Project.save (admin, API) and `manage.py reprice_project` record it on
+the project as reprice_rate / reprice_from, and run_pending() applies
+it afterwards:
+  * with REPRICE_INLINE_WORKER = True, in a background thread started
+    once the saving transaction has committed,
+  * otherwise (or after a crash) with `manage.py reprice_project --pending`.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .ingest import recompute_timesheet_totals
+from .models import Project, Timesheet, TimesheetTask
+from .rollups import refresh_rollups_for_timesheets
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+_project_locks = defaultdict(threading.Lock)
+
+
+def reprice_project(project_id, rate, *, effective_from=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None) -> int:
+    """
+    Reprice the project's timesheets (from `effective_from` on, if given)
+    at `rate`. `progress(done, total)` is called after every chunk.
+    Returns the number of timesheets repriced.
+    """
+    pending = Timesheet.objects.filter(project_id=project_id).exclude(hourly_rate=rate)
+    if effective_from:
+        pending = pending.filter(date__gte=effective_from)
+
+    total = pending.count()
+    done = 0
+    last_id = 0
+    while True:
+        ids = list(pending.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            Timesheet.objects.filter(pk__in=ids).update(hourly_rate=rate)
+            TimesheetTask.objects.filter(timesheet_id__in=ids).update(amount=F("hours") * rate)
+            recompute_timesheet_totals(ids)
+            refresh_rollups_for_timesheets(ids)
+        done += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done, total)
+    return done
+
+
+def run_pending(project_id=None, *, chunk_size=DEFAULT_CHUNK_SIZE, progress=None) -> int:
+    """
+    Apply the recorded reprice of one project (or of every project that has
+    one) and clear it. A rate saved while a run is going stays pending and
+    is applied straight after. Returns the number of timesheets repriced.
+    """
+    projects = Project.objects.filter(reprice_rate__isnull=False)
+    if project_id is not None:
+        projects = projects.filter(pk=project_id)
+
+    done = 0
+    for pk in list(projects.values_list("pk", flat=True)):
+        with _project_locks[pk]:
+            while True:
+                pending = (
+                    Project.objects.filter(pk=pk, reprice_rate__isnull=False)
+                    .values_list("reprice_rate", "reprice_from").first()
+                )
+                if pending is None:
+                    break
+                rate, effective_from = pending
+                done += reprice_project(pk, rate, effective_from=effective_from, chunk_size=chunk_size, progress=progress)
+                Project.objects.filter(pk=pk, reprice_rate=rate, reprice_from=effective_from).update(
+                    reprice_rate=None, reprice_from=None
+                )
+    return done
+
+
+def schedule_reprice(project_id) -> None:
+    """Run the project's pending reprice in the background once the current transaction commits."""
+    if getattr(settings, "REPRICE_INLINE_WORKER", True):
+        transaction.on_commit(lambda: _start_thread(project_id))
+
+
+def _start_thread(project_id) -> None:
+    def _run():
+        try:
+            run_pending(project_id)
+        except Exception:
+            # Still recorded on the project; `reprice_project --pending` picks it up
+            logger.exception("Repricing project %s failed", project_id)
+        finally:
+            connection.close()
+
+    threading.Thread(target=_run, daemon=True).start()
@@ -0,0 +1,299 @@
+"""
+Monthly Billing Rollups
+=======================
+One MonthlyRollup row per (project, month, employee) with the billable
+hours / amount / task count and the number of merge-commit tasks left
+out, so reports read a row per employee-month instead of every task.
+
+Rows are kept current key by key:
+
+  * a single TimesheetTask save / delete applies the difference between
+    the task's old and new values (TimesheetTask._loaded_totals) to its
+    row with F() expressions, so a write costs the same however many
+    tasks the month already has (signals below),
+  * ingest._write_groups and repricing.reprice_project, which write in
+    bulk, re-aggregate the employee-months they touched with
+    refresh_rollups_for_timesheets, as does models.deferred_totals() for
+    the task writes made inside it,
+  * a Timesheet edit that moves it to another project, date or employee
+    re-aggregates the old and new employee-month.
+
+`manage.py rebuild_rollups` recomputes everything from scratch.
+"""
+
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateField, F, Min, Q, Subquery, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import MonthlyRollup, Timesheet, TimesheetTask, _decimal, defer_timesheet
+
+KEY_FIELDS = {"project", "project_id", "date", "employee_name"}
+
+
+def _as_date(day) -> date:
+    if isinstance(day, str):
+        day = date.fromisoformat(day)  # webhook.py creates timesheets with "YYYY-MM-DD" strings
+    return day
+
+
+def month_start(day) -> date:
+    return _as_date(day).replace(day=1)
+
+
+def _next_month(month) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def rollup_key(project_id, day, employee_name) -> tuple:
+    return (project_id, month_start(day), employee_name)
+
+
+def _aggregate(tasks):
+    billable = Q(is_merge=False)
+    return (
+        tasks.annotate(month=TruncMonth("timesheet__date"))
+        .values("timesheet__project_id", "month", "timesheet__employee_name")
+        .annotate(
+            hours=Sum("hours", filter=billable),
+            amount=Sum("amount", filter=billable),
+            task_count=Count("id", filter=billable),
+            merge_excluded=Count("id", filter=Q(is_merge=True)),
+            first_date=Min("timesheet__date", filter=billable),
+        )
+        .order_by()
+    )
+
+
+def _rollup_from_row(row) -> MonthlyRollup:
+    return MonthlyRollup(
+        project_id=row["timesheet__project_id"],
+        month=month_start(row["month"]),
+        employee_name=row["timesheet__employee_name"],
+        hours=row["hours"] or 0,
+        amount=row["amount"] or 0,
+        task_count=row["task_count"],
+        merge_excluded=row["merge_excluded"],
+        first_date=row["first_date"],
+    )
+
+
+def _upsert(rollups) -> None:
+    MonthlyRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=["project", "month", "employee_name"],
+        update_fields=["hours", "amount", "task_count", "merge_excluded", "first_date"],
+    )
+
+
+def refresh_rollups(keys) -> None:
+    """Recompute the (project_id, month, employee_name) rows in `keys` from their tasks."""
+    keys = {key for key in keys if key[0]}
+    if not keys:
+        return
+
+    tasks = TimesheetTask.objects.filter(
+        timesheet__project_id__in={key[0] for key in keys},
+        timesheet__employee_name__in={key[2] for key in keys},
+        timesheet__date__gte=min(key[1] for key in keys),
+        timesheet__date__lt=_next_month(max(key[1] for key in keys)),
+    )
+    rollups = [_rollup_from_row(row) for row in _aggregate(tasks)]
+    rollups = [r for r in rollups if (r.project_id, r.month, r.employee_name) in keys]
+
+    # Keys with no tasks left lose their row
+    gone = keys - {(r.project_id, r.month, r.employee_name) for r in rollups}
+    # Joins the caller's transaction (ingest, repricing) instead of adding a savepoint
+    with transaction.atomic(savepoint=False):
+        _upsert(rollups)
+        if gone:
+            stale = Q()
+            for project_id, month, employee_name in gone:
+                stale |= Q(project_id=project_id, month=month, employee_name=employee_name)
+            MonthlyRollup.objects.filter(stale).delete()
+
+
+def refresh_rollups_for_timesheets(timesheet_ids) -> None:
+    refresh_rollups(
+        rollup_key(*values)
+        for values in Timesheet.objects.filter(pk__in=list(timesheet_ids))
+        .values_list("project_id", "date", "employee_name")
+    )
+
+
+def rebuild_rollups() -> int:
+    """Recompute the whole table. Returns the number of rows written."""
+    rollups = [_rollup_from_row(row) for row in _aggregate(TimesheetTask.objects.all())]
+    with transaction.atomic():
+        MonthlyRollup.objects.all().delete()
+        MonthlyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+# ─────────────────────────────────────────────────────────────
+# Single-task deltas
+# ─────────────────────────────────────────────────────────────
+
+def _first_billable_date(key):
+    project_id, month, employee_name = key
+    return (
+        TimesheetTask.objects.filter(
+            is_merge=False,
+            timesheet__project_id=project_id,
+            timesheet__employee_name=employee_name,
+            timesheet__date__gte=month,
+            timesheet__date__lt=_next_month(month),
+        )
+        .order_by("timesheet__date")
+        .values("timesheet__date")[:1]
+    )
+
+
+def _apply_delta(key, hours, amount, task_count, merge_excluded, added_days, removed_days) -> None:
+    """Add the given differences to one MonthlyRollup row in a single UPDATE (creating or dropping the row as needed)."""
+    added_days, removed_days = added_days - removed_days, removed_days - added_days
+    if added_days and removed_days:
+        refresh_rollups([key])  # a billable task moved between days of the same month
+        return
+
+    changes = {
+        field: F(field) + value
+        for field, value in (("hours", hours), ("amount", amount), ("task_count", task_count), ("merge_excluded", merge_excluded))
+        if value
+    }
+    added_day = next(iter(added_days), None)
+    if added_day:
+        changes["first_date"] = Case(
+            When(Q(first_date__isnull=True) | Q(first_date__gt=added_day), then=Value(added_day)),
+            default=F("first_date"), output_field=DateField(),
+        )
+    elif removed_days:
+        # Only the row whose earliest day lost a task has to look its new earliest day up
+        changes["first_date"] = Case(
+            When(first_date=next(iter(removed_days)), then=Subquery(_first_billable_date(key))),
+            default=F("first_date"), output_field=DateField(),
+        )
+    if not changes:
+        return
+
+    project_id, month, employee_name = key
+    row = MonthlyRollup.objects.filter(project_id=project_id, month=month, employee_name=employee_name)
+    if row.update(**changes):
+        if task_count < 0 or merge_excluded < 0:
+            row.filter(task_count=0, merge_excluded=0).delete()  # its last task is gone
+        return
+
+    if task_count < 0 or merge_excluded < 0 or not (task_count or merge_excluded):
+        refresh_rollups([key])  # no row for tasks that were already counted: out of step, rebuild it
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(
+                project_id=project_id, month=month, employee_name=employee_name,
+                hours=hours, amount=amount, task_count=task_count, merge_excluded=merge_excluded,
+                first_date=added_day,
+            )
+    except IntegrityError:
+        row.update(**changes)  # a concurrent write created the row first
+
+
+def _apply_task_delta(instance, old, new) -> None:
+    """
+    `old` / `new` are (timesheet_id, hours, amount, is_merge) of what the
+    task counted for before and after the write (None for nothing).
+    """
+    timesheet_ids = {totals[0] for totals in (old, new) if totals and totals[0]}
+    if [pk for pk in timesheet_ids if defer_timesheet(pk)]:
+        return  # refreshed when the deferred_totals() block ends
+
+    days = {}  # timesheet id -> (rollup key, date)
+    if TimesheetTask.timesheet.is_cached(instance) and instance.timesheet.pk in timesheet_ids:
+        timesheet = instance.timesheet
+        days[timesheet.pk] = (rollup_key(timesheet.project_id, timesheet.date, timesheet.employee_name), _as_date(timesheet.date))
+    others = timesheet_ids - days.keys()
+    if others:
+        for pk, project_id, day, employee_name in Timesheet.objects.filter(pk__in=others).values_list(
+            "pk", "project_id", "date", "employee_name"
+        ):
+            days[pk] = (rollup_key(project_id, day, employee_name), day)
+
+    deltas = {}
+    for sign, totals in ((-1, old), (1, new)):
+        if not totals or totals[0] not in days:
+            continue
+        timesheet_id, hours, amount, is_merge = totals
+        key, day = days[timesheet_id]
+        delta = deltas.setdefault(key, {
+            "hours": 0, "amount": 0, "task_count": 0, "merge_excluded": 0, "added_days": set(), "removed_days": set(),
+        })
+        if is_merge:
+            delta["merge_excluded"] += sign
+        else:
+            delta["hours"] += sign * _decimal(hours)
+            delta["amount"] += sign * _decimal(amount)
+            delta["task_count"] += sign
+            delta["added_days" if sign > 0 else "removed_days"].add(day)
+    for key, delta in deltas.items():
+        if key[0]:
+            _apply_delta(key, **delta)
+
+
+# ─────────────────────────────────────────────────────────────
+# Signals (connected when the app is ready, see HomeConfig.ready)
+# ─────────────────────────────────────────────────────────────
+
+BILLING_FIELDS = {"timesheet", "timesheet_id", "description", "hours", "amount", "is_merge"}
+
+
+def _task_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not BILLING_FIELDS & set(update_fields):
+        return
+    # post_save runs inside TimesheetTask.save(), before _loaded_totals is moved on to the new values
+    old = None if created else getattr(instance, "_loaded_totals", None)
+    if not created and old is None:
+        # Loaded without its old values (e.g. .only()); nothing to take a delta from
+        if not defer_timesheet(instance.timesheet_id):
+            refresh_rollups_for_timesheets([instance.timesheet_id])
+        return
+    new = (instance.timesheet_id, instance.hours, instance.amount, instance.is_merge)
+    _apply_task_delta(instance, old, new)
+
+
+def _task_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Timesheet):
+        return  # cascade from a Timesheet delete; _timesheet_deleted covers it
+    old = getattr(instance, "_loaded_totals", None)
+    if old is None:
+        if instance.timesheet_id and not defer_timesheet(instance.timesheet_id):
+            refresh_rollups_for_timesheets([instance.timesheet_id])
+        return
+    _apply_task_delta(instance, old, None)
+
+
+def _timesheet_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_old_key = None
+    if instance.pk and (update_fields is None or KEY_FIELDS & set(update_fields)):
+        old = Timesheet.objects.filter(pk=instance.pk).values_list("project_id", "date", "employee_name").first()
+        if old:
+            instance._rollup_old_key = rollup_key(*old)
+
+
+def _timesheet_saved(sender, instance, created, **kwargs):
+    old_key = getattr(instance, "_rollup_old_key", None)
+    new_key = rollup_key(instance.project_id, instance.date, instance.employee_name)
+    if old_key and old_key != new_key:
+        refresh_rollups([old_key, new_key])
+
+
+def _timesheet_deleted(sender, instance, **kwargs):
+    refresh_rollups([rollup_key(instance.project_id, instance.date, instance.employee_name)])
+
+
+post_save.connect(_task_saved, sender=TimesheetTask, dispatch_uid="rollup_task_saved")
+post_delete.connect(_task_deleted, sender=TimesheetTask, dispatch_uid="rollup_task_deleted")
+pre_save.connect(_timesheet_pre_save, sender=Timesheet, dispatch_uid="rollup_timesheet_pre_save")
+post_save.connect(_timesheet_saved, sender=Timesheet, dispatch_uid="rollup_timesheet_saved")
+post_delete.connect(_timesheet_deleted, sender=Timesheet, dispatch_uid="rollup_timesheet_deleted")
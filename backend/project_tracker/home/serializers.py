@@ -1,12 +1,33 @@
+import os
+
 from rest_framework import serializers
-from .models import Project, Timesheet, TimesheetTask, Task, AdminLogin, ChangeRequest
+from django.urls import reverse
+from .activity import recent
+from .images import image_version
+from .models import (
+    Project, Timesheet, TimesheetTask, Task, TaskAttachment, TaskActivity, TaskComment,
+    AdminLogin, ChangeRequest, deferred_totals,
+)
 
 
 class ProjectSerializer(serializers.ModelSerializer):
+    # The image itself is uploaded to and served from /api/home/<id>/image/
+    image_url  = serializers.SerializerMethodField()
+    image_name = serializers.SerializerMethodField()
 
     class Meta:
         model  = Project
-        fields = ['id', 'name', 'mode', 'version', 'url', 'remarks', 'hourly_rate', 'github_repo', 'test_deploy_command', 'deploy_command']
+        fields = ['id', 'name', 'mode', 'version', 'url', 'remarks', 'hourly_rate', 'github_repo', 'test_deploy_command', 'deploy_command', 'image_url', 'image_name']
+
+    def get_image_url(self, obj):
+        if not obj.image:
+            return None
+        url = f"{reverse('project-image', args=[obj.pk])}?v={image_version(obj.image.name)}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_image_name(self, obj):
+        return os.path.basename(obj.image.name) if obj.image else None
 
 
 class TimesheetTaskInputSerializer(serializers.Serializer):
@@ -33,21 +54,18 @@ class TimesheetCreateSerializer(serializers.Serializer):
             **validated_data
         )
 
-        total_hours = 0
-        for task in tasks_data:
-            hours  = task['hours']
-            amount = hours * rate
-            TimesheetTask.objects.create(
-                timesheet=timesheet,
-                description=task['description'],
-                hours=hours,
-                amount=amount,
-            )
-            total_hours += hours
-
-        timesheet.total_hours  = total_hours
-        timesheet.total_amount = total_hours * rate
-        timesheet.save()
+        # One totals recompute for the whole timesheet instead of one per task
+        with deferred_totals():
+            for task in tasks_data:
+                hours  = task['hours']
+                amount = hours * rate
+                TimesheetTask.objects.create(
+                    timesheet=timesheet,
+                    description=task['description'],
+                    hours=hours,
+                    amount=amount,
+                )
+        timesheet.refresh_from_db(fields=['total_hours', 'total_amount'])
         return timesheet
 
 
@@ -71,14 +89,98 @@ class TimesheetSerializer(serializers.ModelSerializer):
             'hours_overridden', 'tasks',
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        """`fields` (an iterable of names) trims the output to just those fields."""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class TaskAttachmentSerializer(serializers.ModelSerializer):
+    """Keeps the key names of the base64 entries Task.attachments used to hold, which the frontend still reads."""
+    sizeBytes   = serializers.IntegerField(source='size', read_only=True)
+    uploadedAt  = serializers.DateTimeField(source='uploaded_at', read_only=True)
+    uploadedBy  = serializers.CharField(source='uploaded_by', read_only=True)
+    contentType = serializers.CharField(source='content_type', read_only=True)
+    url         = serializers.SerializerMethodField()
+
+    class Meta:
+        model  = TaskAttachment
+        fields = ['id', 'task', 'filename', 'sizeBytes', 'uploadedAt', 'uploadedBy', 'contentType', 'sha256', 'url']
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        if not obj.file:
+            return None
+        url = reverse('task-attachment-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class TaskActivitySerializer(serializers.ModelSerializer):
+    """Same keys as the entries of the old Task.activity_log JSON list."""
+    timestamp = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model  = TaskActivity
+        fields = ['id', 'action', 'by', 'timestamp']
+
+
+class TaskCommentSerializer(serializers.ModelSerializer):
+    """Same keys as the entries of the old Task.comments JSON list."""
+    timestamp = serializers.DateTimeField(source='created_at', read_only=True)
+
+    class Meta:
+        model  = TaskComment
+        fields = ['id', 'author', 'content', 'timestamp']
+
 
 class TaskSerializer(serializers.ModelSerializer):
-    project_name = serializers.CharField(source='project.name', read_only=True)
+    project_name   = serializers.CharField(source='project.name', read_only=True)
+    # Files are uploaded to /api/tasks/<id>/attachments/; listed here for the detail view
+    attachments    = TaskAttachmentSerializer(source='files', many=True, read_only=True)
+    # Appended through /api/tasks/<id>/activity/ and /comments/; the detail shows the latest, older ones are paged there
+    activity_log   = serializers.SerializerMethodField()
+    comments       = serializers.SerializerMethodField()
+    activity_count = serializers.IntegerField(source='activity_entries.count', read_only=True)
+    comment_count  = serializers.IntegerField(source='comment_entries.count', read_only=True)
 
     class Meta:
         model = Task
         fields = '__all__'
 
+    def get_activity_log(self, obj):
+        return TaskActivitySerializer(recent(obj.activity_entries), many=True).data
+
+    def get_comments(self, obj):
+        return TaskCommentSerializer(recent(obj.comment_entries), many=True).data
+
+
+class TaskCardSerializer(serializers.ModelSerializer):
+    """Task list / kanban card: no description or JSON blobs, which come from the detail endpoint."""
+    project_name = serializers.CharField(source='project.name', read_only=True)
+
+    # Columns the list query loads (see TaskViewSet.get_queryset)
+    QUERY_FIELDS = (
+        'id', 'name', 'project', 'project__name', 'status', 'priority',
+        'assigned_to', 'due_date', 'estimated_hours', 'checklist_total', 'checklist_done', 'position',
+    )
+
+    class Meta:
+        model  = Task
+        fields = [
+            'id', 'name', 'project', 'project_name', 'status', 'priority', 'assigned_to',
+            'due_date', 'estimated_hours', 'checklist_total', 'checklist_done', 'position',
+        ]
+
+
+class TaskBulkChangeSerializer(serializers.Serializer):
+    """One card in a POST /api/tasks/bulk/ body; leave out what didn't change."""
+    id       = serializers.IntegerField()
+    status   = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    position = serializers.IntegerField(min_value=0, required=False)
+
 
 class AdminLoginSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,3 +1,1069 @@
-from django.test import TestCase
+import datetime
+import importlib.util
+import io
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models.functions import Lower
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import caching, deliveries, github, gitmirror
+from .dashboard import invalidate_summary
+from .deliveries import claim_next, process_delivery
+from .ingest import advance_sync_cursor, ingest_commits, newest_commit
+from .images import set_project_image
+from .models import (
+    DeployScript, GitHubIdentity, GitHubResponseCache, MonthlyRollup, Project, Task, TaskActivity, TaskAttachment,
+    Timesheet, TimesheetTask, WebhookDelivery,
+)
+from .repricing import run_pending
+from .rollups import rebuild_rollups
+
+# The default file cache lives in BASE_DIR/cache, shared with the dev server; tests get their own
+_test_caches = override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "home-tests", "KEY_PREFIX": "project_tracker"},
+})
+
+
+def setUpModule():
+    _test_caches.enable()
+
+
+def tearDownModule():
+    _test_caches.disable()
+
+
+class ProjectAdminChangelistTests(TestCase):
+    """The project changelist columns must not query per row."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(self.admin)
+
+    def _add_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(name=f"Project {Project.objects.count()}", hourly_rate=500)
+            script = DeployScript.objects.create(project=project, label="deploy", command="echo deploy")
+            project.active_deploy_script = script
+            project.save()
+            for month in (1, 2, 3):
+                Timesheet.objects.create(
+                    project=project, employee_name="dev", date=datetime.date(2026, month, 10),
+                    hourly_rate=500, total_hours=2, total_amount=1000,
+                )
+
+    def _changelist_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("admin:home_project_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_projects(self):
+        self._add_projects(1)
+        baseline = self._changelist_queries()
+
+        self._add_projects(10)
+        self.assertEqual(self._changelist_queries(), baseline)
+
+    def test_columns_use_annotations(self):
+        self._add_projects(1)
+        response = self.client.get(reverse("admin:home_project_changelist"))
+        self.assertContains(response, "<td class=\"field-total_timesheets\">3</td>")
+        self.assertContains(response, "<td class=\"field-total_hours_logged\">6")
+        self.assertContains(response, "₹3,000.00")
+        self.assertContains(response, "Mar 2026")
+
+
+class HotPathIndexTests(TestCase):
+    """EXPLAIN the lookups the webhook, ingest and report code run on every call; each must use its index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="Indexed", hourly_rate=100, github_repo="Org/Repo")
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise be seq-scanned whatever indexes exist
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used:\n{plan}")
+
+    def test_project_by_repo(self):
+        qs = Project.objects.alias(repo_lower=Lower("github_repo")).filter(repo_lower="org/repo")
+        self.assertEqual(list(qs), [self.project])
+        self.assertUsesIndex(qs, "home_project_repo_lower_idx")
+
+    def test_commit_timesheet_key(self):
+        qs = Timesheet.objects.filter(
+            project=self.project, source="GITHUB_COMMIT", employee_name__in=["dev"], date__in=[datetime.date(2026, 1, 1)],
+        )
+        self.assertUsesIndex(qs, "home_timesheet_commit_key")
+
+    def test_monthly_report_timesheets(self):
+        qs = Timesheet.objects.filter(project=self.project, date__year=2026, date__month=1)
+        self.assertUsesIndex(qs, "home_timesheet_proj_date_idx")
+
+    def test_task_by_sha(self):
+        qs = TimesheetTask.objects.filter(timesheet__project=self.project, github_sha__in=["a" * 40, "b" * 40])
+        self.assertUsesIndex(qs, "home_task_sha_idx")
+
+    def test_tasks_by_project_status(self):
+        qs = Task.objects.filter(project=self.project, status="Completed")
+        self.assertUsesIndex(qs, "home_task_proj_status_idx")
+
+    def test_commit_timesheet_is_unique(self):
+        fields = dict(project=self.project, employee_name="dev", date=datetime.date(2026, 1, 1), hourly_rate=100)
+        Timesheet.objects.create(source="GITHUB_COMMIT", **fields)
+        Timesheet.objects.create(source="MANUAL", **fields)
+        Timesheet.objects.create(source="MANUAL", **fields)  # manual entries may repeat
+        with self.assertRaises(IntegrityError):
+            Timesheet.objects.create(source="GITHUB_COMMIT", **fields)
+
+
+@override_settings(WEBHOOK_INLINE_WORKER=False, GITHUB_WEBHOOK_SECRET="")
+class GitHubWebhookTests(TestCase):
+    """The webhook only stores deliveries; bodies that can never be processed are refused up front."""
+
+    def _post(self, body, delivery_id="", event="push"):
+        return self.client.post(
+            reverse("github-webhook"), body, content_type="application/json",
+            HTTP_X_GITHUB_EVENT=event, HTTP_X_GITHUB_DELIVERY=delivery_id,
+        )
+
+    def test_push_is_queued(self):
+        response = self._post('{"repository": {"full_name": "org/repo"}, "commits": []}', "d1")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(WebhookDelivery.objects.get().delivery_id, "d1")
+
+    def test_malformed_json_is_rejected_without_queueing(self):
+        response = self._post('{"repository": ', "d2")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookDelivery.objects.exists())
+
+    def test_push_without_repository_is_rejected(self):
+        self.assertEqual(self._post('{"commits": []}').status_code, 400)
+        self.assertEqual(self._post('["not", "an", "object"]').status_code, 400)
+        self.assertFalse(WebhookDelivery.objects.exists())
+
+    def test_duplicate_delivery_is_ignored(self):
+        body = '{"repository": {"full_name": "org/repo"}, "commits": []}'
+        self._post(body, "d3")
+        process_delivery(WebhookDelivery.objects.get())
+        response = self._post(body, "d3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Duplicate delivery ignored")
+        self.assertEqual(WebhookDelivery.objects.count(), 1)
+
+    def test_stored_unparseable_body_fails_without_retrying(self):
+        delivery = WebhookDelivery.objects.create(event="push", body="not json", attempts=1)
+        with self.assertLogs("home.deliveries", "ERROR"):
+            process_delivery(delivery)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, "FAILED")
+        self.assertIn("Malformed JSON", delivery.last_error)
+
+    def test_a_delivery_is_claimed_once(self):
+        self._post('{"repository": {"full_name": "org/repo"}, "commits": []}', "d4")
+        delivery = claim_next()
+        self.assertEqual((delivery.status, delivery.attempts), ("PROCESSING", 1))
+        self.assertIsNone(claim_next())
+        process_delivery(delivery)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, "DONE")
+        self.assertEqual(delivery.result, "No project matches repo org/repo")
+
+    @override_settings(WEBHOOK_RETRY_BASE_SECONDS=0.05)
+    def test_inline_drain_waits_for_a_retry_with_nothing_else_queued(self):
+        self._post('{"repository": {"full_name": "org/repo"}, "commits": []}', "d5")
+        outcomes = [RuntimeError("GitHub is down"), "retried"]
+
+        def flaky(payload):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        # The worker would close the test's connection on the way out
+        with mock.patch.dict(deliveries.HANDLERS, {"push": flaky}), \
+                mock.patch.object(deliveries, "close_old_connections"), \
+                mock.patch.object(deliveries, "connection"), \
+                self.assertLogs("home.deliveries", "ERROR"):
+            handled = deliveries.run_worker(stop_when_idle=True, wake_event=threading.Event())
+        self.assertEqual(handled, 2)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.result), ("DONE", 2, "retried"))
+
+    @override_settings(WEBHOOK_INLINE_WORKER=True)
+    def test_kick_wakes_a_running_inline_drain(self):
+        deliveries._inline_wake.clear()
+        self.assertTrue(deliveries._inline_lock.acquire(blocking=False))
+        try:
+            with mock.patch.object(deliveries.threading, "Thread") as thread:
+                deliveries.kick_inline_worker()
+            thread.assert_not_called()
+            self.assertTrue(deliveries._inline_wake.is_set())
+        finally:
+            deliveries._inline_lock.release()
+            deliveries._inline_wake.clear()
+
+
+class TimesheetTotalsAndRollupTests(TestCase):
+    """Single task writes keep Timesheet totals and MonthlyRollup rows current with deltas, not re-aggregation."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Rollups", hourly_rate=100)
+        self.timesheet = self._timesheet(datetime.date(2026, 3, 10))
+
+    def _timesheet(self, day, employee="dev"):
+        return Timesheet.objects.create(
+            project=self.project, employee_name=employee, date=day, hourly_rate=100, total_hours=0, total_amount=0,
+        )
+
+    def _task(self, timesheet, hours, description="work"):
+        task = TimesheetTask(timesheet=timesheet, description=description, hours=hours, amount=0)
+        task.save()
+        return task
+
+    def _rollups(self):
+        return list(MonthlyRollup.objects.order_by("month", "employee_name").values(
+            "project_id", "month", "employee_name", "hours", "amount", "task_count", "merge_excluded", "first_date",
+        ))
+
+    def assertRollupsMatchRebuild(self):
+        kept = self._rollups()
+        rebuild_rollups()
+        self.assertEqual(kept, self._rollups())
+
+    def assertTotals(self, timesheet, hours, amount):
+        timesheet.refresh_from_db()
+        self.assertEqual((timesheet.total_hours, timesheet.total_amount), (Decimal(hours), Decimal(amount)))
+
+    def test_totals_after_add_edit_delete(self):
+        first = self._task(self.timesheet, "1.50")
+        second = self._task(self.timesheet, 2)
+        self.assertTotals(self.timesheet, "3.50", "350")
+
+        second = TimesheetTask.objects.get(pk=second.pk)
+        second.hours = 4
+        second.save()
+        self.assertTotals(self.timesheet, "5.50", "550")
+
+        TimesheetTask.objects.get(pk=first.pk).delete()
+        self.assertTotals(self.timesheet, "4", "400")
+        self.assertRollupsMatchRebuild()
+
+    def test_rollup_follows_merge_flag_and_first_date(self):
+        later = self._timesheet(datetime.date(2026, 3, 20))
+        early = self._task(self.timesheet, 1)
+        self._task(later, 2)
+        self._task(later, 0, description="Merge branch 'main'")
+        self.assertRollupsMatchRebuild()
+
+        # Losing the only billable task on the earliest day moves first_date on
+        TimesheetTask.objects.get(pk=early.pk).delete()
+        self.assertEqual(MonthlyRollup.objects.get().first_date, datetime.date(2026, 3, 20))
+        self.assertRollupsMatchRebuild()
+
+        # A billable task becoming a merge commit moves out of the totals
+        task = TimesheetTask.objects.filter(timesheet=later, is_merge=False).get()
+        task.description = "Merge pull request #1"
+        task.save()
+        self.assertRollupsMatchRebuild()
+
+        TimesheetTask.objects.filter(timesheet=later).get(description="Merge branch 'main'").delete()
+        TimesheetTask.objects.get(pk=task.pk).delete()
+        self.assertFalse(MonthlyRollup.objects.exists())
+
+    def test_task_moved_to_another_timesheet(self):
+        other = self._timesheet(datetime.date(2026, 4, 2), employee="other")
+        task = self._task(self.timesheet, 3)
+        task = TimesheetTask.objects.select_related("timesheet").get(pk=task.pk)
+        task.timesheet = other
+        task.save()
+        self.assertTotals(self.timesheet, "0", "0")
+        self.assertTotals(other, "3", "300")
+        self.assertEqual(list(MonthlyRollup.objects.values_list("employee_name", "task_count")), [("other", 1)])
+        self.assertRollupsMatchRebuild()
+
+    def test_task_save_cost_does_not_grow_with_the_month(self):
+        def edit_queries():
+            task = TimesheetTask.objects.select_related("timesheet").filter(timesheet=self.timesheet).first()
+            task.hours += 1
+            with CaptureQueriesContext(connection) as ctx:
+                task.save()
+            return len(ctx.captured_queries)
+
+        self._task(self.timesheet, 1)
+        small = edit_queries()
+        for day in range(11, 28):
+            timesheet = self._timesheet(datetime.date(2026, 3, day))
+            for _ in range(3):
+                self._task(timesheet, 1)
+        self.assertEqual(edit_queries(), small)
+        self.assertLessEqual(small, 3)  # task UPDATE, timesheet totals UPDATE, rollup UPDATE
+        self.assertRollupsMatchRebuild()
+
+
+class TimesheetListTests(TestCase):
+    """Cursor pagination is opt-in, `fields` trims rows, and the date filters are inclusive and validated."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Listing", hourly_rate=100)
+        self.days = [datetime.date(2026, 4, day) for day in (1, 2, 3)]
+        # Two rows on the last day so the -id tie-break shows
+        for day in self.days + self.days[-1:]:
+            Timesheet.objects.create(project=self.project, employee_name="dev", date=day, hourly_rate=100)
+
+    def _list(self, **params):
+        return self.client.get(reverse("timesheet-list"), params)
+
+    def test_plain_list_without_cursor_or_page_size(self):
+        response = self._list()
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_cursor_pages_follow_date_then_id(self):
+        expected = list(Timesheet.objects.order_by("-date", "-id").values_list("id", flat=True))
+        page = self._list(page_size=3, fields="id").json()
+        seen = [row["id"] for row in page["results"]]
+        self.assertIsNone(page["previous"])
+        page = self.client.get(page["next"]).json()
+        seen += [row["id"] for row in page["results"]]
+        self.assertIsNone(page["next"])
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_clamped(self):
+        Timesheet.objects.bulk_create(
+            Timesheet(project=self.project, employee_name="bulk", date=self.days[0], hourly_rate=100)
+            for _ in range(1000)
+        )
+        page = self._list(page_size=5000, fields="id").json()
+        self.assertEqual(len(page["results"]), 1000)
+        self.assertIsNotNone(page["next"])
+
+    def test_fields_leave_out_tasks_unless_expanded(self):
+        rows = self._list(fields="id,date").json()
+        self.assertEqual(set(rows[0]), {"id", "date"})
+        rows = self._list(fields="id,date", expand="tasks").json()
+        self.assertEqual(set(rows[0]), {"id", "date", "tasks"})
+        self.assertIn("tasks", self._list().json()[0])
+
+    def test_unknown_field_is_400(self):
+        response = self._list(fields="id,salary")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("salary", response.json()["fields"])
+
+    def test_malformed_dates_are_400(self):
+        for param, value in (("date_from", "04/01/2026"), ("date_to", "2026-02-30")):
+            response = self._list(**{param: value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn(param, response.json())
+
+    def test_date_bounds_are_inclusive(self):
+        rows = self._list(date_from="2026-04-02", date_to="2026-04-03", fields="date").json()
+        self.assertEqual(sorted({row["date"] for row in rows}), ["2026-04-02", "2026-04-03"])
+        self.assertEqual(len(rows), 3)
+
+
+class CommitIngestTests(TestCase):
+    """A batch of commits costs a fixed number of queries, a re-delivered batch creates nothing, and syncs resume from the cursor."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Ingest", hourly_rate=500)
+
+    def _commits(self, count, start=0):
+        return [
+            {
+                "sha": f"{i:040x}",
+                "message": f"Commit {i} [1h]" if i % 2 else f"Commit {i}",
+                "timestamp": f"2026-01-{(i % 5) + 1:02d}T10:00:00Z",
+                "login": None,
+                "author_name": f"author-{i % 3}",
+            }
+            for i in range(start, start + count)
+        ]
+
+    def _ingest(self, commits):
+        with CaptureQueriesContext(connection) as ctx:
+            created = ingest_commits([self.project], "org/repo", commits, fetch_stats=lambda repo, sha: {"churn": 60})
+        return created, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        created, small = self._ingest(self._commits(10))
+        self.assertEqual(created, 10)
+        created, large = self._ingest(self._commits(100, start=10))
+        self.assertEqual(created, 100)
+        self.assertEqual(large, small)
+        self.assertLessEqual(large, 10)
+
+    def test_redelivered_batch_is_one_lookup(self):
+        commits = self._commits(20)
+        self._ingest(commits)
+        self.assertEqual(self._ingest(commits), (0, 1))
+        self.assertEqual(TimesheetTask.objects.count(), 20)
+
+    def test_totals_and_rollups_match_the_tasks(self):
+        self._ingest(self._commits(30))
+        for timesheet in Timesheet.objects.all():
+            tasks = timesheet.tasks.all()
+            self.assertEqual(timesheet.total_hours, sum(t.hours for t in tasks))
+            self.assertEqual(timesheet.total_amount, sum(t.amount for t in tasks))
+        kept = list(MonthlyRollup.objects.order_by("employee_name").values_list("employee_name", "hours", "task_count"))
+        rebuild_rollups()
+        self.assertEqual(kept, list(MonthlyRollup.objects.order_by("employee_name").values_list("employee_name", "hours", "task_count")))
+
+    def _api_commit(self, sha, committed):
+        return {"sha": sha, "commit": {"message": sha, "author": {"name": "dev", "date": committed}, "committer": {"date": committed}}}
+
+    def test_sync_cursor_only_moves_forward(self):
+        items = [self._api_commit("b" * 40, "2026-02-02T10:00:00Z"), self._api_commit("a" * 40, "2026-02-01T10:00:00Z")]
+        advance_sync_cursor(self.project, newest_commit(items))
+        advance_sync_cursor(self.project, newest_commit(items[1:]))
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.github_synced_sha, "b" * 40)
+        self.assertEqual(self.project.github_synced_at, datetime.datetime(2026, 2, 2, 10, tzinfo=datetime.timezone.utc))
+
+    def _sync(self, pages, *args):
+        """Run sync_commits against `pages` of API items; returns the params of each commits request."""
+        client = mock.Mock(token="", rate_remaining=None)
+        client.get_json.side_effect = lambda url, params: pages.pop(0) if pages else []
+        with mock.patch("home.management.commands.sync_commits.get_client", return_value=client), \
+                mock.patch("home.management.commands.sync_commits.ingest_commits", return_value=0):
+            call_command("sync_commits", self.project.pk, *args, stdout=io.StringIO())
+        return [call.args[1] for call in client.get_json.call_args_list]
+
+    def test_sync_starts_from_the_cursor_unless_full(self):
+        Project.objects.filter(pk=self.project.pk).update(github_repo="org/repo")
+        advance_sync_cursor(self.project, ("a" * 40, datetime.datetime(2026, 2, 1, 10, tzinfo=datetime.timezone.utc)))
+
+        page = [self._api_commit("c" * 40, "2026-02-03T10:00:00Z"), self._api_commit("a" * 40, "2026-02-01T10:00:00Z")]
+        params = self._sync([page])
+        self.assertEqual([p["since"] for p in params], ["2026-02-01T10:00:00Z"])  # stopped at the cursor sha
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.github_synced_sha, "c" * 40)
+
+        params = self._sync([], "--full")
+        self.assertNotIn("since", params[0])
+
+
+class DashboardSummaryTests(TestCase):
+    """The dashboard cards come from /api/dashboard/summary/, aggregated in SQL and dropped on writes."""
+
+    def setUp(self):
+        invalidate_summary()
+        self.project = Project.objects.create(name="Dash", mode="DEV")
+
+    def _summary(self):
+        return self.client.get(reverse("dashboard-summary")).json()
+
+    def test_cards(self):
+        today = timezone.localdate()
+        Project.objects.create(name="Old", mode="MAINT")
+        for days_ago, employee, hours in ((0, "ana", 2), (3, "ben", 3), (30, "ana", 5)):
+            Timesheet.objects.create(
+                project=self.project, employee_name=employee, date=today - datetime.timedelta(days=days_ago),
+                hourly_rate=100, total_hours=hours, total_amount=0,
+            )
+        Task.objects.create(name="Done", project=self.project, assigned_to="ana", status="Completed")
+        Task.objects.create(name="Open", project=self.project, assigned_to="ana")
+
+        summary = self._summary()
+        self.assertEqual(summary["hours"], {"today": 2, "week": 5, "by_project": {str(self.project.pk): 10}})
+        self.assertEqual(summary["projects"], {"total": 2, "active": 1})
+        self.assertEqual((summary["developers"], summary["developer_names"]), (2, ["ana", "ben"]))
+        self.assertEqual((summary["tasks"]["completed"], summary["tasks"]["pending"]), (1, 1))
+        self.assertEqual(summary["per_project"][0]["progress"], 50)
+
+    def test_a_write_drops_the_cached_summary(self):
+        self.assertEqual(self._summary()["projects"]["total"], 1)
+        with self.assertNumQueries(0):
+            self._summary()
+        Project.objects.create(name="New")
+        self.assertEqual(self._summary()["projects"]["total"], 2)
+
+
+class ProjectRepricingTests(TestCase):
+    """Project.save only records a rate change; run_pending applies it after the caller's transaction."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Rates", hourly_rate=100)
+        self.timesheet = Timesheet.objects.create(
+            project=self.project, employee_name="dev", date=datetime.date(2026, 3, 10), hourly_rate=100,
+            total_hours=0, total_amount=0,
+        )
+        TimesheetTask(timesheet=self.timesheet, description="work", hours=2, amount=0).save()
+
+    def _billing(self):
+        self.timesheet.refresh_from_db()
+        return self.timesheet.hourly_rate, self.timesheet.total_amount, MonthlyRollup.objects.get().amount
+
+    def _pending(self):
+        return Project.objects.values_list("reprice_rate", flat=True).get(pk=self.project.pk)
+
+    def test_save_records_the_rate_and_reprices_after_commit(self):
+        project = Project.objects.get(pk=self.project.pk)
+        project.hourly_rate = 150
+        with self.captureOnCommitCallbacks() as callbacks, CaptureQueriesContext(connection) as ctx:
+            project.save()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self._billing(), (100, 200, 200))
+        self.assertEqual(self._pending(), 150)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(self._billing(), (150, 300, 300))
+        self.assertIsNone(self._pending())
+
+    def test_rate_saved_during_a_run_is_applied_after_it(self):
+        Project.objects.filter(pk=self.project.pk).update(hourly_rate=150, reprice_rate=150)
+
+        def progress(done, total):
+            Project.objects.filter(pk=self.project.pk, reprice_rate=150).update(hourly_rate=175, reprice_rate=175)
+
+        run_pending(self.project.pk, progress=progress)
+        self.assertEqual(self._billing(), (175, 350, 350))
+        self.assertIsNone(self._pending())
+
+    def test_command_records_then_applies_the_rate(self):
+        out = io.StringIO()
+        call_command("reprice_project", self.project.pk, "--rate", "120", "--from", "2026-03-01", stdout=out)
+        self.assertEqual(self._billing(), (120, 240, 240))
+        self.assertIsNone(self._pending())
+        call_command("reprice_project", "--pending", stdout=out)
+        self.assertIn("Repriced 0 timesheets", out.getvalue())
+
+
+class StubResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+        self.text = json.dumps(body) if body is not None else ""
+
+    def json(self):
+        return self._body
+
+
+class StubSession:
+    """Stands in for requests.Session: answers every request with `handler(method, url, headers, json)`."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        self.headers = {}
+
+    def request(self, method, url, headers=None, json=None, timeout=None):
+        self.calls.append((method, url, dict(headers or {})))
+        return self.handler(method, url, headers or {}, json)
+
+
+class GitHubClientTests(TestCase):
+    """GitHubClient against a stubbed session: ETag reuse, pacing, GraphQL batching and the REST fallback."""
+
+    def setUp(self):
+        self.github = github.GitHubClient(token="test-token", base_url="https://github.test", max_requests_per_second=1000)
+        patcher = mock.patch.object(github, "_client", self.github)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stub(self, handler):
+        self.github.session = StubSession(handler)
+        return self.github.session
+
+    def test_etag_304_replays_the_cached_body(self):
+        def handler(method, url, headers, body):
+            if headers.get("If-None-Match") == '"v1"':
+                return StubResponse(304, headers={"ETag": '"v1"'})
+            return StubResponse(200, [{"sha": "abc"}], headers={"ETag": '"v1"'})
+
+        session = self.stub(handler)
+        self.assertEqual(self.github.get_json("/repos/org/repo/commits"), [{"sha": "abc"}])
+        self.assertEqual(self.github.get_json("/repos/org/repo/commits"), [{"sha": "abc"}])
+        self.assertNotIn("If-None-Match", session.calls[0][2])
+        self.assertEqual(session.calls[1][2]["If-None-Match"], '"v1"')
+        self.assertEqual(GitHubResponseCache.objects.count(), 1)
+
+    def test_single_commits_are_not_cached(self):
+        self.stub(lambda *args: StubResponse(200, {"stats": {"additions": 3, "deletions": 2}}, headers={"ETag": '"c"'}))
+        self.assertEqual(github.get_commit_stats("org/repo", "a" * 40)["churn"], 5)
+        self.assertFalse(GitHubResponseCache.objects.exists())
+
+    def test_token_bucket_sleeps_once_the_burst_is_spent(self):
+        bucket = github.TokenBucket(rate=10, capacity=2)
+        with mock.patch.object(github.time, "sleep") as sleep:
+            for _ in range(3):
+                bucket.acquire()
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.1, places=2)
+
+    def test_low_quota_spreads_the_rest_until_reset(self):
+        self.github._record_rate_limit(StubResponse(headers={
+            "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "100", "X-RateLimit-Reset": str(int(time.time()) + 1000),
+        }))
+        self.assertAlmostEqual(self.github.throttle.rate, 0.1, places=2)
+
+    def test_commit_stats_are_batched_through_graphql(self):
+        def handler(method, url, headers, body):
+            self.assertEqual((method, url), ("POST", "https://github.test/graphql"))
+            variables = body["variables"]
+            nodes = {f"c{i}": {"additions": 1, "deletions": 1} for i in range(len(variables) - 2)}
+            return StubResponse(200, {"data": {"repository": nodes}})
+
+        session = self.stub(handler)
+        shas = [f"{i:040x}" for i in range(150)]
+        stats = github.get_commits_stats("org/repo", shas)
+        self.assertEqual(len(session.calls), 2)  # 100 + 50
+        self.assertEqual({s["churn"] for s in stats.values()}, {2})
+        self.assertEqual(set(stats), set(shas))
+
+    def test_rest_fallback_when_graphql_fails(self):
+        def handler(method, url, headers, body):
+            if method == "POST":
+                return StubResponse(200, {"data": None, "errors": [{"message": "boom"}]})
+            return StubResponse(200, {"stats": {"additions": 4, "deletions": 0}})
+
+        session = self.stub(handler)
+        with self.assertLogs("home.github", "WARNING"):
+            stats = github.get_commits_stats("org/repo", ["a" * 40, "b" * 40])
+        self.assertEqual([call[0] for call in session.calls], ["POST", "GET", "GET"])
+        self.assertEqual(stats["b" * 40]["churn"], 4)
+
+    def _identity(self, login, name, found=True, age=datetime.timedelta(0)):
+        return GitHubIdentity.objects.create(login=login, name=name, found=found, fetched_at=timezone.now() - age)
+
+    def _graphql_users(self, names, asked=None):
+        """Handler answering a GraphQL user batch from `names` ({login: name}; missing logins don't exist)."""
+        def handler(method, url, headers, body):
+            data = {}
+            for key, login in body["variables"].items():
+                if asked is not None:
+                    asked.append(login)
+                data[f"u{key[1:]}"] = {"login": login, "name": names[login]} if login in names else None
+            return StubResponse(200, {"data": data})
+        return handler
+
+    def test_fresh_identity_is_served_without_a_request(self):
+        self._identity("ana", "Ana Lima")
+        self._identity("ghost", "", found=False)
+        session = self.stub(lambda *args: self.fail("no request expected"))
+        self.assertEqual(github.get_profile_names(["ana", "ghost"]), {"ana": "Ana Lima", "ghost": None})
+        self.assertEqual(session.calls, [])
+
+    @override_settings(GITHUB_IDENTITY_TTL=3600, GITHUB_IDENTITY_NEGATIVE_TTL=60)
+    def test_stale_and_negative_identities_are_refetched_after_their_ttl(self):
+        self._identity("ana", "Ana", age=datetime.timedelta(hours=2))
+        self._identity("bo", "", found=False, age=datetime.timedelta(minutes=2))
+        self._identity("cy", "", found=False, age=datetime.timedelta(seconds=10))
+        self._identity("dee", "Dee", age=datetime.timedelta(minutes=30))
+        asked = []
+        session = self.stub(self._graphql_users({"ana": "Ana Lima", "bo": "Bo Chen"}, asked))
+        names = github.get_profile_names(["ana", "bo", "cy", "dee"])
+        self.assertEqual(names, {"ana": "Ana Lima", "bo": "Bo Chen", "cy": None, "dee": "Dee"})
+        self.assertEqual(len(session.calls), 1)
+        self.assertEqual(sorted(asked), ["ana", "bo"])
+
+    def test_refetched_identities_are_upserted(self):
+        old = self._identity("ana", "Ana", age=datetime.timedelta(days=30))
+        self.stub(self._graphql_users({"ana": "Ana Lima"}))
+        github.get_profile_names(["ana", "nobody"])
+        rows = {row.login: row for row in GitHubIdentity.objects.all()}
+        self.assertEqual(set(rows), {"ana", "nobody"})
+        self.assertEqual(rows["ana"].pk, old.pk)
+        self.assertEqual((rows["ana"].name, rows["ana"].found), ("Ana Lima", True))
+        self.assertGreater(rows["ana"].fetched_at, old.fetched_at)
+        self.assertFalse(rows["nobody"].found)
+
+    def test_prune_drops_stale_then_least_recently_used(self):
+        now = timezone.now()
+        for i, age in enumerate([0, 1, 2, 40]):
+            row = GitHubResponseCache.objects.create(url=f"https://github.test/{i}", etag=f'"{i}"', body={})
+            GitHubResponseCache.objects.filter(pk=row.pk).update(fetched_at=now - datetime.timedelta(days=age))
+        deleted = github.prune_response_cache(max_age=datetime.timedelta(days=30), max_rows=2)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(
+            sorted(GitHubResponseCache.objects.values_list("url", flat=True)),
+            ["https://github.test/0", "https://github.test/1"],
+        )
+
+
+class GitMirrorTests(TestCase):
+    """gitmirror against a throwaway `git init` repo used as the remote."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.remote = Path(tmp.name) / "remote"
+        self.remote.mkdir()
+        self.git("init", "--quiet")
+        overrides = self.settings(
+            GITHUB_MIRROR_DIR=Path(tmp.name) / "mirrors", GITHUB_MIRROR_REMOTE=str(self.remote), GITHUB_TOKEN=None,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def git(self, *args):
+        return subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+            cwd=self.remote, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    def commit(self, files):
+        for name, content in files.items():
+            path = self.remote / name
+            if isinstance(content, bytes):
+                path.write_bytes(content)
+            else:
+                path.write_text(content)
+        self.git("add", "--all")
+        self.git("commit", "--quiet", "-m", "change")
+        return self.git("rev-parse", "HEAD")
+
+    def test_numstat_counts_text_lines_and_skips_binary_files(self):
+        first = self.commit({"a.txt": "1\n2\n3\n"})
+        second = self.commit({"a.txt": "1\nchanged\n", "b.txt": "new\n", "logo.png": b"\x00\x01\x02"})
+
+        stats = gitmirror.numstat(gitmirror.update_mirror("org/repo"), [first, second])
+        self.assertEqual(stats[first], {"additions": 3, "deletions": 0, "churn": 3})
+        self.assertEqual(stats[second], {"additions": 2, "deletions": 2, "churn": 4})
+
+    def test_fetches_new_commits_and_sends_unknown_shas_to_the_api(self):
+        first = self.commit({"a.txt": "1\n"})
+        gitmirror.update_mirror("org/repo")
+        second = self.commit({"a.txt": "1\n2\n"})
+        unknown = "f" * 40
+
+        with mock.patch.object(gitmirror, "api_commits_stats", return_value={unknown: {"churn": 9}}) as api:
+            stats = gitmirror.get_commits_stats("org/repo", [first, second, unknown])
+        api.assert_called_once_with("org/repo", [unknown], 1)
+        self.assertEqual(stats[second]["additions"], 1)
+        self.assertEqual(stats[unknown], {"churn": 9})
+
+
+class MediaTestCase(TestCase):
+    """Stores uploads under a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        overrides = self.settings(MEDIA_ROOT=media_root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.project = Project.objects.create(name="Files", hourly_rate=500)
+
+
+class TaskAttachmentTests(MediaTestCase):
+    """Attachments are stored once per content and downloaded with Range support."""
+
+    def setUp(self):
+        super().setUp()
+        self.task = Task.objects.create(name="Spec", project=self.project, assigned_to="dev")
+        self.content = bytes(range(256)) * 4
+
+    def _upload(self, task=None):
+        upload = SimpleUploadedFile("spec.bin", self.content, content_type="application/octet-stream")
+        response = self.client.post(reverse("task-attachments", args=[(task or self.task).pk]), {"file": upload})
+        self.assertEqual(response.status_code, 201)
+        return TaskAttachment.objects.filter(task=task or self.task).latest("id")
+
+    def _download(self, attachment, **headers):
+        return self.client.get(reverse("task-attachment-download", args=[attachment.pk]), headers=headers)
+
+    def test_range_request_is_answered_with_206(self):
+        attachment = self._upload()
+        response = self._download(attachment, Range="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 100-199/1024")
+        self.assertEqual(b"".join(response.streaming_content), self.content[100:200])
+
+        response = self._download(attachment, Range="bytes=-24")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-24:])
+
+    def test_full_and_unsatisfiable_downloads(self):
+        attachment = self._upload()
+        response = self._download(attachment)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+        response = self._download(attachment, Range="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_same_content_is_stored_once_and_removed_with_the_last_row(self):
+        other = Task.objects.create(name="Copy", project=self.project, assigned_to="dev")
+        first, second = self._upload(), self._upload(other)
+        self.assertEqual(first.file.name, second.file.name)
+
+        first.delete()
+        self.assertTrue(default_storage.exists(second.file.name))
+        other.delete()
+        self.assertFalse(default_storage.exists(second.file.name))
+
+
+class ProjectImageTests(MediaTestCase):
+    """Thumbnails are made once per size and version, and go with the image they were made from."""
+
+    def _image(self, name="logo.png", size=(600, 400)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "red").save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def _get(self, size, **headers):
+        return self.client.get(reverse("project-image", args=[self.project.pk]), {"size": size}, headers=headers)
+
+    def _thumbs(self):
+        try:
+            return default_storage.listdir(f"project-images/thumbs/{self.project.pk}")[1]
+        except FileNotFoundError:
+            return []
+
+    def test_thumbnail_is_resized_once(self):
+        set_project_image(self.project, self._image())
+        response = self._get("thumb")
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as thumb:
+            self.assertEqual(thumb.size, (96, 64))
+
+        with mock.patch("home.images.Image.open") as pillow:
+            self.assertEqual(self._get("thumb").status_code, 200)
+        pillow.assert_not_called()
+        self.assertEqual(len(self._thumbs()), 1)
+
+    def test_etag_and_versioned_caching(self):
+        set_project_image(self.project, self._image())
+        response = self._get("card")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(self._get("card", If_None_Match=response["ETag"]).status_code, 304)
+
+        url = self.client.get(reverse("project-detail", args=[self.project.pk])).json()["image_url"]
+        self.assertIn("immutable", self.client.get(url)["Cache-Control"])
+
+    def test_replacing_the_image_drops_the_old_files(self):
+        set_project_image(self.project, self._image())
+        original = self.project.image.name
+        self._get("thumb")
+        set_project_image(self.project, self._image("new.png"))
+        self.assertFalse(default_storage.exists(original))
+        self.assertEqual(self._thumbs(), [])
+
+    def test_unreadable_upload_is_rejected(self):
+        upload = SimpleUploadedFile("fake.png", b"not an image", content_type="image/png")
+        response = self.client.put(
+            reverse("project-image", args=[self.project.pk]),
+            encode_multipart(BOUNDARY, {"image": upload}), content_type=MULTIPART_CONTENT,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.image)
+
+    def test_truncated_upload_is_rejected(self):
+        # verify() passes a truncated JPEG; only decoding the pixels catches it
+        buffer = io.BytesIO()
+        Image.effect_noise((600, 400), 64).convert("RGB").save(buffer, "JPEG")
+        for name, data in (("cut.jpg", buffer.getvalue()), ("cut.png", self._image().read())):
+            upload = SimpleUploadedFile(name, data[:len(data) // 2])
+            response = self.client.put(
+                reverse("project-image", args=[self.project.pk]),
+                encode_multipart(BOUNDARY, {"image": upload}), content_type=MULTIPART_CONTENT,
+            )
+            self.assertEqual(response.status_code, 400, name)
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.image)
+
+    def test_stored_truncated_image_is_415_not_500(self):
+        data = self._image().read()
+        self.project.image.save("cut.png", SimpleUploadedFile("cut.png", data[:len(data) // 2]))
+        self.assertEqual(self._get("thumb").status_code, 415)
+        self.assertEqual(self._get("original").status_code, 200)
+        self.assertEqual(self._thumbs(), [])
+
+
+class TaskActivityTests(TestCase):
+    """Activity and comments are appended as rows; transitions refuse to overwrite someone else's move."""
+
+    def setUp(self):
+        project = Project.objects.create(name="Board", hourly_rate=500)
+        self.task = Task.objects.create(name="Card", project=project, assigned_to="dev")
+
+    def _url(self, name):
+        return reverse(f"task-{name}", args=[self.task.pk])
+
+    def test_comment_is_stored_and_logged(self):
+        response = self.client.post(self._url("comments"), {"content": "Looks good", "author": "ana"}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["content"], "Looks good")
+
+        detail = self.client.get(reverse("task-detail", args=[self.task.pk])).json()
+        self.assertEqual(detail["comment_count"], 1)
+        self.assertEqual([entry["action"] for entry in detail["activity_log"]], ["Comment added"])
+
+    def test_activity_pages_newest_first(self):
+        TaskActivity.objects.bulk_create(TaskActivity(task=self.task, action=f"Step {i}") for i in range(5))
+        page = self.client.get(self._url("activity"), {"page_size": 2}).json()
+        self.assertEqual([entry["action"] for entry in page["results"]], ["Step 4", "Step 3"])
+        older = self.client.get(page["next"]).json()
+        self.assertEqual([entry["action"] for entry in older["results"]], ["Step 2", "Step 1"])
+
+    def test_transition_with_a_stale_expected_status_is_refused(self):
+        move = {"status": "In Progress", "by": "ana", "expected_status": "To Do"}
+        response = self.client.post(self._url("transition"), move, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "In Progress")
+
+        response = self.client.post(self._url("transition"), {**move, "status": "Testing"}, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["status"], "In Progress")
+        self.assertEqual(list(self.task.activity_entries.values_list("action", flat=True)), ["Status changed to In Progress"])
+
+
+class TaskCardListTests(TestCase):
+    """The task list reads stored checklist counts instead of loading the checklist JSON."""
+
+    def test_counts_follow_the_checklist_without_loading_it(self):
+        task = Task.objects.create(
+            name="Card", project=Project.objects.create(name="Board"), assigned_to="dev",
+            checklist=[{"text": "a", "checked": True}, {"text": "b", "checked": False}],
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            (card,) = self.client.get(reverse("task-list")).json()
+        self.assertEqual((card["checklist_total"], card["checklist_done"]), (2, 1))
+        self.assertNotIn('"home_task"."checklist"', " ".join(query["sql"] for query in ctx.captured_queries))
+
+        checklist = [{"text": "a", "checked": True}, {"text": "b", "checked": True}, {"text": "c"}]
+        self.client.patch(reverse("task-detail", args=[task.pk]), {"checklist": checklist}, content_type="application/json")
+        task.refresh_from_db()
+        self.assertEqual((task.checklist_total, task.checklist_done), (3, 2))
+
+
+class TaskBulkUpdateTests(TestCase):
+    """A kanban reorganisation is one request and a fixed number of queries."""
+
+    def setUp(self):
+        self.project = Project.objects.create(name="Board", hourly_rate=500)
+
+    def _tasks(self, count):
+        return Task.objects.bulk_create(
+            Task(name=f"Card {i}", project=self.project, assigned_to="dev", position=i) for i in range(count)
+        )
+
+    def _bulk(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse("task-bulk"), payload, content_type="application/json")
+        return response, len(ctx.captured_queries)
+
+    def test_reorder_and_move_between_columns(self):
+        first, second, third = self._tasks(3)
+        response, _ = self._bulk({"by": "ana", "changes": [
+            {"id": third.pk, "position": 0},
+            {"id": first.pk, "position": 2},
+            {"id": second.pk, "status": "Completed", "position": 0},
+            {"id": 999999, "position": 0},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["missing"], [999999])
+        self.assertEqual(
+            list(Task.objects.filter(status="To Do").order_by("position").values_list("pk", flat=True)), [third.pk, first.pk],
+        )
+        self.assertEqual(list(TaskActivity.objects.values_list("task_id", "by")), [(second.pk, "ana")])
+
+    def test_unchanged_cards_are_left_out(self):
+        first, second = self._tasks(2)
+        response, _ = self._bulk([{"id": first.pk, "position": 0}, {"id": second.pk, "position": 5}])
+        self.assertEqual(response.json()["updated"], [{"id": second.pk, "position": 5}])
+
+    def test_query_count_does_not_grow_with_the_changes(self):
+        tasks = self._tasks(40)
+        _, small = self._bulk([{"id": task.pk, "status": "Testing", "position": 50} for task in tasks[:4]])
+        _, large = self._bulk([{"id": task.pk, "status": "Completed", "position": 60} for task in tasks])
+        self.assertEqual(large, small)
+
+    def test_invalid_change_is_rejected(self):
+        (task,) = self._tasks(1)
+        response, _ = self._bulk([{"id": task.pk, "status": "Archived"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get().status, "To Do")
+
+
+class NamespacedCacheTests(TestCase):
+    """caching: versioned namespace keys, per-namespace TTLs and the shared hit / miss counters."""
+
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+
+    def test_set_get_delete(self):
+        caching.set("dashboard", "k", {"a": 1})
+        self.assertEqual(caching.get("dashboard", "k"), {"a": 1})
+        self.assertIsNone(caching.get("deploy", "k"))  # same key, other namespace
+        caching.delete("dashboard", "k")
+        self.assertEqual(caching.get("dashboard", "k", "gone"), "gone")
+
+    def test_bumping_a_version_orphans_only_that_namespace(self):
+        caching.set("dashboard", "k", 1)
+        caching.set("deploy", "k", 2)
+        with mock.patch.dict(caching.NAMESPACES, {"dashboard": 2}):
+            self.assertIsNone(caching.get("dashboard", "k"))
+            self.assertEqual(caching.get("deploy", "k"), 2)
+
+    def test_unknown_namespace_is_refused(self):
+        with self.assertRaises(KeyError):
+            caching.set("nope", "k", 1)
+
+    @override_settings(CACHE_TTLS={"dashboard": 7}, CACHE_DEFAULT_TTL=42)
+    def test_ttl_per_namespace(self):
+        self.assertEqual((caching.ttl("dashboard"), caching.ttl("deploy")), (7, 42))
+        with mock.patch.object(caching.cache, "set") as cache_set:
+            caching.set("dashboard", "k", 1)
+            caching.set("dashboard", "k", 1, timeout=3)
+        self.assertEqual([call.kwargs["timeout"] for call in cache_set.call_args_list], [7, 3])
+
+    def test_hits_and_misses_are_counted(self):
+        caching.get("dashboard", "k")
+        caching.set("dashboard", "k", 1)
+        caching.get("dashboard", "k")
+        caching.get("dashboard", "k")
+        row = caching.stats()["dashboard"]
+        self.assertEqual((row["hits"], row["misses"], row["hit_rate"]), (2, 1, 0.667))
+        self.assertEqual(caching.stats()["deploy"]["hit_rate"], None)
+
+    def test_stats_endpoint_and_command(self):
+        caching.get("deploy", "k")
+        self.assertEqual(self.client.get(reverse("cache-stats")).status_code, 403)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "password"))
+        self.assertEqual(self.client.get(reverse("cache-stats")).json()["deploy"]["misses"], 1)
+
+        out = io.StringIO()
+        call_command("cache_stats", "--reset", stdout=out)
+        self.assertIn("misses=1", out.getvalue())
+        self.assertEqual(caching.stats()["deploy"]["misses"], 0)
+
+    def test_unknown_cache_backend_is_improperly_configured(self):
+        settings_file = importlib.util.find_spec("project_tracker.settings").origin
+        with mock.patch.dict(os.environ, {"CACHE_BACKEND": "memcache"}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "file, db, redis, locmem"):
+                runpy.run_path(settings_file)
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProjectViewSet, TimesheetViewSet, TaskViewSet, AdminLoginViewSet, ChangeRequestViewSet, github_webhook, admin_login_view
+from .views import ProjectViewSet, TimesheetViewSet, TaskViewSet, TaskAttachmentViewSet, AdminLoginViewSet, ChangeRequestViewSet, github_webhook, admin_login_view, dashboard_summary, cache_stats
 
 router = DefaultRouter()
 router.register(r'home', ProjectViewSet)
 router.register(r'timesheets', TimesheetViewSet)
 router.register(r'tasks', TaskViewSet)
+router.register(r'task-attachments', TaskAttachmentViewSet, basename='task-attachment')
 router.register(r'team-members', AdminLoginViewSet)
 router.register(r'change-requests', ChangeRequestViewSet)
 
@@ -14,4 +15,6 @@ urlpatterns = [
     path('', include(router.urls)),
     path('github-webhook/', github_webhook, name='github-webhook'),
     path('admin-login/', admin_login_view, name='admin-login'),
+    path('dashboard/summary/', dashboard_summary, name='dashboard-summary'),
+    path('cache/stats/', cache_stats, name='cache-stats'),
 ]
\ No newline at end of file
@@ -1,22 +1,33 @@
-from rest_framework import viewsets, status
+from django.conf import settings
+from rest_framework import mixins, viewsets, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from .models import Project, Timesheet, TimesheetTask, DeployScript, Task, AdminLogin, ChangeRequest
+from .models import Project, Timesheet, DeployScript, Task, TaskAttachment, AdminLogin, ChangeRequest
+from . import caching
+from .activity import add_comment, bulk_update_tasks, log_activity, transition_status
+from .attachments import download_response, store_upload
+from .dashboard import get_summary
+from .images import THUMBNAIL_SIZES, InvalidImage, image_response, set_project_image
+from .deliveries import HANDLERS, InvalidPayload, enqueue_delivery, kick_inline_worker
+from .webhook import _verify_signature
 from .serializers import (
     ProjectSerializer,
     TimesheetSerializer,
     TimesheetCreateSerializer,
     TaskSerializer,
+    TaskCardSerializer,
+    TaskAttachmentSerializer,
+    TaskActivitySerializer,
+    TaskCommentSerializer,
+    TaskBulkChangeSerializer,
     AdminLoginSerializer,
     ChangeRequestSerializer,
 )
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
-from rest_framework.permissions import AllowAny
-from django.utils.dateparse import parse_datetime
-from django.utils import timezone
-from django.core.cache import cache
-from django.conf import settings
-import requests
-import re
+from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from django.utils.dateparse import parse_date
 
 
 
@@ -68,10 +79,75 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         return Response(ProjectSerializer(project).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=["get", "put", "delete"], parser_classes=[MultiPartParser])
+    def image(self, request, pk=None):
+        """GET ?size=thumb|card|large|original (default card) streams the image; PUT uploads `image`; DELETE clears it."""
+        project = self.get_object()
+        if request.method == "GET":
+            size = request.query_params.get("size", "card")
+            if size != "original" and size not in THUMBNAIL_SIZES:
+                raise ValidationError({"size": f"One of: {', '.join([*THUMBNAIL_SIZES, 'original'])}."})
+            return image_response(request, project, size)
+
+        upload = None
+        if request.method == "PUT":
+            upload = request.FILES.get("image")
+            if upload is None:
+                raise ValidationError({"image": "Attach an image file."})
+            if upload.size > settings.PROJECT_IMAGE_MAX_BYTES:
+                raise ValidationError({"image": f"Larger than {settings.PROJECT_IMAGE_MAX_BYTES // (1024 * 1024)} MB."})
+        try:
+            set_project_image(project, upload)
+        except InvalidImage as e:
+            raise ValidationError({"image": str(e)})
+        return Response(ProjectSerializer(project, context={"request": request}).data)
+
+
+class TimesheetCursorPagination(CursorPagination):
+    """
+    Opt-in: a request that sends neither `cursor` nor `page_size` still gets
+    the plain list the dashboard expects.
+    """
+    page_size             = 100
+    page_size_query_param = "page_size"
+    max_page_size         = 1000
+    ordering              = ("-date", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
 
 class TimesheetViewSet(viewsets.ModelViewSet):
-    queryset         = Timesheet.objects.all().prefetch_related("tasks")
+    """
+    Filters: project, employee, source, date_from / date_to (YYYY-MM-DD, inclusive).
+    `fields=id,date,total_hours` returns lean rows; nested tasks are only
+    included with `fields` when asked for (`expand=tasks` or listing "tasks").
+    `cursor` / `page_size` switch on cursor pagination.
+    """
+    queryset         = Timesheet.objects.all().select_related("project")
     serializer_class = TimesheetSerializer
+    pagination_class = TimesheetCursorPagination
+
+    def _requested_fields(self):
+        """Field names asked for with ?fields= (+ ?expand=tasks), or None for the full rows."""
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        fields = {name.strip() for name in raw.split(",") if name.strip()}
+        if "tasks" in self.request.query_params.get("expand", "").split(","):
+            fields.add("tasks")
+        unknown = fields - set(TimesheetSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ("list", "retrieve"):
+            kwargs.setdefault("fields", self._requested_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
         qs       = super().get_queryset()
@@ -84,6 +160,21 @@ class TimesheetViewSet(viewsets.ModelViewSet):
             qs = qs.filter(employee_name__icontains=employee)
         if source:
             qs = qs.filter(source=source)
+
+        for param, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    day = parse_date(value)
+                except ValueError:
+                    day = None
+                if day is None:
+                    raise ValidationError({param: "Use YYYY-MM-DD."})
+                qs = qs.filter(**{lookup: day})
+
+        fields = self._requested_fields() if self.action in ("list", "retrieve") else None
+        if fields is None or "tasks" in fields:
+            qs = qs.prefetch_related("tasks")
         return qs
 
     def create(self, request, *args, **kwargs):
@@ -96,115 +187,17 @@ class TimesheetViewSet(viewsets.ModelViewSet):
         )
 
 
-def _parse_time_from_message(message: str) -> float:
-    # Match patterns like [1.5h], [45m], [1h 30m], [2 hrs], etc. anywhere in the message
-    matches = re.findall(r'\[([^\]]+)\]', message)
-    for text in reversed(matches):
-        text = text.lower().strip()
-        hours = 0.0
-        found = False
-        
-        # Check for hours: e.g. "1.5h", "2 hours", "1.5 hrs"
-        h_match = re.search(r'(\d*\.?\d+)\s*(?:h|hr|hour)', text)
-        if h_match:
-            hours += float(h_match.group(1))
-            found = True
-            
-        # Check for minutes: e.g. "30m", "45 mins"
-        m_match = re.search(r'(\d+)\s*(?:m|min)', text)
-        if m_match:
-            hours += float(m_match.group(1)) / 60.0
-            found = True
-            
-        if found:
-            return round(hours, 2)
-            
-        # Fallback to pure number inside bracket, e.g. [1.5]
-        try:
-            return round(float(text), 2)
-        except ValueError:
-            pass
-            
-    return None
+@api_view(['GET'])
+def dashboard_summary(request):
+    """Dashboard totals (hours, projects, task completion) from SQL aggregates, cached until the next write."""
+    return Response(get_summary())
 
 
-def _get_commit_stats(repo_full_name: str, sha: str) -> dict:
-    token   = getattr(settings, "GITHUB_TOKEN", None)
-    headers = {"Accept": "application/vnd.github+json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    url = f"https://api.github.com/repos/{repo_full_name}/commits/{sha}"
-    try:
-        resp = requests.get(url, headers=headers, timeout=8)
-        if resp.status_code == 200:
-            data      = resp.json()
-            stats     = data.get("stats", {})
-            additions = stats.get("additions", 0)
-            deletions = stats.get("deletions", 0)
-            return {"additions": additions, "deletions": deletions, "churn": additions + deletions}
-    except Exception:
-        pass
-    return {"additions": 0, "deletions": 0, "churn": 0}
-
-
-def _get_github_profile_name(username):
-    if not username:
-        return None
-        
-    cache_key = f"github_profile_name_{username}"
-    profile_name = cache.get(cache_key)
-    if profile_name:
-        return profile_name
-        
-    url = f"https://api.github.com/users/{username}"
-    headers = {"Accept": "application/vnd.github+json"}
-    
-    token = getattr(settings, "GITHUB_TOKEN", None)
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-        
-    try:
-        resp = requests.get(url, headers=headers, timeout=5)
-        if resp.status_code == 200:
-            data = resp.json()
-            # "name" is the display name (e.g. "Jobin Jose"), "login" is username
-            profile_name = data.get("name") or data.get("login")
-            if profile_name:
-                cache.set(cache_key, profile_name, timeout=86400) # Cache for 24 hours
-                return profile_name
-    except Exception:
-        pass
-        
-    return None
-
-
-def _clean_time_from_message(message: str) -> str:
-    # Find all bracketed parts and remove those that we can parse as time spent
-    matches = re.findall(r'\[([^\]]+)\]', message)
-    cleaned = message
-    for text in matches:
-        parsed_text = text.lower().strip()
-        found = False
-        h_match = re.search(r'(\d*\.?\d+)\s*(?:h|hr|hour)', parsed_text)
-        if h_match:
-            found = True
-        m_match = re.search(r'(\d+)\s*(?:m|min)', parsed_text)
-        if m_match:
-            found = True
-        if not found:
-            try:
-                float(parsed_text)
-                found = True
-            except ValueError:
-                pass
-        
-        if found:
-            escaped_text = re.escape(text)
-            cleaned = re.sub(r'\[\s*' + escaped_text + r'\s*\]', '', cleaned)
-            
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-    return cleaned
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit / miss counts, TTL and key version per cache namespace, summed over all workers."""
+    return Response(caching.stats())
 
 
 @api_view(['POST'])
@@ -226,122 +219,155 @@ def admin_login_view(request):
 @authentication_classes([])
 @permission_classes([AllowAny])
 def github_webhook(request):
+    # Verify first, then read the raw body ourselves: the body is only checked
+    # here, talking to the GitHub API is the worker's job (see home/deliveries.py).
+    if not _verify_signature(request):
+        return Response({"error": "Invalid signature"}, status=status.HTTP_403_FORBIDDEN)
+
     event = request.META.get('HTTP_X_GITHUB_EVENT', 'ping')
     if event == 'ping':
         return Response({"message": "Pong"}, status=status.HTTP_200_OK)
-    
-    if event == 'push':
-        payload = request.data
-        repository = payload.get('repository', {})
-        repo_full_name = repository.get('full_name')
-        
-        if not repo_full_name:
-            return Response({"error": "No repository full_name found"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        projects = Project.objects.filter(github_repo__iexact=repo_full_name)
-        if not projects.exists():
-            return Response({"message": f"No project matches repo {repo_full_name}"}, status=status.HTTP_200_OK)
-            
-        commits = payload.get('commits', [])
-        if not commits:
-            return Response({"message": "No commits in push"}, status=status.HTTP_200_OK)
-            
-        created_count = 0
-        for project in projects:
-            for commit in commits:
-                commit_id = commit.get('id', '')
-                commit_message = commit.get('message', 'No commit message')
-                
-                # Check for duplicate task using the github_sha field in TimesheetTask
-                if TimesheetTask.objects.filter(timesheet__project=project, github_sha=commit_id).exists():
-                    continue
-                    
-                # Parse commit date
-                timestamp_str = commit.get('timestamp')
-                commit_date = timezone.now().date()
-                if timestamp_str:
-                    try:
-                        parsed_dt = parse_datetime(timestamp_str)
-                        if parsed_dt:
-                            commit_date = parsed_dt.date()
-                    except ValueError:
-                        pass
-                
-                # Check if it is a merge commit (billing should be 0.0)
-                msg_lower = commit_message.lower().strip()
-                is_merge = msg_lower.startswith("merge ") or msg_lower.startswith("merge pull request") or "merge branch" in msg_lower
-                
-                if is_merge:
-                    hours = 0.0
-                else:
-                    # 1. Parse time from commit message (e.g. "[1.5h]")
-                    hours = _parse_time_from_message(commit_message)
-                    
-                    # 2. Fallback: estimate time based on churn from GitHub API (20 seconds per line changed)
-                    if hours is None:
-                        stats = _get_commit_stats(repo_full_name, commit_id)
-                        churn = stats.get("churn", 0)
-                        if churn > 0:
-                            hours = project.churn_to_hours(churn)
-                        else:
-                            hours = 0.0  # Fallback to 0.0 if API fails or no changes
-                        
-                # Clean the commit message by removing the time spent bracket
-                task_description = _clean_time_from_message(commit_message)
-                    
-                # Try to get GitHub Profile Display Name, fallback to Username, then Git Name
-                github_username = commit.get('author', {}).get('username')
-                author_name = None
-                if github_username:
-                    author_name = _get_github_profile_name(github_username)
-                    
-                if not author_name:
-                    author_name = github_username or commit.get('author', {}).get('name', 'Unknown')
-                
-                # Get or create a single Timesheet for this person on this day
-                timesheet, created = Timesheet.objects.get_or_create(
-                    project=project,
-                    employee_name=author_name,
-                    date=commit_date,
-                    source="GITHUB_COMMIT",
-                    defaults={
-                        'hourly_rate': project.hourly_rate,
-                        'total_hours': 0,
-                        'total_amount': 0,
-                        'github_sha': commit_id,
-                    }
-                )
-                
-                # Calculate the task amount based on hours and hourly rate
-                task_amount = round(float(hours) * float(project.hourly_rate), 2)
-                
-                # Create the task with the commit message under the grouped timesheet
-                TimesheetTask.objects.create(
-                    timesheet=timesheet,
-                    description=task_description,
-                    hours=hours,
-                    amount=task_amount,
-                    github_sha=commit_id,
-                )
-                
-                # Re-calculate totals on parent timesheet
-                from django.db.models import Sum
-                totals = timesheet.tasks.aggregate(total_h=Sum('hours'), total_a=Sum('amount'))
-                timesheet.total_hours = totals['total_h'] or 0
-                timesheet.total_amount = totals['total_a'] or 0
-                timesheet.save(update_fields=['total_hours', 'total_amount'])
-                
-                created_count += 1
-                
-        return Response({"message": f"Processed {created_count} commits into timesheets"}, status=status.HTTP_201_CREATED)
-        
-    return Response({"message": "Unhandled event type"}, status=status.HTTP_200_OK)
+
+    if event not in HANDLERS:
+        return Response({"message": "Unhandled event type"}, status=status.HTTP_200_OK)
+
+    try:
+        delivery, created = enqueue_delivery(
+            event=event,
+            body=request.body,
+            delivery_id=request.META.get('HTTP_X_GITHUB_DELIVERY', ''),
+        )
+    except InvalidPayload as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not created and delivery.status != "PENDING":
+        return Response(
+            {"message": "Duplicate delivery ignored", "delivery": delivery.pk, "status": delivery.status},
+            status=status.HTTP_200_OK,
+        )
+    kick_inline_worker()
+    return Response(
+        {"message": "Delivery queued", "delivery": delivery.pk, "status": delivery.status},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+class TaskLogPagination(CursorPagination):
+    """Activity and comments, newest first; `next` pages back through older entries."""
+    page_size             = 50
+    page_size_query_param = "page_size"
+    max_page_size         = 500
+    ordering              = "-id"
 
 
 class TaskViewSet(viewsets.ModelViewSet):
     queryset         = Task.objects.all()
     serializer_class = TaskSerializer
 
+    # Actions that only need the task to exist; they load nothing else from it
+    ENTRY_ACTIONS = ("attachments", "activity", "comments", "transition")
+
+    def get_queryset(self):
+        qs = super().get_queryset().select_related("project")
+        if self.action == "list":
+            # Card columns only; the description stays in the row until a detail request
+            qs = qs.only(*TaskCardSerializer.QUERY_FIELDS)
+        elif self.action not in self.ENTRY_ACTIONS:
+            qs = qs.prefetch_related("files")
+        return qs
+
+    def get_serializer_class(self):
+        return TaskCardSerializer if self.action == "list" else TaskSerializer
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        POST [{id, status?, position?}, ...] (or {"changes": [...], "by": ...}):
+        apply a kanban reorganisation in one transaction. Answers with only
+        the fields that changed, plus any ids that no longer exist.
+        """
+        data = request.data
+        changes, by = (data, "") if isinstance(data, list) else (data.get("changes"), data.get("by", ""))
+        serializer = TaskBulkChangeSerializer(data=changes, many=True, max_length=settings.TASK_BULK_MAX_CHANGES)
+        serializer.is_valid(raise_exception=True)
+        updated, missing = bulk_update_tasks(serializer.validated_data, by=by)
+        return Response({"updated": updated, "missing": missing})
+
+    @action(detail=True, methods=["get", "post"], parser_classes=[MultiPartParser])
+    def attachments(self, request, pk=None):
+        """GET lists the task's files; POST uploads one or more as multipart `file` fields."""
+        task = self.get_object()
+        if request.method == "POST":
+            uploads = request.FILES.getlist("file")
+            if not uploads:
+                raise ValidationError({"file": "Attach at least one file."})
+            limit = settings.TASK_ATTACHMENT_MAX_BYTES
+            too_big = [upload.name for upload in uploads if upload.size > limit]
+            if too_big:
+                raise ValidationError({"file": f"Larger than {limit // (1024 * 1024)} MB: {', '.join(too_big)}"})
+            uploaded_by = request.data.get("uploaded_by", "")
+            for upload in uploads:
+                store_upload(task, upload, uploaded_by=uploaded_by)
+
+        serializer = TaskAttachmentSerializer(task.files.all(), many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED if request.method == "POST" else status.HTTP_200_OK)
+
+    def _entries(self, queryset, serializer_class):
+        paginator = TaskLogPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+    @action(detail=True, methods=["get", "post"])
+    def activity(self, request, pk=None):
+        """GET pages through the activity log, newest first; POST appends {action, by}."""
+        task = self.get_object()
+        if request.method == "GET":
+            return self._entries(task.activity_entries.all(), TaskActivitySerializer)
+        serializer = TaskActivitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entry = log_activity(task.pk, serializer.validated_data["action"], serializer.validated_data.get("by", ""))
+        return Response(TaskActivitySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get", "post"])
+    def comments(self, request, pk=None):
+        """GET pages through the comments, newest first; POST adds {content, author} and logs it."""
+        task = self.get_object()
+        if request.method == "GET":
+            return self._entries(task.comment_entries.all(), TaskCommentSerializer)
+        serializer = TaskCommentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        comment = add_comment(task.pk, serializer.validated_data["content"], serializer.validated_data.get("author", ""))
+        return Response(TaskCommentSerializer(comment).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"])
+    def transition(self, request, pk=None):
+        """
+        POST {status, by, expected_status?}: set the status and log it in one
+        transaction. With expected_status, answers 409 if the task has moved on.
+        """
+        task = self.get_object()
+        new_status = request.data.get("status")
+        valid = [value for value, _ in Task.STATUS_CHOICES]
+        if new_status not in valid:
+            raise ValidationError({"status": f"Must be one of: {', '.join(valid)}"})
+        expected = request.data.get("expected_status")
+        if not transition_status(task.pk, new_status, by=request.data.get("by", ""), expected=expected):
+            current = Task.objects.filter(pk=task.pk).values_list("status", flat=True).first()
+            return Response(
+                {"detail": f"Task status is now {current!r}, not {expected!r}.", "status": current},
+                status=status.HTTP_409_CONFLICT,
+            )
+        task = Task.objects.select_related("project").prefetch_related("files").get(pk=task.pk)
+        return Response(TaskSerializer(task, context=self.get_serializer_context()).data)
+
+
+class TaskAttachmentViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    queryset         = TaskAttachment.objects.all()
+    serializer_class = TaskAttachmentSerializer
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        return download_response(self.get_object(), request.headers.get("Range"))
+
 
 class AdminLoginViewSet(viewsets.ReadOnlyModelViewSet):
     queryset         = AdminLogin.objects.all()
@@ -20,13 +20,13 @@ import hmac
 import json
 import logging
 
-import requests as http_requests
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
-from .models import Project, Timesheet, TimesheetTask
+from .github import get_commit_stats as _get_commit_stats
+from .models import Project, Timesheet, TimesheetTask, is_merge_message
 
 logger = logging.getLogger(__name__)
 
@@ -49,30 +49,6 @@ def _verify_signature(request) -> bool:
     return hmac.compare_digest(sig_header, expected)
 
 
-def _get_commit_stats(repo_full_name: str, sha: str) -> dict:
-    """
-    Call GitHub API to get additions + deletions for one commit.
-    Returns {"additions": int, "deletions": int, "churn": int}
-    """
-    token   = getattr(settings, "GITHUB_TOKEN", None)
-    headers = {"Accept": "application/vnd.github+json"}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    url = f"https://api.github.com/repos/{repo_full_name}/commits/{sha}"
-    try:
-        resp = http_requests.get(url, headers=headers, timeout=8)
-        resp.raise_for_status()
-        data      = resp.json()
-        stats     = data.get("stats", {})
-        additions = stats.get("additions", 0)
-        deletions = stats.get("deletions", 0)
-        return {"additions": additions, "deletions": deletions, "churn": additions + deletions}
-    except Exception as exc:
-        logger.error("GitHub API error for %s@%s: %s", repo_full_name, sha, exc)
-        return {"additions": 0, "deletions": 0, "churn": 0}
-
-
 def _get_project(repo_full_name: str):
     """Return the Project linked to this GitHub repo, or None."""
     try:
@@ -93,22 +69,26 @@ def _create_timesheet_entry(
     github_sha: str = "",
     github_pr_number: int = None,
 ):
-    """Create one Timesheet + one TimesheetTask."""
+    """Create one TimesheetTask, on the employee's commit Timesheet for that day (or a new PR Timesheet)."""
     rate   = float(project.hourly_rate)
     amount = round(hours * rate, 2)
 
-    ts = Timesheet.objects.create(
-        project          = project,
-        employee_name    = employee_name,
-        date             = date,
+    fields = dict(
         hourly_rate      = rate,
-        total_hours      = hours,
-        total_amount     = amount,
-        source           = source,
+        total_hours      = 0,
+        total_amount     = 0,
         github_sha       = github_sha,
         github_pr_number = github_pr_number,
         hours_overridden = False,
     )
+    if source == "GITHUB_COMMIT":
+        # home_timesheet_commit_key allows one commit timesheet per employee and day
+        ts, _ = Timesheet.objects.get_or_create(
+            project=project, employee_name=employee_name, date=date, source=source, defaults=fields,
+        )
+    else:
+        ts = Timesheet.objects.create(project=project, employee_name=employee_name, date=date, source=source, **fields)
+    # TimesheetTask.save() prices the task and refreshes the timesheet totals
     TimesheetTask.objects.create(
         timesheet   = ts,
         description = description,
@@ -150,7 +130,7 @@ def _handle_push(payload: dict):
         date    = commit["timestamp"][:10]  # YYYY-MM-DD
 
         # Skip merge commits (they duplicate PR merge entries)
-        if message.lower().startswith("merge pull request") or message.lower().startswith("merge branch"):
+        if is_merge_message(message):
             logger.info("Skipping merge commit: %s", sha[:7])
             continue
 
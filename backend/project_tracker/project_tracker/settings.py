@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -78,13 +81,52 @@ WSGI_APPLICATION = 'project_tracker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# DB_ENGINE=postgres for production; SQLite (the default) serialises every write behind one file lock.
+# `manage.py copy_database` moves an existing SQLite database across.
+
+SQLITE_PATH = os.environ.get("SQLITE_PATH", str(BASE_DIR / 'db.sqlite3'))
+
+SQLITE_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': SQLITE_PATH,
+    'OPTIONS': {
+        # WAL lets readers carry on during a write; writers wait up to busy_timeout for the lock instead of failing
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            f'PRAGMA busy_timeout={int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 20000))};'
+        ),
+        # Take the write lock at BEGIN, so busy_timeout applies rather than an instant "database is locked"
+        'transaction_mode': 'IMMEDIATE',
+    },
 }
 
+if os.environ.get("DB_ENGINE", "sqlite") == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("POSTGRES_DB", "project_tracker"),
+            'USER': os.environ.get("POSTGRES_USER", "project_tracker"),
+            'PASSWORD': os.environ.get("POSTGRES_PASSWORD", ""),
+            'HOST': os.environ.get("POSTGRES_HOST", "localhost"),
+            'PORT': os.environ.get("POSTGRES_PORT", "5432"),
+            'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", 60)),  # keep connections open between requests (seconds)
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        },
+        # Source for `manage.py copy_database --from legacy_sqlite`
+        'legacy_sqlite': SQLITE_DATABASE,
+    }
+    if os.environ.get("DB_POOL", "0") == "1":
+        # psycopg's connection pool instead of one persistent connection per worker thread
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            'max_size': int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        }
+else:
+    DATABASES = {'default': SQLITE_DATABASE}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,9 +169,68 @@ STATIC_URL = 'static/'
 # Add this line
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')  # this is the folder where collectstatic will store files
 
+# Uploaded files (task attachments, see home/attachments.py); served through the API, not MEDIA_URL
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, 'media'))
+MEDIA_URL = 'media/'
+TASK_ATTACHMENT_MAX_BYTES = int(os.environ.get("TASK_ATTACHMENT_MAX_BYTES", 20 * 1024 * 1024))
+PROJECT_IMAGE_MAX_BYTES = int(os.environ.get("PROJECT_IMAGE_MAX_BYTES", 5 * 1024 * 1024))
+TASK_BULK_MAX_CHANGES = int(os.environ.get("TASK_BULK_MAX_CHANGES", 1000))  # cards per POST /api/tasks/bulk/
+
 # settings.py
 
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "fallback_token_if_needed")
+GITHUB_WEBHOOK_SECRET = os.environ.get("GITHUB_WEBHOOK_SECRET", "")
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")  # point at a stub server in tests
+GITHUB_MAX_RATE_LIMIT_WAIT = int(os.environ.get("GITHUB_MAX_RATE_LIMIT_WAIT", 120))  # longest rate-limit pause (seconds) before giving up
+GITHUB_MAX_REQUESTS_PER_SECOND = float(os.environ.get("GITHUB_MAX_REQUESTS_PER_SECOND", 10))
+GITHUB_RATE_LIMIT_RESERVE = int(os.environ.get("GITHUB_RATE_LIMIT_RESERVE", 200))  # below this many calls left, spread the rest until reset
+GITHUB_FETCH_CONCURRENCY = int(os.environ.get("GITHUB_FETCH_CONCURRENCY", 8))  # parallel commit-stats fetches in sync_commits
+GITHUB_IDENTITY_TTL = int(os.environ.get("GITHUB_IDENTITY_TTL", 7 * 86400))  # refresh cached profile names after this long (seconds)
+GITHUB_IDENTITY_NEGATIVE_TTL = int(os.environ.get("GITHUB_IDENTITY_NEGATIVE_TTL", 3600))  # retry failed login lookups after this long
+GITHUB_CHURN_SOURCE = os.environ.get("GITHUB_CHURN_SOURCE", "api")  # "mirror" = numstat from local bare clones (home/gitmirror.py)
+GITHUB_MIRROR_DIR = os.environ.get("GITHUB_MIRROR_DIR", str(BASE_DIR / "git-mirrors"))
+GITHUB_MIRROR_REMOTE = os.environ.get("GITHUB_MIRROR_REMOTE", "https://github.com/{repo}.git")
+GITHUB_RESPONSE_CACHE_TTL = int(os.environ.get("GITHUB_RESPONSE_CACHE_TTL", 30 * 86400))  # prune_github_cache drops ETag entries unused this long
+GITHUB_RESPONSE_CACHE_MAX_ROWS = int(os.environ.get("GITHUB_RESPONSE_CACHE_MAX_ROWS", 5000))  # ...and keeps at most this many
+
+DASHBOARD_CACHE_SECONDS = int(os.environ.get("DASHBOARD_CACHE_SECONDS", 60))  # upper bound on /api/dashboard/summary/ staleness
+
+# Cache shared by all gunicorn workers (see home/caching.py). CACHE_BACKEND:
+#   file  – files under CACHE_DIR (default, no setup)
+#   db    – the "home_cache" table; run `manage.py createcachetable` once
+#   redis – REDIS_URL, needs the redis package
+#   locmem – per-process; only for a single worker
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "file")
+_CACHE_LOCATIONS = {
+    "file": ('django.core.cache.backends.filebased.FileBasedCache', os.environ.get("CACHE_DIR", str(BASE_DIR / "cache"))),
+    "db": ('django.core.cache.backends.db.DatabaseCache', "home_cache"),
+    "redis": ('django.core.cache.backends.redis.RedisCache', os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1")),
+    "locmem": ('django.core.cache.backends.locmem.LocMemCache', "project-tracker"),
+}
+if CACHE_BACKEND not in _CACHE_LOCATIONS:
+    raise ImproperlyConfigured(f"CACHE_BACKEND must be one of {', '.join(_CACHE_LOCATIONS)}, not {CACHE_BACKEND!r}")
+CACHES = {
+    'default': {
+        'BACKEND': _CACHE_LOCATIONS[CACHE_BACKEND][0],
+        'LOCATION': _CACHE_LOCATIONS[CACHE_BACKEND][1],
+        'KEY_PREFIX': "project_tracker",
+        'VERSION': int(os.environ.get("CACHE_VERSION", 1)),  # bump to drop every cached entry at once
+    }
+}
+CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 300))
+CACHE_TTLS = {  # seconds, per home.caching namespace
+    "deploy": int(os.environ.get("CACHE_TTL_DEPLOY", 900)),
+    "dashboard": DASHBOARD_CACHE_SECONDS,
+}
+
+# Webhook delivery queue (see home/deliveries.py)
+WEBHOOK_INLINE_WORKER = os.environ.get("WEBHOOK_INLINE_WORKER", "1") == "1"  # drain in the web process after each delivery
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 5))
+WEBHOOK_RETRY_BASE_SECONDS = int(os.environ.get("WEBHOOK_RETRY_BASE_SECONDS", 30))
+WEBHOOK_LEASE_SECONDS = int(os.environ.get("WEBHOOK_LEASE_SECONDS", 600))  # PROCESSING longer than this is re-queued
+
+# Hourly-rate changes (see home/repricing.py)
+REPRICE_INLINE_WORKER = os.environ.get("REPRICE_INLINE_WORKER", "1") == "1"  # reprice in the web process after the save commits
 
 
 
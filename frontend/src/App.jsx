@@ -70,6 +70,26 @@ function UserAvatar({ name = "Admin", size = 36 }) {
   );
 }
 
+// Kanban column for a task; Critical tasks sit in the backlog whatever their status
+function taskColumn(task) {
+  if (task.priority === "Critical") return "backlog";
+  if (task.status === "In Progress") return "inprogress";
+  if (task.status === "Testing") return "testing";
+  if (task.status === "Completed") return "completed";
+  return "todo";
+}
+
+// "2h 30m" from decimal hours
+function formatHours(hours) {
+  const whole = Math.floor(hours);
+  const minutes = Math.round((hours - whole) * 60);
+  return minutes ? `${whole}h ${minutes}m` : `${whole}h`;
+}
+
+// Timesheet lists ask only for the columns they show; page_size switches on cursor pagination (newest first)
+const RECENT_TIMESHEETS_QUERY = { page_size: 5, fields: "id,employee_name,project_name,total_hours,date,tasks" };
+const PROJECT_TIMESHEETS_QUERY = { page_size: 50, fields: "id,date,employee_name,total_hours,tasks" };
+
 const PROJECT_STAGES = [
   "Project Created",
   "Requirements Gathering",
@@ -90,7 +110,9 @@ export default function App() {
   
   // Database States
   const [projects, setProjects] = useState([]);
-  const [timesheets, setTimesheets] = useState([]);
+  const [summary, setSummary] = useState(null); // /api/dashboard/summary/, the dashboard cards
+  const [recentTimesheets, setRecentTimesheets] = useState([]);
+  const [projectTimesheets, setProjectTimesheets] = useState({ projectId: null, rows: [], cursor: null });
   const [kanbanTasks, setKanbanTasks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState("");
@@ -172,30 +194,27 @@ export default function App() {
   const [formErrorMessage, setFormErrorMessage] = useState("");
   const [remarksModalText, setRemarksModalText] = useState(null);
   const [projImageName, setProjImageName] = useState("");
-  const [projImageBase64, setProjImageBase64] = useState("");
+  const [projImagePreview, setProjImagePreview] = useState("");
+  const [projImageFile, setProjImageFile] = useState(null);
   const [taskAttachments, setTaskAttachments] = useState([]);
 
   const refreshData = () => {
     setLoading(true);
     Promise.all([
       axios.get("/api/home/"),
-      axios.get("/api/timesheets/"),
+      axios.get("/api/dashboard/summary/"),
+      axios.get("/api/timesheets/", { params: RECENT_TIMESHEETS_QUERY }),
       axios.get("/api/tasks/"),
       axios.get("/api/team-members/")
     ])
-      .then(([projRes, tsRes, taskRes, teamRes]) => {
+      .then(([projRes, summaryRes, tsRes, taskRes, teamRes]) => {
         setProjects(projRes.data);
-        setTimesheets(tsRes.data);
+        setSummary(summaryRes.data);
+        setRecentTimesheets(tsRes.data.results);
         setTeamMembers(teamRes.data);
         
         const cards = taskRes.data.map((task) => {
           const projectSlug = task.project_name ? task.project_name.substring(0, 3).toUpperCase() : "TASK";
-          let col = "todo";
-          if (task.status === "In Progress") col = "inprogress";
-          if (task.status === "Testing") col = "testing";
-          if (task.status === "Completed") col = "completed";
-          if (task.priority === "Critical") col = "backlog";
-
           return {
             id: task.id,
             code: `#${projectSlug}-${task.id}`,
@@ -206,7 +225,8 @@ export default function App() {
             hours: parseFloat(task.estimated_hours) || 0,
             amount: 0,
             date: task.due_date,
-            column: col,
+            column: taskColumn(task),
+            position: task.position || 0,
             rawTask: task
           };
         });
@@ -221,19 +241,73 @@ export default function App() {
     refreshData();
   }, []);
 
+  const refreshSummary = () =>
+    axios.get("/api/dashboard/summary/")
+      .then(res => setSummary(res.data))
+      .catch(err => console.error("Error loading dashboard summary:", err));
+
+  // One cursor page of a project's timesheets for the Time Logs table
+  const fetchProjectTimesheets = (projectId, cursor) =>
+    axios.get("/api/timesheets/", { params: { ...PROJECT_TIMESHEETS_QUERY, project: projectId, cursor: cursor || undefined } })
+      .then(res => ({
+        projectId,
+        rows: res.data.results,
+        cursor: res.data.next ? new URL(res.data.next).searchParams.get("cursor") : null
+      }));
+
+  const loadMoreProjectTimesheets = () => {
+    const { projectId, cursor } = projectTimesheets;
+    fetchProjectTimesheets(projectId, cursor)
+      .then(page => setProjectTimesheets(prev => (
+        prev.projectId === projectId ? { ...page, rows: [...prev.rows, ...page.rows] } : prev
+      )))
+      .catch(err => console.error("Error loading timesheets:", err));
+  };
+
+  useEffect(() => {
+    if (activeTab !== "project_details" || !selectedProject) return;
+    let ignore = false; // a later project (or tab) replaced this request
+    setProjectTimesheets({ projectId: selectedProject.id, rows: [], cursor: null });
+    fetchProjectTimesheets(selectedProject.id)
+      .then(page => { if (!ignore) setProjectTimesheets(page); })
+      .catch(err => console.error("Error loading timesheets:", err));
+    return () => { ignore = true; };
+  }, [activeTab, selectedProject?.id]);
+
+  // Applies [{ id, status?, position? }] to the board in one request; the reply has only what changed
+  const saveKanbanChanges = (changes) => {
+    const user = localStorage.getItem("admin_logged_in_name") || "Admin";
+    return axios.post("/api/tasks/bulk/", { changes, by: user })
+      .then((res) => {
+        const updated = new Map(res.data.updated.map(row => [row.id, row]));
+        setKanbanTasks(prev => prev.map(t => {
+          const row = updated.get(t.id);
+          if (!row) return t;
+          const rawTask = { ...t.rawTask, ...row };
+          return { ...t, rawTask, column: taskColumn(rawTask), position: rawTask.position || 0 };
+        }));
+        if (res.data.missing.length) refreshData();
+        else if (res.data.updated.some(row => "status" in row)) refreshSummary();
+      })
+      .catch(err => {
+        console.error("Error updating tasks:", err);
+        refreshData();
+      });
+  };
+
   const moveTask = (taskId, newCol) => {
     let apiStatus = "To Do";
     if (newCol === "inprogress") apiStatus = "In Progress";
     if (newCol === "testing") apiStatus = "Testing";
     if (newCol === "completed") apiStatus = "Completed";
 
-    setKanbanTasks(prev => prev.map(t => t.id === taskId ? { ...t, column: newCol } : t));
+    // Moved cards go to the bottom of their new column
+    const position = Math.max(-1, ...kanbanTasks.filter(t => t.column === newCol).map(t => t.position)) + 1;
+    setKanbanTasks(prev => prev.map(t => t.id === taskId ? { ...t, column: newCol, position } : t));
 
     const taskObj = kanbanTasks.find(t => t.id === taskId);
     if (taskObj && taskObj.rawTask) {
-      axios.patch(`/api/tasks/${taskId}/`, { status: apiStatus })
-        .then(() => refreshData())
-        .catch(err => console.error("Error updating task status:", err));
+      saveKanbanChanges([{ id: taskId, status: apiStatus, position }]);
     }
   };
 
@@ -388,14 +462,26 @@ export default function App() {
       due_date: taskDueDate || new Date().toISOString().split("T")[0],
       estimated_hours: parseFloat(taskEstHours) || 0,
       status: taskStatus,
-      tags: taskTags,
-      attachments: taskAttachments
+      tags: taskTags
     };
 
     const url = taskEditingId ? `/api/tasks/${taskEditingId}/` : "/api/tasks/";
     const reqMethod = taskEditingId ? axios.put : axios.post;
 
     reqMethod(url, payload)
+      .then((res) => {
+        // Files removed from the list are deleted; newly staged ones (with a `file`) go up as multipart
+        const keptIds = new Set(taskAttachments.filter(att => att.id).map(att => att.id));
+        const removed = (taskEditingId && selectedTask ? selectedTask.attachments || [] : []).filter(att => !keptIds.has(att.id));
+        const newFiles = taskAttachments.filter(att => att.file);
+        if (!removed.length && !newFiles.length) return res;
+        const form = new FormData();
+        newFiles.forEach(att => form.append("file", att.file));
+        form.append("uploaded_by", localStorage.getItem("admin_logged_in_name") || "Developer");
+        return Promise.all(removed.map(att => axios.delete(`/api/task-attachments/${att.id}/`)))
+          .then(() => newFiles.length && axios.post(`/api/tasks/${res.data.id}/attachments/`, form))
+          .then(() => axios.get(`/api/tasks/${res.data.id}/`));
+      })
       .then((res) => {
         setFormSuccessMessage(taskEditingId ? "Task updated successfully!" : "Task created successfully!");
         refreshData();
@@ -430,7 +516,8 @@ export default function App() {
     setProjTags([]);
     setSelectedMembers([]);
     setProjImageName("");
-    setProjImageBase64("");
+    setProjImagePreview("");
+    setProjImageFile(null);
     setIsEditingProject(false);
     setProjectEditingId(null);
   };
@@ -464,8 +551,9 @@ export default function App() {
     setProjTags(details.tags);
     setSelectedMembers(details.members);
     setProjUrl(project.url || "");
-    setProjImageName(details.imageName || "");
-    setProjImageBase64(details.imageBase64 || "");
+    setProjImageName(project.image_name || "");
+    setProjImagePreview(project.image_url ? `${project.image_url}&size=card` : "");
+    setProjImageFile(null);
 
     setIsEditingProject(true);
     setProjectEditingId(project.id);
@@ -553,22 +641,32 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
       });
   };
 
+  // Activity and comments are appended server-side, one entry per request
+  const logTaskActivity = (taskId, action, user) =>
+    axios.post(`/api/tasks/${taskId}/activity/`, { action, by: user });
+
+  const reloadSelectedTask = (taskId) =>
+    axios.get(`/api/tasks/${taskId}/`).then((res) => {
+      setSelectedTask(res.data);
+      refreshData();
+      return res;
+    });
+
   const handleUpdateTaskStatus = (taskId, newStatus) => {
     const user = localStorage.getItem("admin_logged_in_name") || "Admin";
-    const newLog = {
-      action: `Status changed to ${newStatus}`,
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const currentTask = selectedTask;
-    const updatedLog = [...(currentTask?.activity_log || []), newLog];
-
-    axios.patch(`/api/tasks/${taskId}/`, { status: newStatus, activity_log: updatedLog })
+    axios.post(`/api/tasks/${taskId}/transition/`, {
+      status: newStatus,
+      by: user,
+      expected_status: selectedTask?.status
+    })
       .then((res) => {
         setSelectedTask(res.data);
         refreshData();
       })
-      .catch(err => console.error("Error updating task status:", err));
+      .catch(err => {
+        if (err.response?.status === 409) reloadSelectedTask(taskId);
+        console.error("Error updating task status:", err);
+      });
   };
 
   const handleToggleChecklistDetails = (idx) => {
@@ -578,21 +676,11 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
       i === idx ? { ...item, checked: !item.checked } : item
     );
     const targetItem = selectedTask.checklist[idx];
-    const newLog = {
-      action: `Checklist item "${targetItem.text}" marked as ${!targetItem.checked ? "completed" : "incomplete"}`,
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const updatedLog = [...(selectedTask.activity_log || []), newLog];
+    const action = `Checklist item "${targetItem.text}" marked as ${!targetItem.checked ? "completed" : "incomplete"}`;
 
-    axios.patch(`/api/tasks/${selectedTask.id}/`, {
-      checklist: updatedChecklist,
-      activity_log: updatedLog
-    })
-      .then((res) => {
-        setSelectedTask(res.data);
-        refreshData();
-      })
+    axios.patch(`/api/tasks/${selectedTask.id}/`, { checklist: updatedChecklist })
+      .then(() => logTaskActivity(selectedTask.id, action, user))
+      .then(() => reloadSelectedTask(selectedTask.id))
       .catch(err => console.error("Error toggling checklist item:", err));
   };
 
@@ -601,23 +689,11 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
     const user = localStorage.getItem("admin_logged_in_name") || "Admin";
     const newItem = { text: taskDetailsChecklistInput.trim(), checked: false };
     const updatedChecklist = [...(selectedTask.checklist || []), newItem];
-    
-    const newLog = {
-      action: `Added checklist item "${newItem.text}"`,
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const updatedLog = [...(selectedTask.activity_log || []), newLog];
 
-    axios.patch(`/api/tasks/${selectedTask.id}/`, {
-      checklist: updatedChecklist,
-      activity_log: updatedLog
-    })
-      .then((res) => {
-        setSelectedTask(res.data);
-        setTaskDetailsChecklistInput("");
-        refreshData();
-      })
+    axios.patch(`/api/tasks/${selectedTask.id}/`, { checklist: updatedChecklist })
+      .then(() => logTaskActivity(selectedTask.id, `Added checklist item "${newItem.text}"`, user))
+      .then(() => reloadSelectedTask(selectedTask.id))
+      .then(() => setTaskDetailsChecklistInput(""))
       .catch(err => console.error("Error adding checklist item:", err));
   };
 
@@ -627,51 +703,26 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
     const user = localStorage.getItem("admin_logged_in_name") || "Admin";
     
     const updatedActualHours = (parseFloat(selectedTask.actual_hours) || 0) + hoursVal;
-    const newLog = {
-      action: `Logged ${hoursVal} hrs (Total Actual: ${updatedActualHours} hrs)`,
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const updatedLog = [...(selectedTask.activity_log || []), newLog];
+    const action = `Logged ${hoursVal} hrs (Total Actual: ${updatedActualHours} hrs)`;
 
-    axios.patch(`/api/tasks/${selectedTask.id}/`, {
-      actual_hours: updatedActualHours,
-      activity_log: updatedLog
-    })
-      .then((res) => {
-        setSelectedTask(res.data);
-        setLoggedActualHours("");
-        refreshData();
-      })
+    axios.patch(`/api/tasks/${selectedTask.id}/`, { actual_hours: updatedActualHours })
+      .then(() => logTaskActivity(selectedTask.id, action, user))
+      .then(() => reloadSelectedTask(selectedTask.id))
+      .then(() => setLoggedActualHours(""))
       .catch(err => console.error("Error logging hours:", err));
   };
 
   const handlePostTaskComment = () => {
     if (!taskDetailsCommentInput.trim() || !selectedTask) return;
     const user = localStorage.getItem("admin_logged_in_name") || "Admin";
-    const newComment = {
-      author: user,
-      content: taskDetailsCommentInput.trim(),
-      timestamp: new Date().toISOString()
-    };
-    const updatedComments = [...(selectedTask.comments || []), newComment];
-    
-    const newLog = {
-      action: "Comment added",
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const updatedLog = [...(selectedTask.activity_log || []), newLog];
 
-    axios.patch(`/api/tasks/${selectedTask.id}/`, {
-      comments: updatedComments,
-      activity_log: updatedLog
+    // The server logs "Comment added" with the comment
+    axios.post(`/api/tasks/${selectedTask.id}/comments/`, {
+      author: user,
+      content: taskDetailsCommentInput.trim()
     })
-      .then((res) => {
-        setSelectedTask(res.data);
-        setTaskDetailsCommentInput("");
-        refreshData();
-      })
+      .then(() => reloadSelectedTask(selectedTask.id))
+      .then(() => setTaskDetailsCommentInput(""))
       .catch(err => console.error("Error posting comment:", err));
   };
 
@@ -680,29 +731,13 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
     if (!file || !selectedTask) return;
     const user = localStorage.getItem("admin_logged_in_name") || "Admin";
 
-    const newAttachment = {
-      filename: file.name,
-      sizeBytes: file.size,
-      uploadedAt: new Date().toISOString(),
-      uploadedBy: user
-    };
-    const updatedAttachments = [...(selectedTask.attachments || []), newAttachment];
-    
-    const newLog = {
-      action: `Attachment uploaded: ${file.name}`,
-      timestamp: new Date().toISOString(),
-      by: user
-    };
-    const updatedLog = [...(selectedTask.activity_log || []), newLog];
+    const form = new FormData();
+    form.append("file", file);
+    form.append("uploaded_by", user);
 
-    axios.patch(`/api/tasks/${selectedTask.id}/`, {
-      attachments: updatedAttachments,
-      activity_log: updatedLog
-    })
-      .then((res) => {
-        setSelectedTask(res.data);
-        refreshData();
-      })
+    axios.post(`/api/tasks/${selectedTask.id}/attachments/`, form)
+      .then(() => logTaskActivity(selectedTask.id, `Attachment uploaded: ${file.name}`, user))
+      .then(() => reloadSelectedTask(selectedTask.id))
       .catch(err => console.error("Error uploading attachment:", err));
   };
 
@@ -721,8 +756,6 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
       members: [],
       currentStage: "Project Created",
       description: "",
-      imageName: "",
-      imageBase64: ""
     };
 
     if (!remarks) return result;
@@ -751,10 +784,6 @@ Members: ${details.members.map(m => `${m.name} (${m.role})`).join(", ")}
     if (estHoursMatch) result.estimatedHours = estHoursMatch[1].replace(/hrs|hr/gi, "").trim();
     if (deptMatch) result.department = deptMatch[1].trim();
     if (stageMatch) result.currentStage = stageMatch[1].trim();
-    const imageMatch = remarks.match(/Project Image:\s*(.*)/i);
-    const base64Match = remarks.match(/Project Image Data:\s*(.*)/i);
-    if (imageMatch) result.imageName = imageMatch[1].trim();
-    if (base64Match) result.imageBase64 = base64Match[1].trim();
     if (tagsMatch && tagsMatch[1].trim()) {
       result.tags = tagsMatch[1].split(",").map(t => t.trim());
     }
@@ -822,8 +851,6 @@ Estimated Hours: ${projEstHours || "0"} hrs
 Department: ${projDepartment}
 Tags: ${projTags.join(", ") || "None"}
 Members: ${selectedMembers.map(m => `${m.name} (${m.role})`).join(", ")}
-Project Image: ${projImageName || "None"}
-Project Image Data: ${projImageBase64 || ""}
 `.trim();
 
     // Map priority or status back to DEV/PROD/MAINT
@@ -845,6 +872,19 @@ Project Image Data: ${projImageBase64 || ""}
       : axios.post("/api/home/", payload);
 
     request
+      .then((res) => {
+        // The image goes to its own endpoint as a file; the server makes the thumbnails
+        const imageUrl = `/api/home/${res.data.id}/image/`;
+        if (projImageFile) {
+          const form = new FormData();
+          form.append("image", projImageFile);
+          return axios.put(imageUrl, form);
+        }
+        if (isEditingProject && !projImagePreview && res.data.image_url) {
+          return axios.delete(imageUrl);
+        }
+        return res;
+      })
       .then((res) => {
         setFormSuccessMessage(isEditingProject ? "Project updated successfully!" : "Project created successfully!");
         if (isEditingProject) {
@@ -864,11 +904,11 @@ Project Image Data: ${projImageBase64 || ""}
       });
   };
 
-  // Calculations
-  const totalProjectsCount = projects.length;
-  const activeProjectsCount = projects.filter(p => p.mode === "DEV" || p.mode === "PROD").length;
-  const developers = [...new Set(timesheets.map(t => t.employee_name))];
-  const developersCount = developers.length;
+  // Calculations (the cards come from the dashboard summary, the charts from the board)
+  const totalProjectsCount = summary?.projects.total ?? 0;
+  const activeProjectsCount = summary?.projects.active ?? 0;
+  const developers = summary?.developer_names || [];
+  const developersCount = summary?.developers ?? 0;
 
   const backlogTasks = kanbanTasks.filter(t => t.column === "backlog");
   const todoTasks = kanbanTasks.filter(t => t.column === "todo");
@@ -876,21 +916,11 @@ Project Image Data: ${projImageBase64 || ""}
   const testingTasks = kanbanTasks.filter(t => t.column === "testing");
   const completedTasks = kanbanTasks.filter(t => t.column === "completed");
 
-  const pendingTasksCount = backlogTasks.length + todoTasks.length + inProgressTasks.length + testingTasks.length;
-  const completedTasksCount = completedTasks.length;
-
-  const todayStr = new Date().toISOString().split("T")[0];
-  const todayHours = timesheets.filter(t => t.date === todayStr).reduce((sum, t) => sum + (parseFloat(t.total_hours) || 0), 0);
-  const todayHrsInt = Math.floor(todayHours);
-  const todayMinsInt = Math.round((todayHours - todayHrsInt) * 60);
-  const todayTimeStr = todayMinsInt ? `${todayHrsInt}h ${todayMinsInt}m` : `${todayHrsInt}h`;
+  const pendingTasksCount = summary?.tasks.pending ?? 0;
+  const completedTasksCount = summary?.tasks.completed ?? 0;
 
-  const oneWeekAgo = new Date();
-  oneWeekAgo.setDate(oneWeekAgo.getDate() - 7);
-  const weekHours = timesheets.filter(t => new Date(t.date) >= oneWeekAgo).reduce((sum, t) => sum + (parseFloat(t.total_hours) || 0), 0);
-  const weekHrsInt = Math.floor(weekHours);
-  const weekMinsInt = Math.round((weekHours - weekHrsInt) * 60);
-  const weekTimeStr = weekMinsInt ? `${weekHrsInt}h ${weekMinsInt}m` : `${weekHrsInt}h`;
+  const todayTimeStr = formatHours(summary?.hours.today || 0);
+  const weekTimeStr = formatHours(summary?.hours.week || 0);
 
   const donutSegments = [
     { label: "To Do", count: todoTasks.length, color: "#00a2e8" },
@@ -1344,10 +1374,10 @@ Project Image Data: ${projImageBase64 || ""}
                       </div>
 
                       <div style={{ display: "flex", flexDirection: "column", gap: 16, flex: 1 }}>
-                        {timesheets.length === 0 ? (
+                        {recentTimesheets.length === 0 ? (
                           <div style={{ textAlign: "center", color: "#94a3b8", fontSize: 13, padding: "20px 0" }}>No recent activity logs</div>
                         ) : (
-                          timesheets.slice(0, 5).map((ts, idx) => {
+                          recentTimesheets.map((ts, idx) => {
                             const taskDesc = ts.tasks[0]?.description || "Logged hours";
                             return (
                               <div key={idx} style={{ display: "flex", gap: 10, fontSize: 12 }}>
@@ -1757,11 +1787,11 @@ Project Image Data: ${projImageBase64 || ""}
                       <div style={{ background: "#fff", borderRadius: 12, border: "1px solid #e2e8f0", padding: 24, boxShadow: "0 4px 20px rgba(0,0,0,0.02)" }}>
                         <div style={{ display: "grid", gridTemplateColumns: "repeat(5, 1fr)", gap: 12 }}>
                           {[
-                            { id: "backlog", label: "Backlog", tasks: kanbanTasks.filter(t => t.column === "backlog"), color: "#f8fafc" },
-                            { id: "todo", label: "To Do", tasks: kanbanTasks.filter(t => t.column === "todo"), color: "#eff6ff" },
-                            { id: "inprogress", label: "In Progress", tasks: kanbanTasks.filter(t => t.column === "inprogress"), color: "#ecfdf5" },
-                            { id: "testing", label: "Testing", tasks: kanbanTasks.filter(t => t.column === "testing"), color: "#fdf4ff" },
-                            { id: "completed", label: "Completed", tasks: kanbanTasks.filter(t => t.column === "completed"), color: "#f0fdf4" }
+                            { id: "backlog", label: "Backlog", tasks: kanbanTasks.filter(t => t.column === "backlog").sort((a, b) => a.position - b.position), color: "#f8fafc" },
+                            { id: "todo", label: "To Do", tasks: kanbanTasks.filter(t => t.column === "todo").sort((a, b) => a.position - b.position), color: "#eff6ff" },
+                            { id: "inprogress", label: "In Progress", tasks: kanbanTasks.filter(t => t.column === "inprogress").sort((a, b) => a.position - b.position), color: "#ecfdf5" },
+                            { id: "testing", label: "Testing", tasks: kanbanTasks.filter(t => t.column === "testing").sort((a, b) => a.position - b.position), color: "#fdf4ff" },
+                            { id: "completed", label: "Completed", tasks: kanbanTasks.filter(t => t.column === "completed").sort((a, b) => a.position - b.position), color: "#f0fdf4" }
                           ].map(col => {
                             const finalTasks = col.tasks.filter(t => t.title.toLowerCase().includes(search.toLowerCase()) || t.developer.toLowerCase().includes(search.toLowerCase()));
                             return (
@@ -1867,10 +1897,9 @@ Project Image Data: ${projImageBase64 || ""}
                                   const priColors = priorityColors[taskPri] || { bg: "#f1f5f9", text: "#475569" };
                                   const statColors = statusColors[taskStat] || { bg: "#f1f5f9", text: "#475569" };
 
-                                  // Calculate progress based on checklist items
-                                  const checklist = task.rawTask?.checklist || [];
-                                  const totalCheck = checklist.length;
-                                  const completedCheck = checklist.filter(c => c.checked).length;
+                                  // Calculate progress based on checklist items (the list API sends counts, not the items)
+                                  const totalCheck = task.rawTask?.checklist_total || 0;
+                                  const completedCheck = task.rawTask?.checklist_done || 0;
                                   const progressPct = totalCheck ? Math.round((completedCheck / totalCheck) * 100) : (taskStat === "Completed" ? 100 : 0);
 
                                   return (
@@ -2152,19 +2181,16 @@ Project Image Data: ${projImageBase64 || ""}
                               const file = e.target.files[0];
                               if (file) {
                                 setProjImageName(file.name);
-                                const reader = new FileReader();
-                                reader.onloadend = () => {
-                                  setProjImageBase64(reader.result);
-                                };
-                                reader.readAsDataURL(file);
+                                setProjImageFile(file);
+                                setProjImagePreview(URL.createObjectURL(file));
                               }
                             }}
                             style={{ position: "absolute", top: 0, left: 0, width: "100%", height: "100%", opacity: 0, cursor: "pointer" }} />
-                          {projImageBase64 ? (
+                          {projImagePreview ? (
                             <div style={{ display: "flex", flexDirection: "column", alignItems: "center", gap: 8 }}>
-                              <img src={projImageBase64} alt="Preview" style={{ maxWidth: "100%", maxHeight: 100, borderRadius: 6, objectFit: "contain" }} />
+                              <img src={projImagePreview} alt="Preview" style={{ maxWidth: "100%", maxHeight: 100, borderRadius: 6, objectFit: "contain" }} />
                               <div style={{ fontSize: 12, fontWeight: 700, color: "#00a2e8" }}>{projImageName}</div>
-                              <button type="button" onClick={(e) => { e.preventDefault(); e.stopPropagation(); setProjImageName(""); setProjImageBase64(""); }}
+                              <button type="button" onClick={(e) => { e.preventDefault(); e.stopPropagation(); setProjImageName(""); setProjImagePreview(""); setProjImageFile(null); }}
                                 style={{ background: "none", border: "none", color: "#f87171", cursor: "pointer", fontSize: 12, fontWeight: 700 }}>
                                 Remove Image
                               </button>
@@ -2358,20 +2384,9 @@ Project Image Data: ${projImageBase64 || ""}
                           <input type="file" multiple
                             onChange={(e) => {
                               const files = Array.from(e.target.files);
-                              files.forEach(file => {
-                                const reader = new FileReader();
-                                reader.onloadend = () => {
-                                  const newAtt = {
-                                    filename: file.name,
-                                    sizeBytes: file.size,
-                                    uploadedAt: new Date().toISOString(),
-                                    uploadedBy: localStorage.getItem("admin_logged_in_name") || "Developer",
-                                    data: reader.result
-                                  };
-                                  setTaskAttachments(prev => [...prev, newAtt]);
-                                };
-                                reader.readAsDataURL(file);
-                              });
+                              // Uploaded after the task is saved (see handleSaveTask)
+                              const staged = files.map(file => ({ filename: file.name, sizeBytes: file.size, file }));
+                              setTaskAttachments(prev => [...prev, ...staged]);
                             }}
                             style={{ position: "absolute", top: 0, left: 0, width: "100%", height: "100%", opacity: 0, cursor: "pointer" }} />
                           <div style={{ fontSize: 24, color: "#94a3b8" }}>☁️</div>
@@ -2497,9 +2512,9 @@ Project Image Data: ${projImageBase64 || ""}
                 const totalTasksCount = projectTasks.length;
                 const progressPct = totalTasksCount ? Math.round((completedCount / totalTasksCount) * 100) : 0;
 
-                // Find logged hours for this project from actual timesheets
-                const projectTimesheets = timesheets.filter(ts => String(ts.project) === String(selectedProject.id));
-                const totalLoggedHours = projectTimesheets.reduce((sum, ts) => sum + (parseFloat(ts.total_hours) || 0), 0);
+                // Logged hours from the dashboard summary; the Time Logs table pages through the rows
+                const totalLoggedHours = summary?.hours.by_project[selectedProject.id] || 0;
+                const timeLogRows = projectTimesheets.projectId === selectedProject.id ? projectTimesheets.rows : [];
 
                 const priorityDotColor = {
                   Low: "#10b981",
@@ -2932,7 +2947,7 @@ Project Image Data: ${projImageBase64 || ""}
                     {detailsActiveTab === "Time Logs" && (
                       <div style={{ background: "#ffffff", borderRadius: 12, border: "1px solid #e2e8f0", padding: 24 }}>
                         <h3 style={{ fontSize: 14, fontWeight: 800, color: "#0f172a", borderBottom: "1px solid #f1f5f9", paddingBottom: 8, margin: "0 0 16px 0" }}>Logged Timesheets</h3>
-                        {projectTimesheets.length === 0 ? (
+                        {timeLogRows.length === 0 ? (
                           <div style={{ textAlign: "center", color: "#94a3b8", padding: 24 }}>No timesheets submitted for this project yet.</div>
                         ) : (
                           <div style={{ overflowX: "auto", marginTop: 16 }}>
@@ -2946,7 +2961,7 @@ Project Image Data: ${projImageBase64 || ""}
                                 </tr>
                               </thead>
                               <tbody>
-                                {projectTimesheets.map(ts => (
+                                {timeLogRows.map(ts => (
                                   <tr key={ts.id} style={{ borderBottom: "1px solid #f1f5f9" }}>
                                     <td style={{ padding: "12px 8px" }}>{formatDateStr(ts.date)}</td>
                                     <td style={{ padding: "12px 8px", fontWeight: 700 }}>{ts.employee_name}</td>
@@ -2960,6 +2975,11 @@ Project Image Data: ${projImageBase64 || ""}
                                 ))}
                               </tbody>
                             </table>
+                            {projectTimesheets.cursor && (
+                              <button onClick={loadMoreProjectTimesheets} style={{ ...moveBtn, display: "block", margin: "16px auto 0", padding: "6px 14px", fontSize: 12, fontWeight: 700 }}>
+                                Load older timesheets
+                              </button>
+                            )}
                           </div>
                         )}
                       </div>
@@ -3269,7 +3289,9 @@ Project Image Data: ${projImageBase64 || ""}
                                   <div style={{ fontSize: 9, color: "#94a3b8" }}>{(file.sizeBytes / 1024 / 1024).toFixed(1)} MB • {formatDateStr(file.uploadedAt)}</div>
                                 </div>
                               </div>
-                              <span style={{ color: "#00a2e8", fontSize: 11, fontWeight: 700, cursor: "pointer" }}>Download</span>
+                              {file.url && (
+                                <a href={file.url} style={{ color: "#00a2e8", fontSize: 11, fontWeight: 700, cursor: "pointer", textDecoration: "none" }}>Download</a>
+                              )}
                             </div>
                           ))}
 
@@ -3284,7 +3306,7 @@ Project Image Data: ${projImageBase64 || ""}
 
                       {/* Comments Card */}
                       <div style={{ background: "#ffffff", borderRadius: 12, border: "1px solid #e2e8f0", padding: 24, display: "flex", flexDirection: "column" }}>
-                        <h3 style={{ fontSize: 14, fontWeight: 800, color: "#0f172a", borderBottom: "1px solid #f1f5f9", paddingBottom: 8, margin: "0 0 16px 0" }}>Comments ({(selectedTask.comments || []).length})</h3>
+                        <h3 style={{ fontSize: 14, fontWeight: 800, color: "#0f172a", borderBottom: "1px solid #f1f5f9", paddingBottom: 8, margin: "0 0 16px 0" }}>Comments ({selectedTask.comment_count ?? (selectedTask.comments || []).length})</h3>
                         
                         <div style={{ display: "flex", flexDirection: "column", gap: 14, marginTop: 12, flex: 1, maxHeight: 200, overflowY: "auto", marginBottom: 16 }}>
                           {(selectedTask.comments || []).length > 0 ? (